@@ -3,6 +3,7 @@ import sys
 import os
 import json
 import string
+import struct
 from array import array as Array
 
 #sys.path.append(os.path.join(os.path.dirname(__file__)))
@@ -20,25 +21,115 @@ class DRTError(Exception):
   def __str__(self):
     return repr(self.value)
 
+#flags of a device
+STANDARD_DEVICE_FLAG  = 0x00000001
+MEMORY_DEVICE_FLAG    = 0x00010000
+
 class DRTManager():
+  """DRTManager
+
+  Decodes the Device ROM Table once when it is set, the fields of the devices
+  are kept in arrays (one entry per device) with indexes by device ID and by
+  bus so the queries do not parse the table
+  """
 
   def __init__(self):
     self.drt_lines = []
     self.drt_string = ""
     self.drt = Array('B')
     self.num_of_devices = 0
+    self.version = 0
+    self.id_word = 0
+    #struct of arrays, one entry per device
+    self.ids = Array('I')
+    self.flags = Array('I')
+    self.addresses = Array('I')
+    self.sizes = Array('I')
+    #device ID: tuple of device indexes
+    self.id_index = {}
+    #True (memory bus)/False (peripheral bus): tuple of device indexes
+    self.bus_index = {True: (), False: ()}
+    #(device ID, memory bus): tuple of device indexes
+    self.id_bus_index = {}
 
   def set_drt(self, drt):
+    """set_drt
+
+    Decode a DRT read from an image
+
+    Args:
+      drt: Array of the bytes of the DRT (the header and all the devices)
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
     self.drt = drt
-    self.drt_string = ""
     self.num_of_devices = get_number_of_devices(drt)
     display_len = 8 + self.num_of_devices * 8
-    for i in range (0, display_len):
-      self.drt_string += "%02X%02X%02X%02X\n"% (self.drt[i * 4], self.drt[(i * 4) + 1], self.drt[i * 4 + 2], self.drt[i * 4 + 3])
-
+    raw = Array('B', drt[:display_len * 4]).tostring()
+    words = struct.unpack(">%dI" % (len(raw) / 4), raw[:len(raw) & ~0x03])
+    self.drt_string = "".join(["%08X\n" % w for w in words])
     self.drt_lines = self.drt_string.splitlines()
-    self.num_of_devices = get_number_of_devices(self.drt)
 
+    self.version = words[0] >> 16
+    self.id_word = words[0] & 0xFFFF
+    self.ids = Array('I', words[8::8])
+    self.flags = Array('I', words[9::8])
+    self.addresses = Array('I', words[10::8])
+    self.sizes = Array('I', words[11::8])
+
+    id_index = {}
+    id_bus_index = {}
+    bus_index = {True: [], False: []}
+    for i in range(len(self.ids)):
+      memory = (self.flags[i] & MEMORY_DEVICE_FLAG) > 0
+      id_index.setdefault(self.ids[i], []).append(i)
+      id_bus_index.setdefault((self.ids[i], memory), []).append(i)
+      bus_index[memory].append(i)
+
+    self.id_index = dict((k, tuple(v)) for k, v in id_index.items())
+    self.id_bus_index = dict((k, tuple(v)) for k, v in id_bus_index.items())
+    self.bus_index = dict((k, tuple(v)) for k, v in bus_index.items())
+
+  def find_devices(self, device_type, memory_device = None):
+    """find_devices
+
+    Returns the indexes of all the devices of a type
+
+    Args:
+      device_type: device identification number (see drt.json)
+      memory_device: True: only devices on the memory bus
+                     False: only devices on the peripheral bus
+                     None: devices on both busses
+
+    Returns:
+      tuple of device indexes (empty if there are no devices of the type)
+
+    Raises:
+      Nothing
+    """
+    if memory_device is None:
+      return self.id_index.get(device_type, ())
+    return self.id_bus_index.get((device_type, memory_device), ())
+
+  def get_bus_devices(self, memory_device):
+    """get_bus_devices
+
+    Returns the indexes of all the devices on a bus
+
+    Args:
+      memory_device: True for the memory bus, False for the peripheral bus
+
+    Returns:
+      tuple of device indexes
+
+    Raises:
+      Nothing
+    """
+    return self.bus_index[memory_device]
 
   def is_memory_device(self, device_index):
     """is_memory_device
@@ -56,12 +147,7 @@ class DRTManager():
     Raises:
       Nothing
     """
-    flags = int(self.drt_lines[((device_index + 1) * 8) + 1], 16)
-
-    if ((flags & 0x00010000) > 0):
-      return True
-
-    return False
+    return (self.flags[device_index] & MEMORY_DEVICE_FLAG) > 0
     
 
   def get_number_of_devices(self):
@@ -98,13 +184,7 @@ class DRTManager():
     Raises:
       Nothing
     """
-    for dev_index in range (0, self.num_of_devices):
-      dev_id = string.atoi(self.drt_lines[((dev_index + 1) * 8)], 16)
-      if (self.dbg):
-        print "dev_id: " + str(dev_id)
-      if (dev_id == device_id):
-        return True
-    return False
+    return device_id in self.id_index
   
   def get_address_from_index(self, device_index):
     """get_address_from_index
@@ -121,7 +201,7 @@ class DRTManager():
     Raises:
       Nothing
     """
-    return (string.atoi(self.drt_lines[((device_index + 1) * 8) + 2], 16)) >> 24
+    return self.addresses[device_index] >> 24
 
 
   def get_id_from_index(self, device_index):
@@ -138,7 +218,7 @@ class DRTManager():
     Raises:
       Nothing
     """
-    return string.atoi(self.drt_lines[((device_index + 1) * 8)], 16)
+    return self.ids[device_index]
 
 
   def get_size_from_index(self, device_index):
@@ -157,7 +237,7 @@ class DRTManager():
     Raises:
       Nothing
     """
-    return string.atoi(self.drt_lines[((device_index + 1) * 8) + 3], 16)
+    return self.sizes[device_index]
 
   def get_device_flags(self, device_index):
     """get_device_flags
@@ -166,10 +246,10 @@ class DRTManager():
     device_index
     """
     flag_strings = []
-    flags = int(self.drt_lines[((device_index + 1) * 8) + 1], 16)
-    if ((flags & 0x00000001) > 0):
+    flags = self.flags[device_index]
+    if ((flags & STANDARD_DEVICE_FLAG) > 0):
       flag_strings.append("0x00000001: Standard Device")
-    if ((flags & 0x00010000) > 0):
+    if ((flags & MEMORY_DEVICE_FLAG) > 0):
       flag_strings.append("0x00010000: Memory Device")
     return flag_strings
 
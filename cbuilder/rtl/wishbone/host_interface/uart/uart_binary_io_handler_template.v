@@ -0,0 +1,367 @@
+//uart_binary_io_handler_template.v
+/*
+Distributed under the MIT licesnse.
+Copyright (c) 2011 Dave McCoy (dave.mccoy@cospandesign.com)
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of
+this software and associated documentation files (the "Software"), to deal in 
+the Software without restriction, including without limitation the rights to 
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies 
+of the Software, and to permit persons to whom the Software is furnished to do 
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all 
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER 
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, 
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE 
+SOFTWARE.
+*/
+
+/*
+  10/18/2026
+    -Initial Commit, binary version of uart_io_handler: the count, command,
+    address and data words are sent as 4 big endian bytes instead of 8 hex
+    characters
+
+  Generate a handler from this template with
+    cbuilder/scripts/generate_io_handler.py
+
+  Command:  ID(0xCD) COUNT(4) COMMAND(4) ADDRESS(4) DATA(4 per word)
+  Response: ID(0xDC) COUNT(4) STATUS(4)  ADDRESS(4) DATA(4 per word)
+*/
+
+`include "mg_defines.v"
+
+module uart_binary_io_handler_template (
+  //globals
+  clk,
+  rst,
+
+  //input handler
+  master_ready,
+  ih_ready,
+  ih_reset,
+
+  //incomming data
+  in_command,
+  in_address,
+  in_data,
+  in_data_count,
+
+  //output
+  oh_ready,
+  oh_en,
+
+  //outgoing data
+  out_status,
+  out_address,
+  out_data,
+  out_data_count,
+
+  //phy
+  phy_uart_in,
+  phy_uart_out
+);
+
+//input/output signals
+input               clk;
+input               rst;
+
+//input handler
+output reg          ih_ready;
+output              ih_reset;
+input               master_ready;
+
+output reg [31:0]   in_command;
+output reg [31:0]   in_address;
+output reg [31:0]   in_data;
+output reg [27:0]   in_data_count;
+
+
+//output handler
+output  reg         oh_ready;
+input               oh_en;
+
+input [31:0]        out_status;
+input [31:0]        out_address;
+input [31:0]        out_data;
+input [27:0]        out_data_count;
+
+input               phy_uart_in;
+output              phy_uart_out;
+
+//wires
+reg [7:0]           out_byte;
+wire                in_byte_available;
+wire [7:0]          in_byte;
+wire                uart_in_busy;
+
+wire                uart_out_busy;
+wire                uart_tx_ready;
+reg                 uart_out_byte_en;
+reg                 uart_wait_for_tx;
+
+reg [27:0]          lout_data_count;
+reg [31:0]          lout_data;
+reg [31:0]          lout_status;
+reg [31:0]          lout_address;
+reg [31:0]          lout_count;
+
+assign              uart_tx_ready = ~uart_out_busy;
+
+//STATES
+parameter IDLE                = 8'h0;
+parameter READ_DATA_COUNT     = 8'h1;
+parameter READ_CONTROL        = 8'h2;
+parameter READ_ADDRESS        = 8'h3;
+parameter READ_DATA           = 8'h4;
+
+parameter WRITE_DATA_COUNT    = 8'h1;
+parameter WRITE_STATUS        = 8'h2;
+parameter WRITE_ADDRESS       = 8'h3;
+parameter WRITE_DATA          = 8'h4;
+
+parameter ID_BYTE             = 8'hCD;
+parameter RESPONSE_ID_BYTE    = 8'hDC;
+
+//Registers
+reg [7:0]           in_state;
+reg [7:0]           out_state;
+
+reg [2:0]           in_byte_count;
+reg [2:0]           out_byte_count;
+
+wire    [15:0]      user_command;
+wire                is_writing;
+assign  user_command  = in_command[15:0];
+assign  is_writing    = (user_command == `COMMAND_WRITE);
+
+assign  ih_reset      = 0;
+
+uart uart_dev (
+  .clk(clk),
+  .rst(rst),
+  .rx(phy_uart_in),
+  .tx(phy_uart_out),
+  .transmit(uart_out_byte_en),
+  .tx_byte(out_byte),
+  .received(in_byte_available),
+  .rx_byte(in_byte),
+  .is_receiving(uart_in_busy),
+  .is_transmitting(uart_out_busy)
+);
+
+//input handler
+always @ (posedge clk) begin
+
+  ih_ready  <= 0;
+
+  if (rst) begin
+    in_command          <= 32'h0000;
+    in_address          <= 32'h0000;
+    in_data             <= 32'h0000;
+    in_state            <= IDLE;
+    in_byte_count       <= 3'h0;
+    in_data_count       <= 28'h0;
+  end
+  else begin
+    case (in_state)
+      IDLE: begin
+        if (in_byte_available && (in_byte == ID_BYTE)) begin
+          in_command    <= 32'h0000;
+          in_address    <= 32'h0000;
+          in_data       <= 32'h0000;
+          in_data_count <= 28'h0;
+          in_byte_count <= 3'h0;
+          in_state      <= READ_DATA_COUNT;
+        end
+      end
+      READ_DATA_COUNT: begin
+        if (in_byte_available) begin
+          in_data_count       <= {in_data_count[19:0], in_byte};
+          if (in_byte_count >= 3) begin
+            in_byte_count     <= 3'h0;
+            in_state          <= READ_CONTROL;
+          end
+          else begin
+            in_byte_count     <= in_byte_count + 1;
+          end
+        end
+      end
+      READ_CONTROL: begin
+        if (in_byte_available) begin
+          in_command          <= {in_command[23:0], in_byte};
+          if (in_byte_count >= 3) begin
+            in_byte_count     <= 3'h0;
+            in_state          <= READ_ADDRESS;
+          end
+          else begin
+            in_byte_count     <= in_byte_count + 1;
+          end
+        end
+      end
+      READ_ADDRESS: begin
+        if (in_byte_available) begin
+          in_address          <= {in_address[23:0], in_byte};
+          if (in_byte_count >= 3) begin
+            in_byte_count     <= 3'h0;
+            in_state          <= READ_DATA;
+          end
+          else begin
+            in_byte_count     <= in_byte_count + 1;
+          end
+        end
+      end
+      READ_DATA: begin
+        if (in_byte_count <= 3) begin
+          if (in_byte_available) begin
+            in_data           <= {in_data[23:0], in_byte};
+            in_byte_count     <= in_byte_count + 1;
+          end
+        end
+        else begin
+          //a whole word has been received
+          if (master_ready) begin
+            if (is_writing && in_data_count > 0) begin
+              in_data_count   <= in_data_count - 1;
+            end
+            else begin
+              in_state        <= IDLE;
+            end
+            ih_ready          <= 1;
+            in_byte_count     <= 3'h0;
+          end
+        end
+      end
+      default: begin
+        in_command            <= 32'h0;
+        in_state              <= IDLE;
+      end
+    endcase
+  end
+end
+
+
+//output handler
+always @ (posedge clk) begin
+
+  //uart_out_byte_en should only be high for one clock cycle
+  uart_out_byte_en        <= 0;
+
+  if (rst) begin
+    out_state             <= IDLE;
+    out_byte_count        <= 3'h0;
+    out_byte              <= 8'h0;
+    lout_data_count       <= 28'h0;
+    lout_count            <= 32'h0;
+    lout_data             <= 32'h0;
+    lout_status           <= 32'h0;
+    lout_address          <= 32'h0;
+    uart_wait_for_tx      <= 0;
+    oh_ready              <= 0;
+  end
+
+  else begin
+    //don't do anything until the UART is ready
+    if (~uart_wait_for_tx & uart_tx_ready) begin
+      case (out_state)
+        IDLE: begin
+          out_byte_count        <= 3'h0;
+          oh_ready              <= 1;
+          if (oh_en) begin
+            lout_status         <= out_status;
+            lout_address        <= out_address;
+            lout_data           <= out_data;
+
+            out_byte            <= RESPONSE_ID_BYTE;
+            out_state           <= WRITE_DATA_COUNT;
+            oh_ready            <= 0;
+            uart_out_byte_en    <= 1;
+            uart_wait_for_tx    <= 1;
+          end
+          else begin
+            lout_data_count     <= out_data_count;
+            lout_count          <= {4'h0, out_data_count};
+          end
+        end
+        WRITE_DATA_COUNT: begin
+          out_byte              <= lout_count[31:24];
+          lout_count            <= {lout_count[23:0], 8'h0};
+          uart_out_byte_en      <= 1;
+          uart_wait_for_tx      <= 1;
+          if (out_byte_count >= 3) begin
+            out_state           <= WRITE_STATUS;
+            out_byte_count      <= 3'h0;
+          end
+          else begin
+            out_byte_count      <= out_byte_count + 1;
+          end
+        end
+        WRITE_STATUS: begin
+          out_byte              <= lout_status[31:24];
+          lout_status           <= {lout_status[23:0], 8'h0};
+          uart_out_byte_en      <= 1;
+          uart_wait_for_tx      <= 1;
+          if (out_byte_count >= 3) begin
+            out_state           <= WRITE_ADDRESS;
+            out_byte_count      <= 3'h0;
+          end
+          else begin
+            out_byte_count      <= out_byte_count + 1;
+          end
+        end
+        WRITE_ADDRESS: begin
+          out_byte              <= lout_address[31:24];
+          lout_address          <= {lout_address[23:0], 8'h0};
+          uart_out_byte_en      <= 1;
+          uart_wait_for_tx      <= 1;
+          if (out_byte_count >= 3) begin
+            out_state           <= WRITE_DATA;
+            out_byte_count      <= 3'h0;
+          end
+          else begin
+            out_byte_count      <= out_byte_count + 1;
+          end
+        end
+        WRITE_DATA: begin
+          if (out_byte_count <= 3) begin
+            out_byte            <= lout_data[31:24];
+            lout_data           <= {lout_data[23:0], 8'h0};
+            uart_out_byte_en    <= 1;
+            uart_wait_for_tx    <= 1;
+            out_byte_count      <= out_byte_count + 1;
+          end
+          else begin
+            if (lout_data_count > 0) begin
+              oh_ready          <= 1;
+              if (oh_en) begin
+                oh_ready        <= 0;
+                lout_data_count <= lout_data_count - 1;
+                lout_data       <= out_data;
+                out_byte_count  <= 3'h0;
+              end
+            end
+            else begin
+              out_state         <= IDLE;
+              out_byte_count    <= 3'h0;
+            end
+          end
+        end
+        default: begin
+          out_state             <= IDLE;
+        end
+      endcase
+    end
+  end
+
+  if (~uart_tx_ready) begin
+    uart_wait_for_tx      <= 0;
+  end
+end
+
+endmodule
@@ -1,4 +1,122 @@
+#! /usr/bin/python
+#generate_io_handler
+
+"""
+Generates a UART io handler for the wishbone master
+
+The binary handler speaks the protocol of
+host/userland/uart/uart_binary_host.py, the ascii handler is the original
+uart_io_handler (uart_host.py)
+"""
+
+"""
+Changes:
+10/18/2026
+  -Generate the binary and ascii UART io handlers
+"""
+
+import os
+import sys
+import getopt
+
+#protocol: (template file, name of the module in the template)
+TEMPLATES = {
+  "binary": ("uart_binary_io_handler_template.v", "uart_binary_io_handler_template"),
+  "ascii":  ("uart_io_handler.v", "uart_io_handler")
+}
+
+
+def usage():
+  """prints out a helpful message to the user"""
+  print "Generates a UART io handler for the wishbone master"
+  print ""
+  print "usage: generate_io_handler.py [options] <module name>"
+  print ""
+  print "module name: the name of the generated module, the file is"
+  print "\t<module name>.v"
+  print ""
+  print "options:"
+  print "-h\t--help\t\t\t: displays this help"
+  print "-v\t--verbose\t\t: print out lots of info"
+  print "-p\t--protocol\t\t: binary (default) or ascii"
+  print "-o\t--output\t\t: output directory (default: current directory)"
+  print ""
+  print "example:"
+  print "generate_io_handler.py --protocol=binary uart_binary_io_handler"
+  print ""
+
+
+def generate_io_handler(mg_path, protocol, module_name):
+  """generate_io_handler
+
+  Read the template of the protocol and rename the module
+
+  Args:
+    mg_path: path of cbuilder
+    protocol: binary or ascii
+    module_name: name of the generated module
+
+  Returns:
+    string of the verilog module
+
+  Raises:
+    KeyError: Unknown protocol
+    IOError: the template can not be read
+  """
+  template_name, template_module = TEMPLATES[protocol]
+  f = open(os.path.join(mg_path, "rtl", "wishbone", "host_interface", "uart",
+                        template_name))
+  buf = f.read()
+  f.close()
+
+  buf = buf.replace("//%s.v" % template_module, "//%s.v" % module_name, 1)
+  return buf.replace("module %s " % template_module, "module %s " % module_name, 1)
 
 
 if __name__ == "__main__":
-	print "tooo dooo!!"
+  #assume we are in <olympus>/cbuilder/scripts
+  mg_path = os.path.realpath(os.path.join(os.path.dirname(__file__), os.pardir))
+  verbose = False
+  protocol = "binary"
+  output = os.getcwd()
+
+  try:
+    opts, args = getopt.getopt(sys.argv[1:], "hvp:o:", ["help", "verbose", "protocol=", "output="])
+  except getopt.GetoptError, err:
+    print(err)
+    usage()
+    sys.exit(2)
+
+  for opt, arg in opts:
+    if opt in ("-h", "--help"):
+      usage()
+      sys.exit()
+    elif opt in ("-v", "--verbose"):
+      verbose = True
+    elif opt in ("-p", "--protocol"):
+      protocol = arg
+    elif opt in ("-o", "--output"):
+      output = arg
+
+  if len(args) != 1:
+    usage()
+    sys.exit(1)
+
+  if protocol not in TEMPLATES:
+    print "Unknown protocol: %s" % protocol
+    usage()
+    sys.exit(1)
+
+  module_name = args[0]
+  try:
+    buf = generate_io_handler(mg_path, protocol, module_name)
+  except IOError, err:
+    print "File Error: " + str(err)
+    sys.exit(4)
+
+  path = os.path.join(output, module_name + ".v")
+  if verbose:
+    print "Generating: " + path
+  f = open(path, "w")
+  f.write(buf)
+  f.close()
@@ -33,6 +33,9 @@ __author__ = 'dave.mccoy@cospandesign.com (Dave McCoy)'
 08/30/2012
   -Initial Commit
 
+10/18/2026
+  -Added an option to run against the emulated board
+
 """
 
 import time
@@ -47,6 +50,7 @@ from array import array as Array
 from userland import olympus
 from userland.olympus import OlympusCommError
 from userland.dionysus.dionysus import Dionysus
+from userland.emulator.board import emulated_dionysus
 from userland.drivers import uart
 from userland.drivers import gpio
 from userland.drivers import spi
@@ -237,6 +241,7 @@ def usage():
   print "-m\t--memory\t\t\t: test only memory"
   print "-l\t--long\t\t\t\t: long memory test"
   print "-t\t--test\t\t\t\t: test"
+  print "-e\t--emulate\t\t\t: use an emulated board instead of the FTDI"
   print ""
 
 
@@ -251,7 +256,7 @@ if __name__ == '__main__':
     dyn = None
     if (len(argv) > 0):
       opts = None
-      opts, args = getopt.getopt(argv, "hdmlt", ["help", "debug", "memory", "long", "test"])
+      opts, args = getopt.getopt(argv, "hdmlte", ["help", "debug", "memory", "long", "test", "emulate"])
       for opt, arg in opts:
         if opt in ("-h", "--help"):
           usage()
@@ -266,6 +271,8 @@ if __name__ == '__main__':
           long_mem_test = True
         elif opt in ("-t", "--test"):
           test = True
+        elif opt in ("-e", "--emulate"):
+          dyn = emulated_dionysus()
 
     if dyn is None:
       dyn = Dionysus(debug = False)
@@ -0,0 +1,363 @@
+#Distributed under the MIT licesnse.
+#Copyright (c) 2011 Dave McCoy (dave.mccoy@cospandesign.com)
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy of
+#this software and associated documentation files (the "Software"), to deal in
+#the Software without restriction, including without limitation the rights to
+#use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+#of the Software, and to permit persons to whom the Software is furnished to do
+#so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+""" async_olympus
+
+Non blocking front end for an Olympus interface
+
+A single I/O thread owns the Olympus interface (and the FTDI handle behind
+it), reads, writes, pings and interrupt waits are handed to the thread and
+return a request that is resolved when the response arrives. All the reads
+and writes that are waiting when the thread wakes up are sent as one burst
+so several streams (I2S refills, logic analyzer captures, GPIO events) can
+share the board without a thread each
+
+If an event loop is specified (asyncio, or trollius on Python 2) the calls
+return a Future of that loop instead so they can be awaited from a coroutine
+
+"""
+
+__author__ = 'dave.mccoy@cospandesign.com (Dave McCoy)'
+
+import time
+import threading
+import Queue
+
+try:
+  import asyncio
+except ImportError:
+  try:
+    import trollius as asyncio
+  except ImportError:
+    asyncio = None
+
+from userland import codec
+from userland.olympus import OlympusRequest
+from userland.olympus import OlympusCommError
+
+
+def _comm_error(err):
+  """errors of the USB device are reported to the requests as
+  OlympusCommError"""
+  if isinstance(err, OlympusCommError):
+    return err
+  return OlympusCommError(str(err))
+
+
+class AsyncRequest(OlympusRequest):
+  """AsyncRequest
+
+  OlympusRequest that can be waited on from another thread
+  """
+
+  #ping and interrupt waits are not read or write commands
+  PING      = codec.COMMAND_PING
+  INTERRUPT = "interrupt"
+
+  def __init__(self, command, device_id = 0, address = 0, length = 1,
+               data = None, mem_device = False, callback = None):
+    OlympusRequest.__init__(self, command, device_id, address,
+                            length = length,
+                            data = data,
+                            mem_device = mem_device,
+                            callback = callback)
+    self.event = threading.Event()
+    self.deadline = None
+
+  def set_result(self, response):
+    self.event.set()
+    OlympusRequest.set_result(self, response)
+
+  def set_error(self, error):
+    self.event.set()
+    OlympusRequest.set_error(self, error)
+
+  def wait(self, timeout = None):
+    """wait
+
+    Block until the request is resolved
+
+    Args:
+      timeout: maximum time to wait in seconds, None to wait forever
+
+    Returns:
+      The result of the request (see OlympusRequest.result)
+
+    Raises:
+      OlympusCommError: Error in communication, or the request was not
+      resolved before the timeout
+    """
+    self.event.wait(timeout)
+    return self.result()
+
+
+class AsyncOlympus:
+  """AsyncOlympus
+
+  Hands all the communication with an Olympus interface to one I/O thread
+  """
+
+  #time the I/O thread waits for an interrupt before checking for new requests
+  interrupt_poll = 0.01
+  #time the I/O thread sleeps when there is nothing to do
+  idle_timeout = 0.1
+
+  def __init__(self, olympus, loop = None):
+    """__init__
+
+    Args:
+      olympus: Olympus interface (Dionysus), after this only the I/O thread
+        should use it
+      loop: event loop the results are delivered to, if None the calls return
+        an AsyncRequest
+
+    Returns:
+      Nothing
+
+    Raises:
+      OlympusCommError: an event loop is specified but asyncio is not available
+    """
+    if loop is not None and asyncio is None:
+      raise OlympusCommError("asyncio is not available")
+
+    self.o = olympus
+    self.loop = loop
+    self.requests = Queue.Queue()
+    self.interrupt_waiters = []
+    self.running = True
+    self.thread = threading.Thread(target = self._run)
+    self.thread.daemon = True
+    self.thread.start()
+
+  def close(self):
+    """close
+
+    Stop the I/O thread, requests that were not processed fail
+
+    Args:
+      Nothing
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    self.running = False
+    self.requests.put(None)
+    self.thread.join()
+
+  def read(self, device_id, address, length = 1, mem_device = False):
+    """read
+
+    Read from an Olympus image
+
+    Args:
+      device_id: Device identification number, found in the DRT
+      address: Address of the register/memory to read
+      length: Number of 32 bit words to read from the FPGA
+      mem_device: True if the device is on the memory bus
+
+    Returns:
+      request (or Future) that resolves to the raw byte array
+
+    Raises:
+      Nothing
+    """
+    return self._submit(AsyncRequest(OlympusRequest.READ, device_id, address,
+                                     length = length,
+                                     mem_device = mem_device))
+
+  def write(self, device_id, address, data, mem_device = False):
+    """write
+
+    Write to an Olympus image
+
+    Args:
+      device_id: Device identification number, found in the DRT
+      address: Address of the register/memory to write
+      data: Array of raw bytes to send to the device
+      mem_device: True if the device is on the memory bus
+
+    Returns:
+      request (or Future) that resolves to None once the write is
+      acknowledged
+
+    Raises:
+      Nothing
+    """
+    return self._submit(AsyncRequest(OlympusRequest.WRITE, device_id, address,
+                                     length = len(data) / 4,
+                                     data = data,
+                                     mem_device = mem_device))
+
+  def ping(self):
+    """ping
+
+    Ping the Olympus image
+
+    Args:
+      Nothing
+
+    Returns:
+      request (or Future) that resolves to None if the image responded
+
+    Raises:
+      Nothing
+    """
+    return self._submit(AsyncRequest(AsyncRequest.PING))
+
+  def wait_for_interrupts(self, wait_time = 1):
+    """wait_for_interrupts
+
+    Wait for the next interrupt from the image, several waits can be pending
+    at the same time and they all receive the same interrupt
+
+    Args:
+      wait_time: the amount of time in seconds to wait for an interrupt
+
+    Returns:
+      request (or Future) that resolves to the interrupts bitmap, or 0 if no
+      interrupt was detected before wait_time
+
+    Raises:
+      Nothing
+    """
+    request = AsyncRequest(AsyncRequest.INTERRUPT)
+    request.deadline = time.time() + wait_time
+    return self._submit(request)
+
+  def _submit(self, request):
+    if self.loop is None:
+      self.requests.put(request)
+      return request
+
+    future = asyncio.Future(loop = self.loop)
+    def resolve(request):
+      self.loop.call_soon_threadsafe(self._resolve_future, future, request)
+    request.callback = resolve
+    self.requests.put(request)
+    return future
+
+  def _resolve_future(self, future, request):
+    if future.cancelled():
+      return
+    if request.error is not None:
+      future.set_exception(request.error)
+    else:
+      future.set_result(request.response)
+
+  def _run(self):
+    while self.running:
+      if len(self.interrupt_waiters) > 0:
+        timeout = 0
+      else:
+        timeout = self.idle_timeout
+
+      requests = []
+      try:
+        if timeout > 0:
+          requests.append(self.requests.get(timeout = timeout))
+        while True:
+          requests.append(self.requests.get_nowait())
+      except Queue.Empty:
+        pass
+
+      self._process(requests)
+      if len(self.interrupt_waiters) > 0:
+        self._check_interrupts()
+
+    #fail everything that is left
+    error = OlympusCommError("AsyncOlympus was closed")
+    while True:
+      try:
+        request = self.requests.get_nowait()
+      except Queue.Empty:
+        break
+      if request is not None:
+        request.set_error(error)
+    for request in self.interrupt_waiters:
+      request.set_error(error)
+    self.interrupt_waiters = []
+
+  def _process(self, requests):
+    """send all the reads and writes in one burst, pings are sent in order
+
+    a failure of the board fails the request that was being sent, every
+    request of this group behind it and every request that is still queued
+    in the Olympus interface, the I/O thread keeps running
+    """
+    for i in range(len(requests)):
+      request = requests[i]
+      if request is None:
+        continue
+
+      try:
+        if request.command == AsyncRequest.INTERRUPT:
+          self.interrupt_waiters.append(request)
+
+        elif request.command == AsyncRequest.PING:
+          self._flush()
+          self.o.ping()
+          request.set_result(None)
+
+        else:
+          #the interface sends the queue when it is full
+          self.o._queue_request(request)
+
+      except Exception, err:
+        self._fail(requests[i:], _comm_error(err))
+        return
+
+    try:
+      self._flush()
+    except Exception, err:
+      self._fail([], _comm_error(err))
+
+  def _flush(self):
+    if len(self.o.request_queue) == 0:
+      return
+    self.o.flush_queue()
+
+  def _fail(self, requests, error):
+    """resolve the requests and the requests queued in the Olympus
+    interface that are not resolved yet with an error"""
+    queued = self.o.request_queue
+    self.o.request_queue = []
+    for request in list(requests) + queued:
+      if request is not None and not request.done():
+        request.set_error(error)
+
+  def _check_interrupts(self):
+    interrupts = 0
+    if self.o.wait_for_interrupts(wait_time = self.interrupt_poll):
+      interrupts = self.o.interrupts
+
+    now = time.time()
+    waiters = []
+    for request in self.interrupt_waiters:
+      if interrupts != 0:
+        request.set_result(interrupts)
+      elif now >= request.deadline:
+        request.set_result(0)
+      else:
+        waiters.append(request)
+    self.interrupt_waiters = waiters
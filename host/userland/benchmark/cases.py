@@ -0,0 +1,359 @@
+#Distributed under the MIT licesnse.
+#Copyright (c) 2011 Dave McCoy (dave.mccoy@cospandesign.com)
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy of
+#this software and associated documentation files (the "Software"), to deal in
+#the Software without restriction, including without limitation the rights to
+#use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+#of the Software, and to permit persons to whom the Software is furnished to do
+#so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+""" cases
+
+Benchmarks of the host side of an Olympus link
+
+Every case is a function that takes the Olympus object and the benchmark
+context and returns the operation to time (a function without arguments) and
+the number of bytes the operation moves (0 for operations without a payload),
+a case that can not run on the board raises BenchmarkSkip
+
+The memory write cases overwrite the memory of the board, they only run when
+a scratch region is given (the memory of an emulated board is always
+scratch)
+
+"""
+
+__author__ = 'dave.mccoy@cospandesign.com (Dave McCoy)'
+
+import os
+import sys
+import time
+from array import array as Array
+
+from userland.drivers import gpio
+from userland.drivers import spi
+from userland.drivers import i2c
+from userland.drivers import logic_analyzer
+
+#la_data_parser lives with the logic analyzer tools, outside of userland
+sys.path.append(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir,
+                             "logic_analyzer"))
+
+#Device types, found in cbuilder/drt/drt.json
+DEVICE_GPIO           = 0x01
+DEVICE_I2C            = 0x03
+DEVICE_SPI            = 0x04
+DEVICE_LOGIC_ANALYZER = 0x0C
+
+#burst sizes (32-bit words) from one word to 16M words
+BURST_SIZES = [4 ** i for i in range(13)]
+
+#7-bit address of the I2C device used for the write benchmark
+I2C_ADDRESS = 0x50
+#number of samples in a logic analyzer capture
+CAPTURE_SIZE = 0x800
+
+
+class BenchmarkSkip(Exception):
+  """BenchmarkSkip
+
+  The board does not have what the benchmark needs
+  """
+  pass
+
+
+class Context:
+  """Context
+
+  Information about the board shared between the cases, the DRT is read the
+  first time it is needed
+  """
+
+  def __init__(self, olympus, max_burst = BURST_SIZES[-1], board = None,
+               scratch = None):
+    """__init__
+
+    Args:
+      olympus: Olympus object to benchmark
+      max_burst: largest burst (32-bit words) to time
+      board: EmulatedBoard when the benchmark runs on the emulator, the cases
+        load the data they need into the models
+      scratch: address (32-bit words) of the memory the cases can overwrite,
+        None to skip the memory write cases, an emulated board uses 0 if
+        not specified
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    self.o = olympus
+    self.max_burst = max_burst
+    self.board = board
+    if scratch is None and board is not None:
+      scratch = 0
+    self.scratch = scratch
+    self.drt_read = False
+
+  def find_device(self, device_type):
+    """find_device
+
+    Returns the bus offset of the first device of a type
+
+    Args:
+      device_type: Device type found in the DRT
+
+    Returns:
+      device id (bus offset)
+
+    Raises:
+      BenchmarkSkip: the device is not on the board
+    """
+    self._read_drt()
+    indexes = self.o.find_devices(device_type, memory_device = False)
+    if len(indexes) > 0:
+      return self.o.get_device_address(indexes[0])
+    raise BenchmarkSkip("Device type 0x%02X not found" % device_type)
+
+  def _read_drt(self):
+    if not self.drt_read:
+      self.o.read_drt()
+      self.drt_read = True
+
+  def memory_address(self, size, write):
+    """memory_address
+
+    Returns the address of a burst
+
+    Args:
+      size: number of 32-bit words of the burst
+      write: True if the burst overwrites the memory
+
+    Returns:
+      address (32-bit words)
+
+    Raises:
+      BenchmarkSkip: there is no scratch region for a write
+    """
+    if size > self.max_burst:
+      raise BenchmarkSkip("Burst is larger than %d words" % self.max_burst)
+    address = self.scratch
+    if address is None:
+      if write:
+        raise BenchmarkSkip("Overwrites the memory of the board, a scratch region is needed")
+      address = 0
+    if self.board is None:
+      self._read_drt()
+      if address + size > self.o.get_total_memory_size():
+        raise BenchmarkSkip("Burst does not fit in the memory")
+    return address
+
+
+def bench_ping(o, context):
+  return o.ping, 0
+
+
+def bench_read_register(o, context):
+  #first word of the DRT
+  return (lambda: o.read_register(0, 0)), 4
+
+
+def bench_write_register(o, context):
+  #write the output enable of a GPIO back with its own value, without a GPIO
+  #write the first word of the DRT (read only, the write is ignored)
+  try:
+    dev_id = context.find_device(DEVICE_GPIO)
+    address = gpio.GPIO_OUTPUT_ENABLE
+  except BenchmarkSkip:
+    dev_id = 0
+    address = 0
+  value = o.read_register(dev_id, address)
+  return (lambda: o.write_register(dev_id, address, value)), 4
+
+
+def bench_read_drt(o, context):
+  return o.read_drt, 0
+
+
+def _burst_read(size):
+  def bench(o, context):
+    address = context.memory_address(size, write = False)
+    return (lambda: o.read_memory(address, size)), size * 4
+  return bench
+
+
+def _burst_write(size):
+  def bench(o, context):
+    address = context.memory_address(size, write = True)
+    data = Array('B', [0xA5]) * (size * 4)
+    return (lambda: o.write_memory(address, data)), size * 4
+  return bench
+
+
+def bench_spi_set_write_data(o, context):
+  dev_id = context.find_device(DEVICE_SPI)
+  spi_dev = spi.SPI(o, dev_id)
+  data = Array('B', range(16))
+  return (lambda: spi_dev.set_write_data(data)), len(data)
+
+
+def bench_i2c_write(o, context):
+  dev_id = context.find_device(DEVICE_I2C)
+  i2c_dev = i2c.I2C(o, dev_id)
+  data = Array('B', [0x00, 0x01, 0x02, 0x03])
+  try:
+    i2c_dev.write_to_i2c(I2C_ADDRESS, data)
+  except i2c.I2CError, err:
+    raise BenchmarkSkip("No I2C device at 0x%02X: %s" % (I2C_ADDRESS, str(err)))
+  return (lambda: i2c_dev.write_to_i2c(I2C_ADDRESS, data)), len(data)
+
+
+def _capture(o, context):
+  dev_id = context.find_device(DEVICE_LOGIC_ANALYZER)
+  la = logic_analyzer.LogicAnalyzer(o, dev_id)
+  if context.board is not None:
+    for slave in context.board.slaves:
+      if slave.device_type == DEVICE_LOGIC_ANALYZER:
+        slave.set_capture([(i >> 4) & 0xFFFFFFFF for i in range(CAPTURE_SIZE)])
+  la.enable_capture(True)
+  if not la.is_capture_finished():
+    la.wait_for_capture(1)
+  if not la.is_capture_finished():
+    raise BenchmarkSkip("The logic analyzer did not finish a capture")
+  return la
+
+
+def bench_la_get_capture_data(o, context):
+  la = _capture(o, context)
+  return la.get_capture_data, la.get_data_count() * 4
+
+
+def bench_vcd(o, context):
+  import la_data_parser
+  la = _capture(o, context)
+  data = la.get_capture_data()
+  return (lambda: la_data_parser.create_vcd_buffer(data, {})), len(data) * 4
+
+
+#name, case
+CASES = [("ping",                     bench_ping),
+         ("read_register",            bench_read_register),
+         ("write_register",           bench_write_register),
+         ("read_drt",                 bench_read_drt)]
+CASES += [("burst_read_%d" % size,    _burst_read(size)) for size in BURST_SIZES]
+CASES += [("burst_write_%d" % size,   _burst_write(size)) for size in BURST_SIZES]
+CASES += [("spi_set_write_data",      bench_spi_set_write_data),
+          ("i2c_write_to_i2c",        bench_i2c_write),
+          ("la_get_capture_data",     bench_la_get_capture_data),
+          ("vcd_generation",          bench_vcd)]
+
+
+def time_operation(operation, min_time = 0.2, max_iterations = 1000):
+  """time_operation
+
+  Run an operation until it has been running for min_time and collect the
+  time of every run
+
+  Args:
+    operation: function without arguments
+    min_time: minimum number of seconds to spend on the operation
+    max_iterations: maximum number of times to run the operation
+
+  Returns:
+    list of the seconds each run took
+
+  Raises:
+    Nothing
+  """
+  times = []
+  total = 0.0
+  while (total < min_time and len(times) < max_iterations) or len(times) == 0:
+    start = time.time()
+    operation()
+    elapsed = time.time() - start
+    times.append(elapsed)
+    total += elapsed
+  return times
+
+
+def summarize(times, size):
+  """summarize
+
+  Reduce the run times of an operation to the numbers stored in the history
+
+  Args:
+    times: list of seconds each run took
+    size: number of bytes moved by each run
+
+  Returns:
+    dictionary of the statistics
+
+  Raises:
+    Nothing
+  """
+  ordered = sorted(times)
+  median = ordered[len(ordered) / 2]
+  result = {"iterations": len(times),
+            "min":        ordered[0],
+            "max":        ordered[-1],
+            "mean":       sum(times) / len(times),
+            "median":     median,
+            "bytes":      size}
+  if size > 0 and median > 0:
+    result["throughput"] = size / median
+  return result
+
+
+def run_cases(olympus, context, names = None, min_time = 0.2,
+              max_iterations = 1000, stream = None):
+  """run_cases
+
+  Run the benchmarks
+
+  Args:
+    olympus: Olympus object to benchmark
+    context: Context shared between the cases
+    names: list of case names to run, all of them if None
+    min_time: minimum number of seconds to spend on each case
+    max_iterations: maximum number of runs of each case
+    stream: file to print the progress to, None to be quiet
+
+  Returns:
+    dictionary of case name: statistics (see summarize), a skipped case has
+    a 'skipped' entry with the reason
+
+  Raises:
+    OlympusCommError: A failure of communication is detected
+  """
+  results = {}
+  for name, case in CASES:
+    if names is not None and name not in names:
+      continue
+    try:
+      operation, size = case(olympus, context)
+    except BenchmarkSkip, err:
+      results[name] = {"skipped": str(err)}
+      if stream is not None:
+        print >> stream, "%-24s skipped: %s" % (name, str(err))
+      continue
+
+    result = summarize(time_operation(operation, min_time, max_iterations), size)
+    results[name] = result
+    if stream is not None:
+      line = "%-24s %10.1f us" % (name, result["median"] * 1000000)
+      if "throughput" in result:
+        line += " %10.2f MB/s" % (result["throughput"] / 1000000)
+      print >> stream, line
+  return results
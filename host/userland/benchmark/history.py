@@ -0,0 +1,218 @@
+#Distributed under the MIT licesnse.
+#Copyright (c) 2011 Dave McCoy (dave.mccoy@cospandesign.com)
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy of
+#this software and associated documentation files (the "Software"), to deal in
+#the Software without restriction, including without limitation the rights to
+#use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+#of the Software, and to permit persons to whom the Software is furnished to do
+#so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+""" history
+
+JSON history of the benchmark runs and the comparison against a baseline
+
+The history file is a list of runs, each run is a dictionary:
+
+  {
+    "time": seconds since the epoch,
+    "transport": name of the transport ("Dionysus", "emulated" ...),
+    "host": name of the machine,
+    "results": {case name: statistics},
+    "wait": counters of the wait strategies (Olympus.stats)
+  }
+
+A baseline file holds a single run
+
+"""
+
+__author__ = 'dave.mccoy@cospandesign.com (Dave McCoy)'
+
+import os
+import json
+import time
+import socket
+
+#a case is a regression when its median time grows by more than this
+DEFAULT_TOLERANCE = 0.10
+
+
+def make_run(results, transport):
+  """make_run
+
+  Wrap the results of the benchmarks in a run
+
+  Args:
+    results: dictionary of case name: statistics
+    transport: name of the transport that was benchmarked
+
+  Returns:
+    run dictionary
+
+  Raises:
+    Nothing
+  """
+  return {"time":       time.time(),
+          "transport":  transport,
+          "host":       socket.gethostname(),
+          "results":    results}
+
+
+def load_history(path):
+  """load_history
+
+  Read the runs in a history file
+
+  Args:
+    path: path of the history file
+
+  Returns:
+    list of runs, empty if the file does not exist
+
+  Raises:
+    ValueError: the file is not a history file
+  """
+  if not os.path.exists(path):
+    return []
+  f = open(path, "r")
+  try:
+    history = json.load(f)
+  finally:
+    f.close()
+  if not isinstance(history, list):
+    raise ValueError("%s is not a benchmark history" % path)
+  return history
+
+
+def append_history(path, run):
+  """append_history
+
+  Add a run to the end of a history file, the file is created if needed
+
+  Args:
+    path: path of the history file
+    run: run dictionary
+
+  Returns:
+    Nothing
+
+  Raises:
+    ValueError: the file is not a history file
+  """
+  history = load_history(path)
+  history.append(run)
+  save_json(path, history)
+
+
+def load_baseline(path):
+  """load_baseline
+
+  Read a baseline, a history file can also be used as a baseline (the last
+  run is used)
+
+  Args:
+    path: path of the baseline
+
+  Returns:
+    run dictionary
+
+  Raises:
+    ValueError: the file does not hold a run
+  """
+  f = open(path, "r")
+  try:
+    baseline = json.load(f)
+  finally:
+    f.close()
+  if isinstance(baseline, list):
+    if len(baseline) == 0:
+      raise ValueError("%s is empty" % path)
+    baseline = baseline[-1]
+  if "results" not in baseline:
+    raise ValueError("%s is not a benchmark run" % path)
+  return baseline
+
+
+def save_json(path, data):
+  """write a JSON file through a temporary file so an interrupted run does
+  not corrupt the history"""
+  temp_path = path + ".tmp"
+  f = open(temp_path, "w")
+  try:
+    json.dump(data, f, indent = 2, sort_keys = True)
+  finally:
+    f.close()
+  os.rename(temp_path, path)
+
+
+def compare(run, baseline, tolerance = DEFAULT_TOLERANCE):
+  """compare
+
+  Compare the median times of the cases of a run against a baseline
+
+  Args:
+    run: run dictionary
+    baseline: run dictionary
+    tolerance: fraction the median time can grow before it is a regression
+
+  Returns:
+    list of (case name, baseline median, median, ratio, regression) for the
+    cases that ran in both
+
+  Raises:
+    Nothing
+  """
+  comparison = []
+  results = run["results"]
+  baseline_results = baseline["results"]
+  for name in sorted(results.keys()):
+    if name not in baseline_results:
+      continue
+    current = results[name]
+    previous = baseline_results[name]
+    if "median" not in current or "median" not in previous:
+      continue
+    if previous["median"] <= 0:
+      continue
+    ratio = current["median"] / previous["median"]
+    comparison.append((name,
+                       previous["median"],
+                       current["median"],
+                       ratio,
+                       ratio > 1.0 + tolerance))
+  return comparison
+
+
+def print_comparison(comparison, stream):
+  """print_comparison
+
+  Print the comparison in a table
+
+  Args:
+    comparison: list returned from compare
+    stream: file to print to
+
+  Returns:
+    Nothing
+
+  Raises:
+    Nothing
+  """
+  print >> stream, "%-24s %12s %12s %8s" % ("case", "baseline us", "current us", "ratio")
+  for name, previous, current, ratio, regression in comparison:
+    line = "%-24s %12.1f %12.1f %8.2f" % (name, previous * 1000000,
+                                          current * 1000000, ratio)
+    if regression:
+      line += " REGRESSION"
+    print >> stream, line
@@ -0,0 +1,172 @@
+#Distributed under the MIT licesnse.
+#Copyright (c) 2011 Dave McCoy (dave.mccoy@cospandesign.com)
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy of
+#this software and associated documentation files (the "Software"), to deal in
+#the Software without restriction, including without limitation the rights to
+#use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+#of the Software, and to permit persons to whom the Software is furnished to do
+#so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+""" runner
+
+Command line front end of the benchmarks
+
+  python -m userland.benchmark.runner --emulate --history history.json
+  python -m userland.benchmark.runner --baseline baseline.json
+  python -m userland.benchmark.runner --scratch 0x100000
+
+The memory write cases overwrite the memory of the board, on a real board
+they are skipped unless a scratch region is given with --scratch or
+--allow-memory-clobber
+
+The exit status is 1 when a case is slower than the baseline by more than the
+tolerance
+
+"""
+
+__author__ = 'dave.mccoy@cospandesign.com (Dave McCoy)'
+
+import sys
+import os
+import argparse
+
+sys.path.append(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+
+from userland.benchmark import cases
+from userland.benchmark import history
+from userland import wait
+from userland.olympus import WAIT_REGISTER
+from userland.olympus import WAIT_INTERRUPT
+
+#wait strategies that can be selected on the command line
+WAIT_STRATEGIES = {"spin":      wait.SpinWait,
+                   "backoff":   wait.BackoffWait,
+                   "blocking":  wait.BlockingWait}
+
+
+def open_emulated(latency, bandwidth, max_burst):
+  """open_emulated
+
+  Create an emulated board that has everything the cases need
+
+  Args:
+    latency: response latency of the board in seconds
+    bandwidth: bytes per second of the link, None for unlimited
+    max_burst: largest burst, the memory is made large enough for it
+
+  Returns:
+    Tuple of (Olympus, EmulatedBoard)
+
+  Raises:
+    Nothing
+  """
+  from userland.emulator.board import EmulatedBoard
+  from userland.emulator.board import emulated_dionysus
+  from userland.emulator.board import default_slaves
+  from userland.emulator.slaves import EmulatedI2C
+  from userland.emulator.slaves import EmulatedMemory
+
+  slaves = default_slaves()
+  for i in range(len(slaves)):
+    if slaves[i].device_type == cases.DEVICE_I2C:
+      slaves[i] = EmulatedI2C(devices = {cases.I2C_ADDRESS: bytearray(256)})
+  board = EmulatedBoard(slaves = slaves,
+                        memories = [EmulatedMemory(max(max_burst, 1))],
+                        latency = latency,
+                        bandwidth = bandwidth)
+  return emulated_dionysus(board), board
+
+
+def main(argv):
+  parser = argparse.ArgumentParser(description = "Benchmark the Olympus host stack")
+  parser.add_argument("-e", "--emulate", action = "store_true",
+                      help = "run against an emulated board instead of the FTDI")
+  parser.add_argument("--latency", type = float, default = 0.0,
+                      help = "response latency of the emulated board (seconds)")
+  parser.add_argument("--bandwidth", type = float, default = None,
+                      help = "link bandwidth of the emulated board (bytes/second)")
+  parser.add_argument("--max-burst", type = int, default = cases.BURST_SIZES[-1],
+                      help = "largest burst to time (32-bit words)")
+  parser.add_argument("--scratch", type = lambda x: int(x, 0), default = None,
+                      help = "address (32-bit words) of board memory the write cases may overwrite")
+  parser.add_argument("--allow-memory-clobber", action = "store_true",
+                      help = "let the write cases overwrite the start of the board memory")
+  parser.add_argument("-c", "--case", action = "append", default = None,
+                      help = "case to run, can be repeated (default: all)")
+  parser.add_argument("--min-time", type = float, default = 0.2,
+                      help = "minimum seconds to spend on each case")
+  parser.add_argument("--history", default = None,
+                      help = "JSON history file to append the results to")
+  parser.add_argument("-b", "--baseline", default = None,
+                      help = "JSON baseline (or history) to compare against")
+  parser.add_argument("--tolerance", type = float, default = history.DEFAULT_TOLERANCE,
+                      help = "allowed slowdown before a case is a regression")
+  parser.add_argument("--save-baseline", default = None,
+                      help = "write the results to a baseline file")
+  parser.add_argument("--register-wait", choices = sorted(WAIT_STRATEGIES.keys()),
+                      default = None,
+                      help = "wait strategy for register access")
+  parser.add_argument("--interrupt-wait", choices = sorted(WAIT_STRATEGIES.keys()),
+                      default = None,
+                      help = "wait strategy for interrupts")
+  parser.add_argument("-l", "--list", action = "store_true",
+                      help = "list the cases")
+  args = parser.parse_args(argv)
+
+  if args.list:
+    for name, case in cases.CASES:
+      print name
+    return 0
+
+  board = None
+  if args.emulate:
+    olympus, board = open_emulated(args.latency, args.bandwidth, args.max_burst)
+    transport = "emulated"
+  else:
+    from userland.dionysus.dionysus import Dionysus
+    olympus = Dionysus()
+    transport = olympus.name
+
+  if args.register_wait is not None:
+    olympus.set_wait_strategy(WAIT_REGISTER, WAIT_STRATEGIES[args.register_wait]())
+  if args.interrupt_wait is not None:
+    olympus.set_wait_strategy(WAIT_INTERRUPT, WAIT_STRATEGIES[args.interrupt_wait]())
+
+  scratch = args.scratch
+  if scratch is None and args.allow_memory_clobber:
+    scratch = 0
+  context = cases.Context(olympus, args.max_burst, board, scratch)
+  results = cases.run_cases(olympus, context, args.case, args.min_time,
+                            stream = sys.stdout)
+  run = history.make_run(results, transport)
+  run["wait"] = olympus.stats()["wait"]
+
+  if args.history is not None:
+    history.append_history(args.history, run)
+  if args.save_baseline is not None:
+    history.save_json(args.save_baseline, run)
+
+  if args.baseline is not None:
+    comparison = history.compare(run, history.load_baseline(args.baseline),
+                                 args.tolerance)
+    print ""
+    history.print_comparison(comparison, sys.stdout)
+    for entry in comparison:
+      if entry[4]:
+        return 1
+  return 0
+
+if __name__ == "__main__":
+  sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,425 @@
+#Distributed under the MIT licesnse.
+#Copyright (c) 2011 Dave McCoy (dave.mccoy@cospandesign.com)
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy of
+#this software and associated documentation files (the "Software"), to deal in
+#the Software without restriction, including without limitation the rights to
+#use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+#of the Software, and to permit persons to whom the Software is furnished to do
+#so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+""" codec
+
+Definition of the Olympus command set wire format
+
+Binary packets (FTDI Synchronous FIFO):
+
+  # ID CC NN NN NN OO AA AA AA DD DD DD DD
+    # ID = ID BYTE (0xCD)
+    # CC = Command (0x01 write, 0x02 read, 0x1X for the memory bus)
+    # NN = Number of 32-bit words (3 bytes)
+    # OO = Offset of device (0x00 for the memory bus)
+    # AA = Address (3 bytes)
+    # DD = Data (4 bytes per word, writes only)
+
+  Responses start with the ID byte 0xDC followed by a 32-bit status word
+  (inverted command in the top byte, count in the lower 24 bits) and for
+  reads and writes the 32-bit address
+
+  Interrupts: DC 01 00 00 00 followed by the 32-bit interrupt mask
+
+ASCII packets (UART):
+
+  'LNNNNNNNXXXXXXXXYYYYYYYYZZZZZZZZ'
+    N: number of words - 1 (28 bits)
+    X: command (bit 16 set for the memory bus)
+    Y: address
+    Z: data
+
+  Responses: 'SNNNNNNNXXXXXXXXYYYYYYYYZZZZZZZZ' (X is the status)
+
+Binary packets (UART):
+
+  The fields of the ASCII packets sent as big endian binary words
+
+  # ID NN NN NN NN XX XX XX XX YY YY YY YY ZZ ZZ ZZ ZZ
+    # ID = ID BYTE (0xCD)
+    # N = number of words - 1
+    # X = command
+    # Y = address
+    # Z = data (4 bytes per word)
+
+  Responses start with the ID byte 0xDC followed by the count, status and
+  address words and at least one data word
+
+"""
+
+__author__ = 'dave.mccoy@cospandesign.com (Dave McCoy)'
+
+import struct
+import binascii
+
+#Identification bytes
+ID_BYTE               = 0xCD
+RESPONSE_ID_BYTE      = 0xDC
+
+#Commands
+COMMAND_PING          = 0x00
+COMMAND_WRITE         = 0x01
+COMMAND_READ          = 0x02
+COMMAND_RESET         = 0x03
+COMMAND_CORE_DUMP     = 0x0F
+COMMAND_MEMORY_BUS    = 0x10
+
+#Status byte of a response (the inverted command)
+PING_STATUS           = 0xFF
+WRITE_STATUS          = 0xFE
+READ_STATUS           = 0xFD
+CORE_DUMP_STATUS      = 0xF0
+#interrupts are not a response to a command, the master sends them with the
+#PERIPH_INTERRUPT status (mg_defines.v)
+INTERRUPT_STATUS      = 0x01
+
+#Number of bytes that follow the identification byte (0xDC) of a response
+#  status (4 bytes), address (4 bytes), read data follows
+READ_RESPONSE_LENGTH  = 8
+#  status (4 bytes), address (4 bytes), last data word written (4 bytes)
+WRITE_RESPONSE_LENGTH = 12
+#  status (4 bytes)
+PING_RESPONSE_LENGTH  = 4
+#  status (4 bytes), interrupts (4 bytes)
+INTERRUPT_RESPONSE_LENGTH = 8
+#  status (4 bytes), the count is the number of words that follow
+CORE_DUMP_RESPONSE_LENGTH = 4
+
+#largest number of words in one packet (24-bit count)
+MAX_PACKET_WORDS      = 0xFFFFFF
+
+#ID, command, count (24 bits) + device offset, address (24 bits)
+COMMAND_HEADER        = struct.Struct(">BBIBH")
+#status, address
+RESPONSE_HEADER       = struct.Struct(">II")
+#count, command, address, data
+ASCII_HEADER          = struct.Struct(">IIII")
+#ID, count, command, address, data
+BINARY_UART_HEADER    = struct.Struct(">BIIII")
+#ID, count, status, address
+BINARY_UART_RESPONSE_HEADER = struct.Struct(">BIII")
+
+PING_PACKET           = bytearray([ID_BYTE, COMMAND_PING, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00])
+RESET_PACKET          = bytearray([ID_BYTE, COMMAND_RESET, 0x00, 0x00, 0x00])
+CORE_DUMP_PACKET      = bytearray([ID_BYTE, COMMAND_CORE_DUMP] + [0x00] * 11)
+
+
+def pack_command(buf, offset, command, device_id, address, length,
+                 mem_device = False):
+  """pack_command
+
+  Pack the header of a read or write command into a buffer
+
+  Args:
+    buf: bytearray to pack the header into
+    offset: position in the buffer to start
+    command: COMMAND_READ or COMMAND_WRITE
+    device_id: Device identification number, found in the DRT
+    address: Address of the register/memory
+    length: Number of 32-bit words
+    mem_device: True if the device is on the memory bus
+
+  Returns:
+    The position in the buffer after the header
+
+  Raises:
+    Nothing
+  """
+  device_offset = device_id & 0xFF
+  if mem_device:
+    command |= COMMAND_MEMORY_BUS
+    device_offset = 0x00
+
+  COMMAND_HEADER.pack_into(buf, offset,
+                           ID_BYTE,
+                           command,
+                           ((length & 0xFFFFFF) << 8) | device_offset,
+                           (address >> 16) & 0xFF,
+                           address & 0xFFFF)
+  return offset + COMMAND_HEADER.size
+
+
+def response_length(command, length = 0):
+  """response_length
+
+  Returns the number of bytes that follow the identification byte of the
+  response to a command
+
+  Args:
+    command: COMMAND_READ, COMMAND_WRITE or COMMAND_PING
+    length: Number of 32-bit words read
+
+  Returns:
+    Number of bytes
+
+  Raises:
+    Nothing
+  """
+  command = command & ~COMMAND_MEMORY_BUS
+  if command == COMMAND_READ:
+    return READ_RESPONSE_LENGTH + length * 4
+  if command == COMMAND_WRITE:
+    return WRITE_RESPONSE_LENGTH
+  return PING_RESPONSE_LENGTH
+
+
+def response_status(command):
+  """response_status
+
+  Returns the status byte of the response to a command
+
+  Args:
+    command: the command byte that was sent
+
+  Returns:
+    status byte
+
+  Raises:
+    Nothing
+  """
+  return (~(command & ~COMMAND_MEMORY_BUS)) & 0xFF
+
+
+def response_address(device_id, address, mem_device = False):
+  """response_address
+
+  Returns the address the master echos back in a response
+
+  Args:
+    device_id: Device identification number, found in the DRT
+    address: Address of the register/memory
+    mem_device: True if the device is on the memory bus
+
+  Returns:
+    32-bit address
+
+  Raises:
+    Nothing
+  """
+  if mem_device:
+    return address & 0x00FFFFFF
+  return ((device_id & 0xFF) << 24) | (address & 0x00FFFFFF)
+
+
+def unpack_response_header(frame):
+  """unpack_response_header
+
+  Decode the status word and address of a response (the data following the
+  identification byte)
+
+  Args:
+    frame: buffer containing the response
+
+  Returns:
+    Tuple of (status byte, count, address)
+
+  Raises:
+    Nothing
+  """
+  status, address = RESPONSE_HEADER.unpack_from(frame, 0)
+  return (status >> 24, status & 0xFFFFFF, address)
+
+
+class PacketEncoder:
+  """PacketEncoder
+
+  Encodes a group of read and write commands into a single buffer, the
+  buffer is reused as long as the size of the burst does not change
+  """
+
+  def __init__(self):
+    self.buffer = bytearray()
+
+  def encode(self, commands):
+    """encode
+
+    Encode a list of commands into one burst
+
+    Args:
+      commands: list of tuples:
+        (command, device_id, address, length, data, mem_device)
+        data is the raw bytes to write (None for reads)
+
+    Returns:
+      bytearray containing all the packets
+
+    Raises:
+      Nothing
+    """
+    size = 0
+    for command in commands:
+      size += COMMAND_HEADER.size
+      if command[4] is not None:
+        size += len(command[4])
+
+    if len(self.buffer) != size:
+      self.buffer = bytearray(size)
+
+    buf = self.buffer
+    offset = 0
+    for command, device_id, address, length, data, mem_device in commands:
+      offset = pack_command(buf, offset, command, device_id, address, length,
+                            mem_device)
+      if data is not None:
+        buf[offset: offset + len(data)] = data
+        offset += len(data)
+
+    return buf
+
+
+def encode_ascii_command(command, address, count = 1, data = None,
+                         mem_device = False):
+  """encode_ascii_command
+
+  Generate the ASCII (UART) representation of a command
+
+  Args:
+    command: COMMAND_PING, COMMAND_READ or COMMAND_WRITE
+    address: 32-bit address
+    count: Number of 32-bit words (reads)
+    data: list of 32-bit words to write (writes)
+    mem_device: True if the device is on the memory bus
+
+  Returns:
+    Command string
+
+  Raises:
+    Nothing
+  """
+  if mem_device:
+    command |= 0x00010000
+
+  first_word = 0
+  if data is not None:
+    count = len(data)
+    if count > 0:
+      first_word = data[0]
+
+  if count > 0:
+    count -= 1
+
+  cmd = "L" + binascii.hexlify(ASCII_HEADER.pack(count & 0x0FFFFFFF,
+                                                 command,
+                                                 address,
+                                                 first_word)).upper()[1:]
+  if data is not None and len(data) > 1:
+    cmd += binascii.hexlify(struct.pack(">%dI" % (len(data) - 1), *data[1:])).upper()
+  return cmd
+
+
+def decode_ascii_words(response, offset, count):
+  """decode_ascii_words
+
+  Decode the 32-bit words of an ASCII (UART) response
+
+  Args:
+    response: response string
+    offset: position of the first word in the string
+    count: Number of 32-bit words to decode
+
+  Returns:
+    list of 32-bit words
+
+  Raises:
+    Nothing
+  """
+  raw = binascii.unhexlify(response[offset: offset + count * 8])
+  return list(struct.unpack(">%dI" % (len(raw) / 4), raw))
+
+
+def encode_binary_command(command, address, count = 1, data = None,
+                          mem_device = False):
+  """encode_binary_command
+
+  Generate the binary (UART) representation of a command, the fields are
+  the same as the ASCII command
+
+  Args:
+    command: COMMAND_PING, COMMAND_READ or COMMAND_WRITE
+    address: 32-bit address
+    count: Number of 32-bit words (reads)
+    data: list of 32-bit words to write (writes)
+    mem_device: True if the device is on the memory bus
+
+  Returns:
+    Command string
+
+  Raises:
+    Nothing
+  """
+  if mem_device:
+    command |= 0x00010000
+
+  first_word = 0
+  if data is not None:
+    count = len(data)
+    if count > 0:
+      first_word = data[0]
+
+  if count > 0:
+    count -= 1
+
+  cmd = BINARY_UART_HEADER.pack(ID_BYTE,
+                                count & 0x0FFFFFFF,
+                                command,
+                                address,
+                                first_word)
+  if data is not None and len(data) > 1:
+    cmd += struct.pack(">%dI" % (len(data) - 1), *data[1:])
+  return cmd
+
+
+def unpack_binary_response_header(header):
+  """unpack_binary_response_header
+
+  Decode the header of a binary (UART) response
+
+  Args:
+    header: the first BINARY_UART_RESPONSE_HEADER.size bytes of the response
+
+  Returns:
+    Tuple of (number of data words, status, address)
+    None if the header does not start with the response ID byte
+
+  Raises:
+    Nothing
+  """
+  id_byte, count, status, address = BINARY_UART_RESPONSE_HEADER.unpack_from(header, 0)
+  if id_byte != RESPONSE_ID_BYTE:
+    return None
+  return ((count & 0x0FFFFFFF) + 1, status, address)
+
+
+def decode_binary_words(data):
+  """decode_binary_words
+
+  Decode the 32-bit words of a binary (UART) response in one call
+
+  Args:
+    data: string of big endian words
+
+  Returns:
+    list of 32-bit words
+
+  Raises:
+    Nothing
+  """
+  return list(struct.unpack(">%dI" % (len(data) / 4), data[:len(data) & ~0x03]))
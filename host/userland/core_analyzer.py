@@ -30,6 +30,9 @@ __author__ = 'dave.mccoy@cospandesign.com (Dave McCoy)'
 
 """ Changelog:
   
+10/18/2026
+  -the reset and the core dump share one FtdiSession
+  -the session is closed once the core has been dumped
 09/21/2012
   -Initial Commit
 
@@ -49,7 +52,7 @@ from userland.dionysus.dionysus import Dionysus
 from userland.olympus import OlympusCommError
 from userland.dionysus.control.dionysus_control import Dionysus_Control
 
-def analyze_crash(pretty_print = True):
+def analyze_crash(pretty_print = True, session = None):
   """analyze_crash
 
   Resets the olympus core and analyzes crash
@@ -61,6 +64,8 @@ def analyze_crash(pretty_print = True):
 
   Args:
     pretty_print: if True, prints out the core dump in an easy to read format
+    session: FtdiSession to use, the reset and the core dump share it so
+      the board is only opened once, if None a session is created
 
   Returns:
     Dictionary of the core data
@@ -70,13 +75,17 @@ def analyze_crash(pretty_print = True):
   """
 
   #reset the core
-  dc = Dionysus_Control() 
-  dc.reset_internal_state_machine()
-  time.sleep(.1)
+  dc = Dionysus_Control(session = session)
+  try:
+    dc.reset_internal_state_machine()
+    time.sleep(.1)
+
+    #now the dump data is ready to be read
+    oly = dc.connect()
+    core_data = oly.dump_core()
+  finally:
+    dc.close()
 
-  #now the dump data is ready to be read
-  oly = Dionysus()
-  core_data = oly.dump_core()
   core_dict = create_core_dump_dict(core_data)
   pretty_print_core_dump(core_dict)
   
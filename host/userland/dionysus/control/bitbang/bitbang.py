@@ -11,16 +11,29 @@ class BitBangController(object):
   PROGRAM_PIN     = 0x20
   SOFT_RESET_PIN    = 0x40
 
-  def __init__(self, idVendor, idProduct, interface):
+  def __init__(self, idVendor, idProduct, interface, session = None):
     #all pins are in high impedance
     self.vendor = idVendor
     self.product = idProduct
     self.interface = interface
+    #an FtdiSession changes the direction of the pins on its open port
+    #instead of opening the port again
+    self.session = session
+
+    if self.session is not None:
+      self.f = self.session.bitbang(0x00)
+      return
 
     self.f = Ftdi()
 #    print "vid: %s, pid: %s" % (str(hex(idVendor)), str(hex(idProduct)))
     self.f.open_bitbang(idVendor, idProduct, interface)
 
+  def _set_direction(self, pin_dir):
+    if self.session is not None:
+      self.f = self.session.bitbang(pin_dir)
+      return
+    self.f.open_bitbang(self.vendor, self.product, self.interface, direction = pin_dir)
+
 
   def hiz(self):
     print "changing pins to high impedance"
@@ -63,18 +76,18 @@ class BitBangController(object):
 
   def set_soft_reset_to_output(self):
     pin_dir = self.SOFT_RESET_PIN
-    self.f.open_bitbang(self.vendor, self.product, self.interface, direction = pin_dir)
+    self._set_direction(pin_dir)
   
   def set_program_to_output(self):
     pin_dir = self.PROGRAM_PIN
-    self.f.open_bitbang(self.vendor, self.product, self.interface, direction = pin_dir)
+    self._set_direction(pin_dir)
     
   def set_pins_to_input(self):
-    self.f.open_bitbang(self.vendor, self.product, self.interface, direction = 0x00)
+    self._set_direction(0x00)
 
 
   def set_pins_to_output(self):
-    self.f.open_bitbang(self.vendor, self.product, self.interface, direction = 0xFF)
+    self._set_direction(0xFF)
 
 
   def pins_on(self):
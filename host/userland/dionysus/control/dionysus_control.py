@@ -7,9 +7,11 @@ import os
 import string
 
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, os.pardir))
+
 from bitbang.bitbang import BitBangController
 from spi_flash import serialflash
-from fifo.fifo import FifoController
+from userland.dionysus.ftdi_session import FtdiSession
 
 from spi_flash import numonyx_flash
 from spi_flash import numonyx_flash_64MB
@@ -23,6 +25,11 @@ from spi_flash import numonyx_flash_64MB
   05/16/2012
     added the "alt" command line feature that allows
     users to specify vendor and product ID
+  10/18/2026
+    all the operations share one FtdiSession, the ports of the
+    FTDI chip are opened once and only their modes change
+    added connect to get a Dionysus on the same session
+    added close, the session is closed if it was created here
 """
 
 """
@@ -79,10 +86,15 @@ def usage():
 class Dionysus_Control():
 
   
-  def __init__(self, idVendor = 0x0403, idProduct = 0x8530):
+  def __init__(self, idVendor = 0x0403, idProduct = 0x8530, session = None):
     self.vendor = idVendor 
     self.product = idProduct
-    self.fifo = FifoController(idVendor, idProduct)
+    #a session passed in is shared with other tools and is not closed
+    self.own_session = False
+    if session is None:
+      session = FtdiSession(idVendor, idProduct)
+      self.own_session = True
+    self.session = session
 
   def write_bin_file(self, filename):
     binf = ""
@@ -96,7 +108,8 @@ class Dionysus_Control():
 
     
     #open up the flash device
-    manager = serialflash.SerialFlashManager(self.vendor, self.product, 2)
+    manager = serialflash.SerialFlashManager(self.vendor, self.product, 2,
+                                  controller = self.session.flash_controller())
     flash = manager.get_flash_device()
 
     #print out the device that was found
@@ -124,7 +137,8 @@ class Dionysus_Control():
     return True
 
   def read_bin_file(self, filename):
-    manager = serialflash.SerialFlashManager(self.vendor, self.product, 2)
+    manager = serialflash.SerialFlashManager(self.vendor, self.product, 2,
+                                  controller = self.session.flash_controller())
     flash = manager.get_flash_device()
 
     #I don't know how long the data is so I'll have to read it all
@@ -142,7 +156,7 @@ class Dionysus_Control():
 
 
   def program_FPGA(self):
-    bbc = BitBangController(self.vendor, self.product, 2) 
+    bbc = BitBangController(self.vendor, self.product, 2, session = self.session)
     bbc.set_pins_to_input()
     #I don't know if this works
 #   bbc.set_program_to_output()
@@ -157,7 +171,7 @@ class Dionysus_Control():
 
 
   def reset_internal_state_machine(self):
-    bbc = BitBangController(self.vendor, self.product, 2)
+    bbc = BitBangController(self.vendor, self.product, 2, session = self.session)
     bbc.set_soft_reset_to_output()
     bbc.soft_reset_high()
     time.sleep(.2)
@@ -170,10 +184,35 @@ class Dionysus_Control():
 
 
   def set_sync_fifo_mode(self):
-    self.fifo.set_sync_fifo()
+    #keep the 2ms latency timer this mode has always used
+    self.session.sync_fifo(latency = 2)
 
   def set_debug_mode(self):
-    self.fifo.set_async_fifo()
+    self.session.async_fifo()
+
+  def connect(self, debug = False):
+    """returns a Dionysus that communicates over the same session"""
+    from userland.dionysus.dionysus import Dionysus
+    return Dionysus(self.vendor, self.product, debug = debug,
+                    session = self.session)
+
+  def close(self):
+    """close
+
+    Close the session if it was created by this controller, Dionysus
+    instances returned by connect share it and can no longer be used
+
+    Args:
+      Nothing
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    if self.own_session:
+      self.session.close()
 
 
 
@@ -123,7 +123,11 @@ class SerialFlashManager(object):
 
     CMD_JEDEC_ID = 0x9F
 
-    def __init__(self, vendor, product, interface=1):
+    def __init__(self, vendor, product, interface=1, controller=None):
+        # a controller that is already configured (FtdiSession) is used as is
+        if controller is not None:
+            self._ctrl = controller
+            return
         self._ctrl = SpiController(silent_clock=False)
         self._ctrl.configure(vendor, product, interface)
 
@@ -29,6 +29,21 @@ Main userland communication tool with the Dionysus board
 __author__ = 'dave.mccoy@cospandesign.com (Dave McCoy)'
 
 """ Changelog:
+10/18/2026
+  -streaming mode, the buffers are only purged when a desync is detected
+  -responses are found by the ResponseFramer instead of reading one byte at
+  a time
+  -packets are generated with the shared codec.PacketEncoder
+  -reads and writes are queued and sent as a single burst with flush_queue,
+  responses are matched to the requests in order
+  -the framer waits for responses and interrupts with the wait strategy of
+  the operation
+  -the traffic can be recorded to a binary log and replayed
+  -boards are identified by their USB IDs and serial number for the DRT cache
+  -the FTDI chip is opened through an FtdiSession that can be shared with the
+  control tools
+  -the latency timer, chunk sizes and framer read size come from the link
+  profile of the board (see link_tuner.py) instead of being hardcoded
 09/21/2012
   -added core dump function to retrieve the state of the master when a crash
   occurs
@@ -46,7 +61,20 @@ import json
 
 from userland.olympus import Olympus
 from userland.olympus import OlympusCommError
-from pyftdi.pyftdi.ftdi import Ftdi
+from userland.olympus import OlympusRequest
+from userland.olympus import bytes_to_words
+from userland.olympus import WAIT_REGISTER
+from userland.olympus import WAIT_INTERRUPT
+from userland.wait import BlockingWait
+from userland.framer import ResponseFramer
+from userland import codec
+from userland.codec import PacketEncoder
+from userland.recorder import TransactionRecorder
+from userland.recorder import RecordingDevice
+from userland.dionysus.ftdi_session import FtdiSession
+from userland.dionysus.ftdi_session import FIFO_INTERFACE
+from userland.dionysus.link_tuner import LinkProfiles
+from userland.dionysus.link_tuner import link_profile
 from array import array as Array
 
 class Dionysus(Olympus):
@@ -55,22 +83,75 @@ class Dionysus(Olympus):
   Concrete Class that implements Dionysus specific communication functions
   """
 
-  def __init__(self, idVendor=0x0403, idProduct=0x8530, debug = False):
+  def __init__(self, idVendor=0x0403, idProduct=0x8530, debug = False, dev = None,
+               session = None, link_profiles = None):
     Olympus.__init__(self, debug)
     self.vendor = idVendor
     self.product = idProduct
-    self.dev = Ftdi()
-    self._open_dev()
+    self.board_identity = None
+    #tuned link settings of the boards, set to None to always use the
+    #default settings
+    if link_profiles is None:
+      link_profiles = LinkProfiles()
+    self.link_profiles = link_profiles
+    self.link_profile = link_profile()
+    #FtdiSession that owns the USB device, a session that is passed in is
+    #shared with other tools and is not closed
+    self.session = session
+    self.own_session = False
+    if dev is None:
+      if self.session is None:
+        self.session = FtdiSession(idVendor, idProduct)
+        self.own_session = True
+      self._open_dev()
+    else:
+      #an already opened device (or an in-process model of one)
+      self.dev = dev
+      self.board_identity = getattr(dev, "board_identity", None)
+    self.framer = ResponseFramer(self.dev.read_data, debug = debug)
+    self.framer.chunk_size = self.link_profile["read_size"]
+    #interrupts can arrive in between the responses
+    self.framer.add_handler(codec.INTERRUPT_STATUS,
+                            codec.INTERRUPT_RESPONSE_LENGTH,
+                            self._interrupt_frame)
+    self.encoder = PacketEncoder()
+    #purge the buffers before every transaction
+    self.streaming = False
+    self.purge_count = 0
 
     self.name = "Dionysus"
 
   def __del__(self):
-    self.dev.close()
+    if self.session is None:
+      self.dev.close()
+    elif self.own_session:
+      self.session.close()
+
+  def get_board_identity(self):
+    """get_board_identity
+
+    Returns the USB IDs and serial number of the board
+
+    Args:
+      Nothing
+
+    Returns:
+      string
+      None if the device was not opened by Dionysus and does not identify
+        its board
+
+    Raises:
+      Nothing
+    """
+    return self.board_identity
 
   def _open_dev(self):
     """_open_dev
     
-    Open an FTDI communication channel
+    Open an FTDI communication channel, port A of the session is put in
+    synchronous FIFO mode (the port is only opened once per session) with
+    the link profile of the board, the default settings are used if the
+    board was not tuned
 
     Args:
       Nothing
@@ -81,27 +162,66 @@ class Dionysus(Olympus):
     Raises:
       Exception
     """
-    frequency = 30.0E6
-#Latency can go down t 2 but when set there is a small chance that there is a crash
-    latency = 4
-    self.dev.open(self.vendor, self.product, 0)
-    # Drain input buffer
-    self.dev.purge_buffers()
+    #the serial number is read from the open port
+    self.dev = self.session.get_port(FIFO_INTERFACE)
+    self.board_identity = self.session.get_identity()
+    profile = None
+    if self.link_profiles is not None:
+      profile = self.link_profiles.lookup(self.board_identity)
+      if profile is not None and self.debug:
+        print "Link profile of %s: %s" % (self.board_identity, str(profile))
+    self.apply_link_profile(profile)
 
-    # Reset
-    # Enable MPSSE mode
-    self.dev.set_bitmode(0x00, Ftdi.BITMODE_SYNCFF)
-    # Configure clock
+  def apply_link_profile(self, profile):
+    """apply_link_profile
 
-    frequency = self.dev._set_frequency(frequency)
-    # Set latency timer
-    self.dev.set_latency_timer(latency)
-    # Set chunk size
-    self.dev.write_data_set_chunksize(0x10000)
-    self.dev.read_data_set_chunksize(0x10000)
+    Configure the link with a set of settings, the buffers are purged
 
-    self.dev.set_flowctrl('hw')
-    self.dev.purge_buffers()
+    The period of the blocking wait strategies follows the latency timer,
+    an already opened device (not opened through a session) only uses the
+    framer read size and the latency
+
+    Args:
+      profile: dictionary of settings (see link_tuner.DEFAULT_PROFILE),
+        None for the default settings
+
+    Returns:
+      Nothing
+
+    Raises:
+      Exception: the port can not be configured
+    """
+    profile = link_profile(profile)
+    if self.session is not None:
+      #the port stays the same, only its configuration changes
+      self.session.sync_fifo(profile["frequency"],
+                             profile["latency"],
+                             profile["write_chunk_size"],
+                             profile["read_chunk_size"])
+    self.link_profile = profile
+    #a blocking wait lasts as long as a read held by the latency timer
+    for strategy in self.wait_strategies.values():
+      if isinstance(strategy, BlockingWait):
+        strategy.period = profile["latency"] / 1000.0
+    if hasattr(self, "framer"):
+      self.framer.chunk_size = profile["read_size"]
+      self.framer.clear()
+
+  def get_link_profile(self):
+    """get_link_profile
+
+    Returns the settings of the link
+
+    Args:
+      Nothing
+
+    Returns:
+      dictionary of settings
+
+    Raises:
+      Nothing
+    """
+    return dict(self.link_profile)
 
 
   def read(self, device_id, address, length = 1, mem_device = False):
@@ -121,78 +241,10 @@ class Dionysus(Olympus):
     Raises:
       OlympusCommError
     """
-    read_data = Array('B')
-
-    write_data = Array('B', [0xCD, 0x02]) 
-    if mem_device:
-      if self.debug:
-        print "memory device"
-      write_data = Array ('B', [0xCD, 0x12])
-  
-    fmt_string = "%06X" % (length) 
-    write_data.fromstring(fmt_string.decode('hex'))
-    offset_string = "00"
-    if not mem_device:
-      offset_string = "%02X" % device_id
-
-    write_data.fromstring(offset_string.decode('hex'))
-
-    addr_string = "%06X" % address
-    write_data.fromstring(addr_string.decode('hex'))
-    if self.debug:
-      print "data read string: " + str(write_data)
-
-    self.dev.purge_buffers()
-    self.dev.write_data(write_data)
-
-    timeout = time.time() + self.read_timeout
-    rsp = Array('B')
-    while time.time() < timeout:
-      response = self.dev.read_data(1)
-      if len(response) > 0:
-        rsp = Array('B')
-        rsp.fromstring(response)
-        if rsp[0] == 0xDC:
-          if self.debug:
-            print "Got a response"  
-          break
-
-    if len(rsp) > 0:
-      if rsp[0] != 0xDC:
-        if self.debug:
-          print "Response not found"  
-        raise OlympusCommError("Did not find identification byte (0xDC): %s" % str(rsp))
-    else:
-      if self.debug:      
-        print "No Response found"
-      raise OlympusCommError("Timeout while waiting for a response")
-
-    #I need to watch out for the modem status bytes
-    read_count = 0
-    response = Array('B')
-    rsp = Array('B')
-    timeout = time.time() + self.read_timeout
-
-    while (time.time() < timeout) and (read_count < (length * 4 + 8)):
-      response = self.dev.read_data((length * 4 + 8 ) - read_count)
-      temp  = Array('B')
-      temp.fromstring(response)
-      #print "temp: %s", str(temp)
-      if (len(temp) > 0):
-        rsp += temp
-        read_count = len(rsp)
-    
-    if self.debug:
-      print "read length = %d, total length = %d" % (len(rsp), (length * 4 + 8))
-      print "time left on timeout: %d" % (timeout - time.time())
-
-    if self.debug:
-      print "response length: " + str(length * 4 + 8)
-      print "response status:\n\t" + str(rsp[:8])
-      print "response data:\n" + str(rsp[8:])
-
-    return rsp[8:]
-    
+    with self.lock:
+      request = self.queue_read(device_id, address, length, mem_device)
+      self.flush_queue()
+    return request.result()
 
   def write(self, device_id, address, data=None, mem_device = False):
     """write
@@ -211,92 +263,252 @@ class Dionysus(Olympus):
     Raises:
       OlympusCommError
     """
-    length = len(data) / 4
+    with self.lock:
+      request = self.queue_write(device_id, address, data, mem_device)
+      self.flush_queue()
+    request.result()
+
+  def flush_queue(self):
+    """flush_queue
+
+    Send all the queued read and write requests to Olympus in one burst and
+    then match the responses to the requests in order
+
+    Args:
+      Nothing
 
-    # ID 01 NN NN NN OO AA AA AA DD DD DD DD
-      # ID = ID BYTE (0xCD)
-      # 01 = Write Command
-      # NN = Size of write (3 bytes)
-      # OO = Offset of device
-      # AA = Address (4 bytes)
-      # DD = Data (4 bytes)
+    Returns:
+      Nothing
 
-    #create an array with the identification byte (0xCD)
-    #and code for write (0x01)
+    Raises:
+      OlympusCommError: Error in communication, the failed request and all
+      requests behind it are resolved with the error
+    """
+    with self.lock:
+      requests = self.request_queue
+      self.request_queue = []
+      if len(requests) == 0:
+        return
+
+      burst = self.encoder.encode([(r.command,
+                                    r.device_id,
+                                    r.address,
+                                    r.length,
+                                    r.data,
+                                    r.mem_device) for r in requests])
 
-    data_out = Array('B', [0xCD, 0x01]) 
-    if mem_device:
       if self.debug:
-        print "memory device"
-      data_out = Array ('B', [0xCD, 0x11])
-    
+        print "sending %d requests in a %d byte burst" % (len(requests), len(burst))
+
+      if not self.streaming:
+        #avoid the akward stale bug
+        self._purge()
+      start = time.time()
+      self.dev.write_data(burst)
+
+      for i in range (0, len(requests)):
+        request = requests[i]
+        try:
+          rsp = self._read_response(codec.response_length(request.command, request.length),
+                                    self._response_validator(request))
+          #the latency of each request is measured from the start of the burst
+          self._record_request(request, time.time() - start)
+          if request.command == OlympusRequest.READ:
+            if self.debug:
+              print "response status:\n\t" + str(rsp[:8])
+              print "response data:\n" + str(rsp[8:])
+            request.set_result(rsp[codec.READ_RESPONSE_LENGTH:])
+          else:
+            if self.debug:
+              print "Response: " + str(rsp)
+            request.set_result(None)
+
+        except OlympusCommError, err:
+          for r in requests[i:]:
+            r.set_error(err)
+          raise
+
+  def set_streaming(self, enable):
+    """set_streaming
+
+    Enable or disable streaming mode
+
+    When streaming is disabled the device buffers are purged before every
+    transaction, when it is enabled the buffers are only purged when a
+    response cannot be found, stale or out of order responses are detected
+    and skipped by the response framer
+
+    Args:
+      enable: True to keep the link streaming
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
     """
-    print "write command:\n\t" + str(data_out[:9])
-    for i in range (0, len(data_out)):
-      print str(hex(data_out[i])) + ", ",
-    print " "
+    self.streaming = enable
+
+  def start_recording(self, path, capacity = 4096):
+    """start_recording
+
+    Record all the data sent to and received from the board into a binary
+    log (recorder.py), the log can be replayed with a ReplayDevice
+
+    Args:
+      path: path of the log file
+      capacity: number of records buffered before the writer thread catches
+        up
+
+    Returns:
+      Nothing
+
+    Raises:
+      IOError: the file can not be created
     """
+    with self.lock:
+      self.stop_recording()
+      self.dev = RecordingDevice(self.dev, TransactionRecorder(path, capacity))
+      self.framer.read_data = self.dev.read_data
 
- 
-
-    #append the length into the frist 32 bits
-    fmt_string = "%06X" % (length) 
-    data_out.fromstring(fmt_string.decode('hex'))
-    offset_string = "00"
-    if not mem_device:
-      offset_string = "%02X" % device_id
-    data_out.fromstring(offset_string.decode('hex'))
-    addr_string = "%06X" % address
-    data_out.fromstring(addr_string.decode('hex'))
-    
-    data_out.extend(data)
+  def stop_recording(self):
+    """stop_recording
+
+    Stop recording and close the log
+
+    Args:
+      Nothing
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    with self.lock:
+      if not isinstance(self.dev, RecordingDevice):
+        return
+      self.dev.recorder.close()
+      self.dev = self.dev.dev
+      self.framer.read_data = self.dev.read_data
+
+  def get_desync_count(self):
+    """get_desync_count
+
+    Returns the number of unexpected responses that were skipped while
+    waiting for a response
+
+    Args:
+      Nothing
+
+    Returns:
+      Number of desyncs detected
+
+    Raises:
+      Nothing
+    """
+    return self.framer.desync_count
 
+  def get_purge_count(self):
+    """get_purge_count
+
+    Returns the number of times the device buffers were purged
+
+    Args:
+      Nothing
+
+    Returns:
+      Number of purges
+
+    Raises:
+      Nothing
     """
-    #if (self.debug):
-    print "data write string:\n"
-    print "write command:\n\t" + str(data_out[:9])
-    for i in range (0, 9):
-      print str(hex(data_out[i])) + ", ",
-    print " "
+    return self.purge_count
+
+  def _response_validator(self, request):
+    """_response_validator
+
+    Create a function that checks that a response frame belongs to the
+    request, the status byte and the address that is echoed back must match
+
+    Args:
+      request: OlympusRequest the response is expected for
+
+    Returns:
+      function that takes a frame and returns True if the frame matches
+
+    Raises:
+      Nothing
     """
+    status = codec.response_status(request.command)
+    address = codec.response_address(request.device_id,
+                                     request.address,
+                                     request.mem_device)
 
+    def validate(frame):
+      rsp_status, count, rsp_address = codec.unpack_response_header(frame)
+      return (rsp_status == status) and (rsp_address == address)
 
-    #print "write data:\n" + str(data_out[9:])
+    return validate
 
-    #avoid the akward stale bug
-    self.dev.purge_buffers()
+  def _transport_stats(self):
+    """response framer counters"""
+    return {"sync time": self.framer.sync_time,
+            "discarded bytes": self.framer.discarded_bytes,
+            "desyncs": self.framer.desync_count}
 
-    self.dev.write_data(data_out)
-    rsp = Array('B')
+  def _read_response(self, length, validate = None):
+    """_read_response
 
-    timeout = time.time() + self.read_timeout
-    while time.time() < timeout:
-      response = self.dev.read_data(1)
-      if len(response) > 0:
-        rsp = Array('B')
-        rsp.fromstring(response)
-        if rsp[0] == 0xDC:
-          if self.debug:
-            print "Got a response"  
-          break
+    Wait for the identification byte (0xDC) of a response and then read the
+    body of the response
 
-    if (len(rsp) > 0):
-      if rsp[0] != 0xDC:
-        if self.debug:
-          print "Response not found"  
-        raise OlympusCommError("Did not find identification byte (0xDC): %s" % str(rsp))
+    if a response cannot be found (or only unexpected responses are found) the
+    buffers are purged so the next transaction starts from a clean link
 
-    else:
+    Args:
+      length: number of bytes in the response following the identification
+        byte
+      validate: function used to reject stale or out of order responses
+
+    Returns:
+      Array of bytes of the response (not including the identification byte)
+
+    Raises:
+      OlympusCommError: Timeout while waiting for the response
+    """
+    timeout = time.time() + self.read_timeout
+    self.framer.wait = self.wait_strategies[WAIT_REGISTER]
+    frame = self.framer.get_frame(length, timeout, validate)
+    if frame is None:
       if self.debug:
-        print "No Response"
+        print "No Response found"
+      self._purge()
+      self.statistics.record_timeout()
       raise OlympusCommError("Timeout while waiting for a response")
 
-    response = self.dev.read_data(8)
-    rsp = Array('B')
-    rsp.fromstring(response)
-
     if self.debug:
-      print "Response: " + str(rsp)
+      print "Got a response"
+    return Array('B', frame.tobytes())
+
+  def _purge(self):
+    """_purge
+
+    Drop all the data in the device buffers and in the response framer
+
+    Args:
+      Nothing
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    self.purge_count += 1
+    self.statistics.record_purge()
+    self.dev.purge_buffers()
+    self.framer.clear()
 
   def ping(self):
     """ping
@@ -312,44 +524,19 @@ class Dionysus(Olympus):
     Raises:
       OlympusCommError
     """
-    data = Array('B')
-    data.extend([0XCD, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00]);
-    if self.debug:
-      print "Sending ping...",
-    self.dev.write_data(data)
-    rsp = Array('B')
-    temp = Array('B')
-
-    timeout = time.time() + self.read_timeout
-
-    while time.time() < timeout:
-      response = self.dev.read_data(5)
-      if self.debug:
-        print ".",
-      rsp = Array('B')
-      rsp.fromstring(response)
-      temp.extend(rsp)
-      if 0xDC in rsp:
-        if self.debug:
-          print "Got a response"  
-          print "Response: %s" % str(temp)
-        break
-
-    if not 0xDC in rsp:
+    with self.lock:
       if self.debug:
-        print "ID byte not found in response"  
-        print "temp: " + str(temp)
-      raise OlympusCommError("Ping response did not contain ID: %s" % str(temp))
-
-    index  = rsp.index(0xDC) + 1
+        print "Sending ping...",
+      start = time.time()
+      self.dev.write_data(codec.PING_PACKET)
 
-    read_data = Array('B')
-    read_data.extend(rsp[index:])
-    num = 3 - index
-    read_data.fromstring(self.dev.read_data(num))
-    if self.debug:
-      print "Success!"
-    return
+      rsp = self._read_response(codec.PING_RESPONSE_LENGTH,
+                                lambda frame: frame.tobytes()[0] == chr(codec.PING_STATUS))
+      self.statistics.record("ping", None, 0, time.time() - start)
+      if self.debug:
+        print "Response: %s" % str(rsp)
+        print "Success!"
+      return
 
 
   def reset(self):
@@ -367,12 +554,12 @@ class Dionysus(Olympus):
     Raises:
       OlympusCommError: A failure of communication is detected
     """
-    data = Array('B')
-    data.extend([0XCD, 0x03, 0x00, 0x00, 0x00]);
-    if self.debug:
-      print "Sending reset..."
-    self.dev.purge_buffers()
-    self.dev.write_data(data)
+    with self.lock:
+      if self.debug:
+        print "Sending reset..."
+      self._purge()
+      self.invalidate_registers()
+      self.dev.write_data(codec.RESET_PACKET)
 
   def dump_core(self):
     """dump_core
@@ -391,80 +578,44 @@ class Dionysus(Olympus):
       implementation
       OlympusCommError: A failure of communication is detected
     """
+    with self.lock:
+      print "Sending core dump request..."
 
-    data = Array('B')
-    data.extend([0xCD, 0x0F, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00]);
-    print "Sending core dump request..."
+      self._purge()
+      self.dev.write_data(codec.CORE_DUMP_PACKET)
 
-    self.dev.purge_buffers()
-    self.dev.write_data(data)
+      wait_time = 5
+      timeout = time.time() + wait_time
+      self.framer.wait = self.wait_strategies[WAIT_REGISTER]
 
-    core_dump = Array('L')
-    wait_time = 5
-    timeout = time.time() + wait_time
+      #get the number of items from the address
+      rsp = self.framer.get_frame(codec.CORE_DUMP_RESPONSE_LENGTH, timeout)
+      if rsp is None:
+        print "Response not found"
+        raise OlympusCommError("Response Not Found")
 
-    temp = Array ('B')
-    while time.time() < timeout:
-      response = self.dev.read_data(1)
-      rsp = Array('B')
-      rsp.fromstring(response)
-      temp.extend(rsp)
-      if 0xDC in rsp:
-        print "Got a response"  
-        break
-
-    if not 0xDC in rsp:
-      print "Response not found"  
-      raise OlympusCommError("Response Not Found")
-
-    rsp = Array('B')
-    read_total = 4
-    read_count = len(rsp)
-
-    #get the number of items from the address
-    timeout = time.time() + wait_time
-    while (time.time() < timeout) and (read_count < read_total):
-      response = self.dev.read_data(read_total - read_count)
-      temp  = Array('B')
-      temp.fromstring(response)
-      if (len(temp) > 0):
-        rsp += temp
-        read_count = len(rsp)
-
-    print "Length of read: %d" % len(rsp)
-    print "Data: %s" % str(rsp)
-    count  = ( rsp[1] << 16 | rsp[2] << 8 | rsp[3]) * 4
-    print "Number of core registers: %d" % (count / 4)
-
-    #get the core dump data
-    timeout = time.time() + wait_time
-    read_total  = count
-    read_count  = 0
-    temp = Array ('B')
-    rsp = Array('B')
-    while (time.time() < timeout) and (read_count < read_total):
-      response = self.dev.read_data(read_total - read_count)
-      temp  = Array('B')
-      temp.fromstring(response)
-      if (len(temp) > 0):
-        rsp += temp
-        read_count = len(rsp)
-
-    print "Length read: %d" % (len(rsp) / 4)
-    print "Data: %s" % str(rsp)
-    core_data = Array('L')
-    for i in range (0, count, 4):
-      print "count: %d" % i
-      core_data.append(rsp[i] << 24 | rsp[i + 1] << 16 | rsp[i + 2] << 8 | rsp[i + 3])
-    
-    #if self.debug:
-    print "core data: " + str(core_data)
+      print "Got a response"
+      rsp = Array('B', rsp.tobytes())
+      print "Data: %s" % str(rsp)
+      count  = ( rsp[1] << 16 | rsp[2] << 8 | rsp[3]) * 4
+      print "Number of core registers: %d" % (count / 4)
+
+      #get the core dump data
+      rsp = self.framer.get_bytes(count, timeout)
+      if rsp is None:
+        raise OlympusCommError("Timeout while reading the core dump")
+
+      print "Length read: %d" % (len(rsp) / 4)
+      core_data = bytes_to_words(rsp)
+
+      #if self.debug:
+      print "core data: " + str(core_data)
+
+      return core_data
 
-    return core_data
 
 
 
- 
 
   def wait_for_interrupts(self, wait_time = 1):
     """wait_for_interrupts
@@ -483,50 +634,30 @@ class Dionysus(Olympus):
     """
     timeout = time.time() + wait_time
 
-    temp = Array ('B')
-    while time.time() < timeout:
-      response = self.dev.read_data(1)
-      rsp = Array('B')
-      rsp.fromstring(response)
-      temp.extend(rsp)
-      if 0xDC in rsp:
-        if self.debug:
-          print "Got a response"  
-        break
-
-    if not 0xDC in rsp:
-      if self.debug:
-        print "Response not found"  
-      return False
-
-    read_total = 9
-    read_count = len(rsp)
-
-    #print "read_count: %s" % str(rsp)
-    while (time.time() < timeout) and (read_count < read_total):
-      response = self.dev.read_data(read_total - read_count)
-      temp  = Array('B')
-      temp.fromstring(response)
-      #print "temp: %s", str(temp)
-      if (len(temp) > 0):
-        rsp += temp
-        read_count = len(rsp)
-
-    #print "read_count: %s" % str(rsp)
-   
-
-    index  = rsp.index(0xDC) + 1
+    with self.lock:
+      #interrupts that were received while waiting for responses are
+      #reported first
+      if self.pending_interrupts == 0:
+        self.framer.wait = self.wait_strategies[WAIT_INTERRUPT]
+        if not self.framer.dispatch(timeout):
+          if self.debug:
+            print "Response not found"  
+          return False
 
-    read_data = Array('B')
-    read_data.extend(rsp[index:])
-    #print "read_data: " + str(rsp)
+      self.interrupts = self.pending_interrupts
+      self.pending_interrupts = 0
 
-    self.interrupts = read_data[-4] << 24 | read_data[-3] << 16 | read_data[-2] << 8 | read_data[-1]
-    
     if self.debug:
       print "interrupts: " + str(self.interrupts)
     return True
 
+  def _interrupt_frame(self, frame):
+    """called by the framer when an interrupt frame is received"""
+    status, interrupts = codec.RESPONSE_HEADER.unpack_from(frame.tobytes(), 0)
+    if self.debug:
+      print "Got an interrupt: 0x%08X" % interrupts
+    self._interrupts_received(interrupts)
+
 
   def comm_debug(self):
     """comm_debug
@@ -0,0 +1,326 @@
+#Distributed under the MIT licesnse.
+#Copyright (c) 2011 Dave McCoy (dave.mccoy@cospandesign.com)
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy of
+#this software and associated documentation files (the "Software"), to deal in
+#the Software without restriction, including without limitation the rights to
+#use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+#of the Software, and to permit persons to whom the Software is furnished to do
+#so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+""" ftdi_session
+
+One session with the FTDI chip of a Dionysus board, shared by the
+communication interface (Dionysus), the control tool (Dionysus_Control), the
+flash programmer and the core analyzer
+
+Port A carries the Olympus synchronous FIFO (or the asynchronous FIFO used
+while the FPGA is configured), port B drives the configuration pins
+(bitbang) and the SPI flash (MPSSE). Each port is opened once, changing the
+mode of a port only changes the bitmode of the open port instead of finding
+and opening the USB device again
+
+"""
+
+__author__ = 'dave.mccoy@cospandesign.com (Dave McCoy)'
+
+from array import array as Array
+
+from pyftdi.pyftdi.ftdi import Ftdi
+
+#port A, opened the way Dionysus always has
+FIFO_INTERFACE        = 0
+#port B
+CONTROL_INTERFACE     = 2
+
+#Modes of the ports
+MODE_SYNC_FIFO        = "sync fifo"
+MODE_ASYNC_FIFO       = "async fifo"
+MODE_BITBANG          = "bitbang"
+MODE_FLASH            = "flash"
+
+#MPSSE commands used to set up the SPI port
+SET_BITS_LOW          = 0x80
+LOOPBACK_END          = 0x85
+
+
+class FtdiSession:
+  """FtdiSession
+
+  Owns the open ports of the FTDI chip and switches their modes
+  """
+
+  def __init__(self, idVendor = 0x0403, idProduct = 0x8530, ftdi_class = Ftdi):
+    """__init__
+
+    The ports are opened the first time they are used
+
+    Args:
+      idVendor: USB vendor ID of the board
+      idProduct: USB product ID of the board
+      ftdi_class: class used to open the ports
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    self.vendor = idVendor
+    self.product = idProduct
+    self.ftdi_class = ftdi_class
+    self.ports = {}
+    self.modes = {}
+    self.spi = None
+    #settings the synchronous FIFO was configured with
+    self.fifo_settings = None
+    #number of times a port was opened
+    self.open_count = 0
+
+  def get_port(self, interface):
+    """get_port
+
+    Returns the Ftdi of a port, the port is opened the first time
+
+    Args:
+      interface: FIFO_INTERFACE or CONTROL_INTERFACE
+
+    Returns:
+      Ftdi
+
+    Raises:
+      Exception: the port can not be opened
+    """
+    if interface not in self.ports:
+      ftdi = self.ftdi_class()
+      ftdi.open(self.vendor, self.product, interface)
+      self.ports[interface] = ftdi
+      self.modes[interface] = None
+      self.open_count += 1
+    return self.ports[interface]
+
+  def get_mode(self, interface):
+    """get_mode
+
+    Returns the mode of a port
+
+    Args:
+      interface: FIFO_INTERFACE or CONTROL_INTERFACE
+
+    Returns:
+      MODE_SYNC_FIFO, MODE_ASYNC_FIFO, MODE_BITBANG, MODE_FLASH
+      None if the port is not open or its mode was not set
+
+    Raises:
+      Nothing
+    """
+    return self.modes.get(interface)
+
+  def sync_fifo(self, frequency = 30.0E6, latency = 4,
+                write_chunk_size = 0x10000, read_chunk_size = 0x10000):
+    """sync_fifo
+
+    Put port A in synchronous FIFO mode to communicate with Olympus, the port
+    is reconfigured when it is already in synchronous FIFO mode with
+    different settings
+
+    Args:
+      frequency: clock frequency
+      latency: latency timer in milliseconds (can go down to 2 but when set
+        there is a small chance that there is a crash)
+      write_chunk_size: size of the USB transfers written to the chip
+      read_chunk_size: size of the USB transfers read from the chip
+
+    Returns:
+      Ftdi of port A
+
+    Raises:
+      Exception: the port can not be opened
+    """
+    ftdi = self.get_port(FIFO_INTERFACE)
+    settings = (frequency, latency, write_chunk_size, read_chunk_size)
+    if self.modes[FIFO_INTERFACE] == MODE_SYNC_FIFO and \
+        self.fifo_settings == settings:
+      return ftdi
+    # Drain input buffer
+    ftdi.purge_buffers()
+    ftdi.set_bitmode(0x00, Ftdi.BITMODE_SYNCFF)
+    # Configure clock
+    ftdi._set_frequency(frequency)
+    ftdi.set_latency_timer(latency)
+    ftdi.write_data_set_chunksize(write_chunk_size)
+    ftdi.read_data_set_chunksize(read_chunk_size)
+    ftdi.set_flowctrl('hw')
+    ftdi.purge_buffers()
+    self.modes[FIFO_INTERFACE] = MODE_SYNC_FIFO
+    self.fifo_settings = settings
+    return ftdi
+
+  def async_fifo(self, frequency = 6.0E6, latency = 2):
+    """async_fifo
+
+    Put port A in asynchronous (configuration) mode
+
+    Args:
+      frequency: clock frequency
+      latency: latency timer in milliseconds
+
+    Returns:
+      Ftdi of port A
+
+    Raises:
+      Exception: the port can not be opened
+    """
+    ftdi = self.get_port(FIFO_INTERFACE)
+    if self.modes[FIFO_INTERFACE] == MODE_ASYNC_FIFO:
+      return ftdi
+    ftdi.set_latency_timer(latency)
+    ftdi.write_data_set_chunksize(512)
+    ftdi.read_data_set_chunksize(512)
+    ftdi.purge_buffers()
+    ftdi.set_bitmode(0x00, Ftdi.BITMODE_BITBANG)
+    ftdi._set_frequency(frequency)
+    ftdi.purge_buffers()
+    self.modes[FIFO_INTERFACE] = MODE_ASYNC_FIFO
+    return ftdi
+
+  def bitbang(self, direction = 0x00):
+    """bitbang
+
+    Put port B in bitbang mode to drive the configuration pins
+
+    Args:
+      direction: pins that are outputs
+
+    Returns:
+      Ftdi of port B
+
+    Raises:
+      Exception: the port can not be opened
+    """
+    ftdi = self.get_port(CONTROL_INTERFACE)
+    if self.modes[CONTROL_INTERFACE] != MODE_BITBANG:
+      ftdi.set_bitmode(0x00, Ftdi.BITMODE_RESET)
+      ftdi.purge_buffers()
+      self.spi = None
+    ftdi.set_bitmode(direction, Ftdi.BITMODE_BITBANG)
+    self.modes[CONTROL_INTERFACE] = MODE_BITBANG
+    return ftdi
+
+  def flash_controller(self, frequency = 6.0E6, latency = 16):
+    """flash_controller
+
+    Put port B in MPSSE mode to access the SPI flash
+
+    Args:
+      frequency: SPI clock frequency
+      latency: latency timer in milliseconds
+
+    Returns:
+      pyftdi SpiController that uses port B
+
+    Raises:
+      Exception: the port can not be opened
+    """
+    from pyftdi.pyftdi.spi import SpiController
+    ftdi = self.get_port(CONTROL_INTERFACE)
+    if self.modes[CONTROL_INTERFACE] == MODE_FLASH:
+      return self.spi
+
+    spi = SpiController(silent_clock = False)
+    ftdi.set_latency_timer(latency)
+    ftdi.write_data_set_chunksize(512)
+    ftdi.read_data_set_chunksize(512)
+    ftdi.purge_buffers()
+    ftdi.set_bitmode(0x00, Ftdi.BITMODE_RESET)
+    ftdi.set_bitmode(0x00, Ftdi.BITMODE_MPSSE)
+    frequency = ftdi._set_frequency(frequency)
+    #chip selects high, clock, data out and chip selects are outputs
+    ftdi.write_data(Array('B', [SET_BITS_LOW,
+                                spi._cs_bits & 0xFF,
+                                spi._direction & 0xFF]))
+    ftdi.write_data(Array('B', [LOOPBACK_END]))
+    ftdi.purge_buffers()
+    #the controller uses the port of the session instead of opening its own
+    spi._ftdi = ftdi
+    spi._frequency = frequency
+    self.spi = spi
+    self.modes[CONTROL_INTERFACE] = MODE_FLASH
+    return spi
+
+  def get_serial_number(self):
+    """get_serial_number
+
+    Read the serial number of the FTDI chip
+
+    Args:
+      Nothing
+
+    Returns:
+      string
+      None if the serial number cannot be read
+
+    Raises:
+      Nothing
+    """
+    for ftdi in self.ports.values():
+      usb_dev = getattr(ftdi, "usb_dev", None)
+      try:
+        serial = getattr(usb_dev, "serial_number", None)
+      except Exception:
+        serial = None
+      if serial is not None:
+        return serial
+    return None
+
+  def get_identity(self):
+    """get_identity
+
+    Returns the USB IDs and serial number of the board
+
+    Args:
+      Nothing
+
+    Returns:
+      string
+
+    Raises:
+      Nothing
+    """
+    identity = "Dionysus:%04X:%04X" % (self.vendor, self.product)
+    serial = self.get_serial_number()
+    if serial is not None:
+      identity += ":%s" % serial
+    return identity
+
+  def close(self):
+    """close
+
+    Close all the ports
+
+    Args:
+      Nothing
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    for ftdi in self.ports.values():
+      ftdi.close()
+    self.ports = {}
+    self.modes = {}
+    self.spi = None
+    self.fifo_settings = None
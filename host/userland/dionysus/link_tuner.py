@@ -0,0 +1,605 @@
+#Distributed under the MIT licesnse.
+#Copyright (c) 2011 Dave McCoy (dave.mccoy@cospandesign.com)
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy of
+#this software and associated documentation files (the "Software"), to deal in
+#the Software without restriction, including without limitation the rights to
+#use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+#of the Software, and to permit persons to whom the Software is furnished to do
+#so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+""" link_tuner
+
+Tunes the FTDI link of a Dionysus board
+
+The best latency timer, USB chunk sizes and framer read size depend on the
+host machine and the hubs between the host and the board. The tuner sweeps
+the settings against a mix of small register operations and bulk memory
+transfers, every setting is timed and checked (data read back, no errors, no
+desyncs) and the fastest stable setting is checked again with a longer run
+before it is saved as the profile of the board
+
+Dionysus loads the profile of a board when the link is opened, the profiles
+are a JSON file, ~/.olympus/ftdi_profiles.json by default, the location can
+be changed with the OLYMPUS_FTDI_PROFILES environment variable
+
+  python -m userland.dionysus.link_tuner --scratch 0x100000
+  python -m userland.dionysus.link_tuner --emulate --quick
+
+The memory transfers of the workload overwrite the memory of the board, on a
+real board they are only run when a scratch region is given with --scratch or
+--allow-memory-clobber, otherwise only register operations are timed
+
+"""
+
+__author__ = 'dave.mccoy@cospandesign.com (Dave McCoy)'
+
+import sys
+import os
+import time
+import json
+import socket
+import argparse
+import itertools
+from array import array as Array
+
+sys.path.append(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+
+from userland.olympus import OlympusCommError
+from userland.olympus import bytes_to_words
+
+DEFAULT_PROFILES_PATH = os.environ.get("OLYMPUS_FTDI_PROFILES",
+                                       os.path.join(os.path.expanduser("~"),
+                                                    ".olympus",
+                                                    "ftdi_profiles.json"))
+
+#settings used when a board does not have a profile
+DEFAULT_PROFILE = {"frequency":         30.0E6,
+                   "latency":           4,
+                   "write_chunk_size":  0x10000,
+                   "read_chunk_size":   0x10000,
+                   "read_size":         0x10000}
+
+#settings swept by the tuner
+LATENCIES         = [1, 2, 4, 8, 16]
+CHUNK_SIZES       = [0x1000, 0x4000, 0x10000]
+READ_SIZES        = [0x1000, 0x4000, 0x10000]
+#the FT2232H drives the clock in synchronous FIFO mode, the frequency is
+#kept in the profile but is not swept
+FREQUENCIES       = [30.0E6]
+
+#smaller sweep for the --quick option
+QUICK_LATENCIES   = [2, 4, 16]
+QUICK_CHUNK_SIZES = [0x4000, 0x10000]
+QUICK_READ_SIZES  = [0x10000]
+
+
+def link_profile(profile = None):
+  """link_profile
+
+  Returns a complete profile, the settings missing from a profile are taken
+  from the default profile
+
+  Args:
+    profile: dictionary of settings, None for the default profile
+
+  Returns:
+    dictionary of settings
+
+  Raises:
+    Nothing
+  """
+  settings = dict(DEFAULT_PROFILE)
+  if profile is not None:
+    for key in DEFAULT_PROFILE:
+      if key in profile:
+        settings[key] = profile[key]
+  return settings
+
+
+class LinkProfiles:
+  """LinkProfiles
+
+  Reads and writes the profile file, errors accessing the file are not
+  fatal, the default settings are used instead
+  """
+
+  def __init__(self, path = DEFAULT_PROFILES_PATH):
+    self.path = path
+
+  def _load(self):
+    try:
+      f = open(self.path, "r")
+      try:
+        entries = json.load(f)
+      finally:
+        f.close()
+    except (IOError, OSError, ValueError):
+      return {}
+    if not isinstance(entries, dict):
+      return {}
+    return entries
+
+  def lookup(self, identity):
+    """lookup
+
+    Find the profile of a board
+
+    Args:
+      identity: string identifying the board (USB IDs and serial number)
+
+    Returns:
+      dictionary of settings
+      None if the board was not tuned
+
+    Raises:
+      Nothing
+    """
+    entry = self._load().get(identity)
+    if not isinstance(entry, dict) or not isinstance(entry.get("profile"), dict):
+      return None
+    return link_profile(entry["profile"])
+
+  def get_entry(self, identity):
+    """get_entry
+
+    Returns everything saved for a board: the profile, the stability check
+    and the host that tuned it
+
+    Args:
+      identity: string identifying the board
+
+    Returns:
+      dictionary
+      None if the board was not tuned
+
+    Raises:
+      Nothing
+    """
+    return self._load().get(identity)
+
+  def store(self, identity, profile, stability):
+    """store
+
+    Save the profile of a board
+
+    Args:
+      identity: string identifying the board
+      profile: dictionary of settings
+      stability: result of the stability check of the profile
+
+    Returns:
+      True: the profile was saved
+      False: the file could not be written
+
+    Raises:
+      Nothing
+    """
+    entries = self._load()
+    entries[identity] = {"profile": link_profile(profile),
+                         "stability": stability,
+                         "host": socket.gethostname(),
+                         "date": time.strftime("%Y-%m-%d %H:%M:%S")}
+    return self._save(entries)
+
+  def remove(self, identity):
+    """remove
+
+    Drop the profile of a board, the default settings are used again
+
+    Args:
+      identity: string identifying the board
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    entries = self._load()
+    if identity in entries:
+      del entries[identity]
+      self._save(entries)
+
+  def _save(self, entries):
+    """_save
+
+    Replace the profile file atomically
+
+    Returns:
+      True: the file was written
+      False: the file could not be written
+    """
+    temp_path = "%s.%d.tmp" % (self.path, os.getpid())
+    try:
+      directory = os.path.dirname(self.path)
+      if len(directory) > 0 and not os.path.exists(directory):
+        os.makedirs(directory)
+      f = open(temp_path, "w")
+      try:
+        json.dump(entries, f, indent = 2, sort_keys = True)
+      finally:
+        f.close()
+      os.rename(temp_path, self.path)
+    except (IOError, OSError):
+      return False
+    return True
+
+
+class LinkTuner:
+  """LinkTuner
+
+  Sweeps the link settings of a Dionysus and keeps the fastest stable one
+  """
+
+  #number of times the workload is run for each setting
+  repeat = 3
+  #number of times the workload is run to check the selected setting
+  stability_repeat = 20
+  #register reads in each register burst of the workload
+  register_reads = 32
+  #32-bit words written and read back from the memory by the workload
+  memory_words = 0x4000
+  #seconds to wait for a response while tuning, settings that stall the
+  #link fail quickly
+  timeout = 1.0
+
+  def __init__(self, dionysus, profiles = None, quick = False, debug = False,
+               scratch = None):
+    """__init__
+
+    Args:
+      dionysus: Dionysus to tune, the DRT must have been read
+      profiles: LinkProfiles the selected profile is saved to, if not
+        specified the profiles of the Dionysus are used
+      quick: sweep fewer settings
+      debug: print out the result of every setting
+      scratch: address (32-bit words) of the memory the workload can
+        overwrite, None to leave the memory alone
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    self.dionysus = dionysus
+    if profiles is None:
+      profiles = dionysus.link_profiles
+    self.profiles = profiles
+    self.debug = debug
+    if quick:
+      self.latencies = QUICK_LATENCIES
+      self.chunk_sizes = QUICK_CHUNK_SIZES
+      self.read_sizes = QUICK_READ_SIZES
+    else:
+      self.latencies = LATENCIES
+      self.chunk_sizes = CHUNK_SIZES
+      self.read_sizes = READ_SIZES
+    self.frequencies = FREQUENCIES
+    self.scratch = scratch
+    self.pattern = None
+
+  def candidates(self):
+    """candidates
+
+    Returns the profiles swept by the tuner
+
+    Args:
+      Nothing
+
+    Returns:
+      list of dictionaries of settings
+
+    Raises:
+      Nothing
+    """
+    profiles = []
+    for frequency, latency, chunk_size, read_size in itertools.product(
+        self.frequencies, self.latencies, self.chunk_sizes, self.read_sizes):
+      profiles.append(link_profile({"frequency": frequency,
+                                    "latency": latency,
+                                    "write_chunk_size": chunk_size,
+                                    "read_chunk_size": chunk_size,
+                                    "read_size": read_size}))
+    return profiles
+
+  def run_workload(self):
+    """run_workload
+
+    Run the workload once: pings, single register reads, a burst of
+    register reads and a block of memory written and read back, the
+    register reads use the DRT because it is in every image
+
+    The memory is only written at the scratch address, without a scratch
+    address the memory transfers are left out
+
+    Args:
+      Nothing
+
+    Returns:
+      Number of words that did not read back correctly
+
+    Raises:
+      OlympusCommError: Error in communication
+    """
+    d = self.dionysus
+    #the header of the DRT
+    expected = [int(line, 16) for line in d.drt_manager.drt_lines[:8]]
+    mismatches = 0
+
+    d.ping()
+    for i in range(len(expected)):
+      if d.read_register(0, i) != expected[i]:
+        mismatches += 1
+
+    requests = []
+    for i in range(self.register_reads):
+      requests.append(d.queue_read(0, i % len(expected)))
+    d.flush_queue()
+    for i in range(len(requests)):
+      word = bytes_to_words(requests[i].result())[0]
+      if word != expected[i % len(expected)]:
+        mismatches += 1
+
+    self._prepare_pattern()
+    words = len(self.pattern) / 4
+    if words > 0:
+      d.write_memory(self.scratch, self.pattern)
+      data = d.read_memory(self.scratch, words)
+      if data != self.pattern:
+        for i in range(0, len(self.pattern), 4):
+          if data[i: i + 4] != self.pattern[i: i + 4]:
+            mismatches += 1
+    return mismatches
+
+  def _prepare_pattern(self):
+    """generate the data written to the memory outside of the timed runs"""
+    words = 0
+    if self.scratch is not None:
+      words = min(self.memory_words,
+                  self.dionysus.get_total_memory_size() - self.scratch)
+      words = max(words, 0)
+    if self.pattern is None or len(self.pattern) != words * 4:
+      self.pattern = Array('B', os.urandom(words * 4))
+
+  def evaluate(self, profile, repeat = None):
+    """evaluate
+
+    Apply a profile and time the workload, a profile the port can not be
+    configured with is recorded as unstable
+
+    Args:
+      profile: dictionary of settings
+      repeat: number of times to run the workload, if not specified
+        the repeat attribute is used
+
+    Returns:
+      dictionary:
+        "profile": the settings
+        "stable": True if every run completed without an error, a desync
+          or bad data
+        "runs", "errors", "mismatches", "desyncs", "purges"
+        "time": median time of one run in seconds (None if no run completed)
+
+    Raises:
+      Nothing
+    """
+    if repeat is None:
+      repeat = self.repeat
+    d = self.dionysus
+    errors = 0
+    mismatches = 0
+    times = []
+    self._prepare_pattern()
+    desyncs = d.get_desync_count()
+    purges = d.get_purge_count()
+    try:
+      d.apply_link_profile(profile)
+    except Exception, err:
+      if self.debug:
+        print "link_tuner: unsupported setting: %s" % str(err)
+      errors += 1
+      repeat = 0
+    for i in range(repeat):
+      start = time.time()
+      try:
+        mismatches += self.run_workload()
+      except (OlympusCommError, IOError, OSError), err:
+        if self.debug:
+          print "link_tuner: %s" % str(err)
+        errors += 1
+        try:
+          d._purge()
+        except Exception, err:
+          if self.debug:
+            print "link_tuner: purge failed: %s" % str(err)
+        continue
+      times.append(time.time() - start)
+
+    desyncs = d.get_desync_count() - desyncs
+    purges = d.get_purge_count() - purges
+    median = None
+    if len(times) > 0:
+      times.sort()
+      median = times[len(times) / 2]
+    result = {"profile": profile,
+              "stable": errors == 0 and mismatches == 0 and desyncs == 0,
+              "runs": repeat,
+              "errors": errors,
+              "mismatches": mismatches,
+              "desyncs": desyncs,
+              "purges": purges,
+              "time": median}
+    if self.debug:
+      print "link_tuner: %s" % format_result(result)
+    return result
+
+  def tune(self, save = True):
+    """tune
+
+    Sweep the settings, the fastest stable setting that also passes the
+    stability check is applied and saved as the profile of the board
+
+    When no setting is stable, or the sweep is interrupted by an exception,
+    the settings the link had before the sweep are restored and nothing is
+    saved
+
+    Args:
+      save: save the selected profile
+
+    Returns:
+      Tuple of (stability check of the selected profile, list of the results
+      of every setting)
+      The stability check is None if no setting was stable
+
+    Raises:
+      Exception: the original settings could not be restored
+    """
+    d = self.dionysus
+    original = d.get_link_profile()
+    timeout = d.read_timeout
+    d.read_timeout = self.timeout
+    try:
+      results = []
+      for profile in self.candidates():
+        results.append(self.evaluate(profile))
+
+      stable = [r for r in results if r["stable"]]
+      stable.sort(key = lambda r: r["time"])
+      selected = None
+      for result in stable:
+        check = self.evaluate(result["profile"], self.stability_repeat)
+        if check["stable"]:
+          selected = check
+          break
+    except:
+      #do not leave the link in the setting that was being tried
+      exc_info = sys.exc_info()
+      try:
+        d.apply_link_profile(original)
+      except Exception:
+        pass
+      raise exc_info[0], exc_info[1], exc_info[2]
+    finally:
+      d.read_timeout = timeout
+
+    if selected is None:
+      d.apply_link_profile(original)
+      return (None, results)
+
+    if save and self.profiles is not None:
+      identity = d.get_board_identity()
+      if identity is not None:
+        stability = dict(selected)
+        del stability["profile"]
+        self.profiles.store(identity, selected["profile"], stability)
+    return (selected, results)
+
+
+def format_result(result):
+  """format_result
+
+  Returns one line describing the result of a setting
+
+  Args:
+    result: dictionary returned by LinkTuner.evaluate
+
+  Returns:
+    string
+
+  Raises:
+    Nothing
+  """
+  profile = result["profile"]
+  line = "latency: %2d ms write: 0x%05X read: 0x%05X framer: 0x%05X " % (
+          profile["latency"],
+          profile["write_chunk_size"],
+          profile["read_chunk_size"],
+          profile["read_size"])
+  if result["time"] is None:
+    line += "      -    "
+  else:
+    line += "%8.2f ms " % (result["time"] * 1000.0)
+  if result["stable"]:
+    return line + "stable"
+  return line + "UNSTABLE (errors: %d mismatches: %d desyncs: %d)" % (
+          result["errors"], result["mismatches"], result["desyncs"])
+
+
+def main(argv):
+  parser = argparse.ArgumentParser(description = "Tune the FTDI link of a Dionysus board")
+  parser.add_argument("-e", "--emulate", action = "store_true",
+                      help = "tune an emulated board (only the framer read size has an effect)")
+  parser.add_argument("-q", "--quick", action = "store_true",
+                      help = "sweep fewer settings")
+  parser.add_argument("-r", "--repeat", type = int, default = LinkTuner.repeat,
+                      help = "number of times the workload is run for each setting")
+  parser.add_argument("-s", "--stability", type = int, default = LinkTuner.stability_repeat,
+                      help = "number of times the workload is run to check the selected setting")
+  parser.add_argument("-p", "--profiles", default = DEFAULT_PROFILES_PATH,
+                      help = "JSON file the profiles are saved in")
+  parser.add_argument("--scratch", type = lambda x: int(x, 0), default = None,
+                      help = "address (32-bit words) of board memory the workload may overwrite")
+  parser.add_argument("--allow-memory-clobber", action = "store_true",
+                      help = "let the workload overwrite the start of the board memory "
+                             "(without this or --scratch only register operations are timed)")
+  parser.add_argument("-n", "--dry-run", action = "store_true",
+                      help = "do not save the selected profile")
+  parser.add_argument("--show", action = "store_true",
+                      help = "print the saved profile of the board and exit")
+  parser.add_argument("-d", "--debug", action = "store_true",
+                      help = "print out debug messages")
+  args = parser.parse_args(argv)
+
+  profiles = LinkProfiles(args.profiles)
+  scratch = args.scratch
+  if scratch is None and (args.allow_memory_clobber or args.emulate):
+    scratch = 0
+  if args.emulate:
+    from userland.emulator.board import emulated_dionysus
+    dionysus = emulated_dionysus(debug = args.debug)
+    dionysus.board_identity = "Dionysus:emulated"
+    dionysus.link_profiles = profiles
+  else:
+    from userland.dionysus.dionysus import Dionysus
+    dionysus = Dionysus(debug = args.debug, link_profiles = profiles)
+
+  identity = dionysus.get_board_identity()
+  if args.show:
+    print json.dumps(profiles.get_entry(identity), indent = 2, sort_keys = True)
+    return 0
+
+  dionysus.read_drt()
+  tuner = LinkTuner(dionysus, profiles, quick = args.quick, debug = args.debug,
+                    scratch = scratch)
+  tuner.repeat = args.repeat
+  tuner.stability_repeat = args.stability
+  print "Tuning %s (%d settings)" % (identity, len(tuner.candidates()))
+  if scratch is None:
+    print "No scratch memory given, only register operations are timed"
+  selected, results = tuner.tune(save = not args.dry_run)
+  for result in results:
+    print format_result(result)
+
+  if selected is None:
+    print "No stable setting found, the link settings were not changed"
+    return 1
+  print "Selected: %s" % format_result(selected)
+  if not args.dry_run:
+    print "Saved to %s" % profiles.path
+  return 0
+
+if __name__ == "__main__":
+  sys.exit(main(sys.argv[1:]))
@@ -477,10 +477,10 @@ class I2C:
     """
     self.print_control(self.get_control())
     #send the write command / i2c identification
-    self.o.write_register(self.dev_id, TRANSMIT, 0xFF)
-    self.o.write_register(self.dev_id, COMMAND, COMMAND_WRITE | COMMAND_STOP)
-    self.o.write_register(self.dev_id, TRANSMIT, 0xFF)
-    self.o.write_register(self.dev_id, COMMAND, COMMAND_WRITE | COMMAND_STOP)
+    self.o.write_registers([(self.dev_id, TRANSMIT, 0xFF),
+                            (self.dev_id, COMMAND, COMMAND_WRITE | COMMAND_STOP),
+                            (self.dev_id, TRANSMIT, 0xFF),
+                            (self.dev_id, COMMAND, COMMAND_WRITE | COMMAND_STOP)])
  
     time.sleep(.1)
 
@@ -510,14 +510,12 @@ class I2C:
     self.enable_interrupt(True)
 
     #send the write command / i2c identification
-    self.o.write_register(self.dev_id, TRANSMIT, write_command)
-
-    
     command = COMMAND_START | COMMAND_WRITE
     if self.debug:
       self.print_command(command)
     #send the command to the I2C command register to initiate a transfer
-    self.o.write_register(self.dev_id, COMMAND, command)
+    self.o.write_registers([(self.dev_id, TRANSMIT, write_command),
+                            (self.dev_id, COMMAND, command)])
 
     #wait 1 second for interrupt
     if self.o.wait_for_interrupts(wait_time = 1):
@@ -544,8 +542,8 @@ class I2C:
         if self.debug:
           print "Writing %d" % count
         data = i2c_data[count]
-        self.o.write_register(self.dev_id, TRANSMIT, data)
-        self.o.write_register(self.dev_id, COMMAND, COMMAND_WRITE)
+        self.o.write_registers([(self.dev_id, TRANSMIT, data),
+                                (self.dev_id, COMMAND, COMMAND_WRITE)])
         if self.o.wait_for_interrupts(wait_time = 1):
           if self.debug:
             print "got interrupt for data"
@@ -561,8 +559,8 @@ class I2C:
     #send the last peice of data 
     data = i2c_data[count]
 
-    self.o.write_register(self.dev_id, TRANSMIT, data)
-    self.o.write_register(self.dev_id, COMMAND, COMMAND_WRITE | COMMAND_STOP)
+    self.o.write_registers([(self.dev_id, TRANSMIT, data),
+                            (self.dev_id, COMMAND, COMMAND_WRITE | COMMAND_STOP)])
     if self.o.wait_for_interrupts(wait_time = 1):
       if self.debug:
         print "got interrupt for the last byte"
@@ -605,14 +603,12 @@ class I2C:
     self.enable_interrupt(True)
 
     #send the write command / i2c identification
-    self.o.write_register(self.dev_id, TRANSMIT, read_command)
-
-    
     command = COMMAND_START | COMMAND_WRITE
     if self.debug:
       self.print_command(command)
     #send the command to the I2C command register to initiate a transfer
-    self.o.write_register(self.dev_id, COMMAND, command)
+    self.o.write_registers([(self.dev_id, TRANSMIT, read_command),
+                            (self.dev_id, COMMAND, command)])
 
     #wait 1 second for interrupt
     if self.o.wait_for_interrupts(wait_time = 1):
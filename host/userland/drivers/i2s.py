@@ -578,8 +578,8 @@ class I2S:
         block_size > memory_1_base - memory_0_base
         block_size + memory_1_base > memory_size
     """
-    memory_0_base = self.get_memory_base(0)
-    memory_1_base = self.get_memory_base(1)
+    memory_0_base, memory_1_base = self.o.read_registers([(self.dev_id, MEM_0_BASE),
+                                                          (self.dev_id, MEM_1_BASE)])
     max_size = memory_1_base - memory_0_base
     if block_size == -1:
       block_size = max_size
@@ -595,8 +595,8 @@ class I2S:
 
     #clear the current size in the device
     self.enable_i2s(False)
-    self.set_memory_size(0, 0)
-    self.set_memory_size(1, 0)
+    self.o.write_registers([(self.dev_id, MEM_0_SIZE, 0),
+                            (self.dev_id, MEM_1_SIZE, 0)])
 
     self.enable_interrupt(False)
     position = 0
@@ -523,7 +523,8 @@ class LogicAnalyzer:
       Nothing
 
     Return:
-      Array of 32-bit unsigned values
+      Array of 32-bit unsigned values (numpy uint32 array if NumPy is
+      installed)
 
     Raises:
       OlympusCommError: Error in communication
@@ -538,15 +539,8 @@ class LogicAnalyzer:
     
     print "Reading %d Vaues" % count
 
-    data_in = self.o.read(self.dev_id, DATA, count)
-    #change this to 32-bit value
-    data_out = Array('L')
-    print "Data in Lenght: %d" % len(data_in)
+    data_out = self.o.read_words(self.dev_id, DATA, count)
     print "Data length: %d" % len(data_out)
-
-    for i in range(0, len(data_in), 4):
-      data_out.append (data_in[i] << 24 | data_in[i + 1] << 16 | data_in[i + 2] << 8 | data_in[i + 3])
-
     return data_out
 
   def wait_for_capture(self, timeout):
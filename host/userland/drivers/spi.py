@@ -37,6 +37,8 @@ import time
 from array import array as Array
 
 from userland import olympus
+from userland.olympus import REGISTER_CACHEABLE
+from userland.olympus import REGISTER_VOLATILE
 
 #Register Constants
 CONTROL             = 0
@@ -61,6 +63,18 @@ CONTROL_LSB_ENABLE        = 1 << 11
 CONTROL_INTERRUPT_ENABLE  = 1 << 12
 CONTROL_AUTO_SLAVE_SEL    = 1 << 13
 
+#registers that only change when the host writes them
+CACHEABLE_REGISTERS = [CLOCK_RATE, CLOCK_DIVIDER, SLAVE_SELECT]
+
+
+def _character_length(control):
+  """decode the character length (1 - 128) of the control register"""
+  char_len = control & 0x07F
+  if char_len == 0x00:
+    char_len = 0x0080
+  return char_len
+
+
 class SPIError(Exception):
   """SPIError
     
@@ -85,9 +99,37 @@ class SPI:
     self.o = olympus
     self.debug = debug
     print "device id: %d" % dev_id
+    self._set_register_modes()
+
+  def _set_register_modes(self):
+    """the clock and slave select registers only change when they are
+    written, keep a shadow copy of them instead of reading them back every
+    time"""
+    for register in CACHEABLE_REGISTERS:
+      self.o.set_register_mode(self.dev_id, register, REGISTER_CACHEABLE)
 
   def set_dev_id(self, dev_id):
+    """set_dev_id
+
+    Use another SPI core, the shadow copies of the registers of the previous
+    core are dropped and its registers are read from the device again
+
+    Args:
+      dev_id: Device identification number, found in the DRT
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    if dev_id == self.dev_id:
+      return
+    for register in CACHEABLE_REGISTERS:
+      self.o.set_register_mode(self.dev_id, register, REGISTER_VOLATILE)
+    self.o.invalidate_registers(self.dev_id)
     self.dev_id = dev_id
+    self._set_register_modes()
 
   def get_control(self):
     """get_control
@@ -103,10 +145,7 @@ class SPI:
     Raises:
       OlympusCommError: Error in communication
     """
-    control_array = self.o.read(self.dev_id, CONTROL, 1) 
-    control = control_array[0] << 24 | control_array[1] << 16 | control_array[2] << 8 | control_array[3]
-
-    return control
+    return self.o.read_register(self.dev_id, CONTROL)
 
   def set_control(self, control):
     """set_control
@@ -122,12 +161,7 @@ class SPI:
     Raises:
       OlympusCommError: Error in communication
     """
-    control_array = Array('B', [0x00, 0x00, 0x00, 0x00])
-    control_array[0]  = (control >> 24) & 0xFF
-    control_array[1]  = (control >> 16) & 0xFF
-    control_array[2]  = (control >> 8) & 0xFF
-    control_array[3]  = (control) & 0xFF
-    self.o.write(self.dev_id, CONTROL, control_array)
+    self.o.write_register(self.dev_id, CONTROL, control)
 
 
 
@@ -153,12 +187,7 @@ class SPI:
     if self.debug:
       print "get character length"
 
-    control = self.get_control()
-    char_len = control & 0x07F
-    if char_len == 0x00:
-      char_len = 0x0080
-
-    return char_len
+    return _character_length(self.get_control())
 
   def set_character_length(self, character_length):
     """set_character_length
@@ -474,9 +503,7 @@ class SPI:
     if self.debug:
       print "get clock rate"
 
-    clock_rate_array = self.o.read(self.dev_id, CLOCK_RATE, 1)
-    clock_rate = clock_rate_array[0] << 24 | clock_rate_array[1] << 16 | clock_rate_array[2] << 8 | clock_rate_array[0]
-    return clock_rate
+    return self.o.read_register(self.dev_id, CLOCK_RATE)
 
   def get_clock_divider(self):
     """get_clock_divider
@@ -495,11 +522,7 @@ class SPI:
     if self.debug:
       print "get clock divider"
 
-    clock_divider_array = self.o.read(self.dev_id, CLOCK_DIVIDER, 1)
-    #print "In clock divider Array: %s" % str(clock_divider_array)
-    clock_divider = clock_divider_array[0] << 24 | clock_divider_array[1] << 16 | clock_divider_array[2] << 8 | clock_divider_array[3]
-    #print "In clock divider: %d" % clock_divider
-    return clock_divider
+    return self.o.read_register(self.dev_id, CLOCK_DIVIDER)
 
 
 
@@ -520,14 +543,9 @@ class SPI:
     if self.debug:
       print "set clock divider"
 
-    clock_divider_array = Array('B', [0x00, 0x00, 0x00, 0x00])
-    clock_divider_array[0] = (clock_divider >> 24) & 0xFF
-    clock_divider_array[1] = (clock_divider >> 16) & 0xFF
-    clock_divider_array[2] = (clock_divider >> 8) & 0xFF
-    clock_divider_array[3] = (clock_divider) & 0xFF
     if self.debug:
-      print "Divider out value: %s" % str(clock_divider_array)
-    self.o.write(self.dev_id, CLOCK_DIVIDER, clock_divider_array)
+      print "Divider out value: 0x%08X" % clock_divider
+    self.o.write_register(self.dev_id, CLOCK_DIVIDER, clock_divider)
 
 
   def set_spi_clock_rate(self, spi_clock_rate):
@@ -645,9 +663,7 @@ class SPI:
     if self.debug:
       print "get slave select raw"
 
-    slave_select_array = self.o.read(self.dev_id, SLAVE_SELECT, 1)
-    slave_select = slave_select_array[0] << 24 | slave_select_array[1] << 16 | slave_select_array[2] << 8| slave_select_array[3]
-    return slave_select
+    return self.o.read_register(self.dev_id, SLAVE_SELECT)
 
   def set_slave_select_raw(self, slave_select):
     """set_slave_select_raw
@@ -667,12 +683,7 @@ class SPI:
     if self.debug:
       print "set slave select raw %X" % slave_select
 
-    slave_select_array = Array('B', [0x00, 0x00, 0x00, 0x00])
-    slave_select_array[0] = (slave_select >> 24) & 0xFF
-    slave_select_array[1] = (slave_select >> 16) & 0xFF
-    slave_select_array[2] = (slave_select >> 8) & 0xFF
-    slave_select_array[3] = (slave_select) & 0xFF
-    self.o.write(self.dev_id, SLAVE_SELECT, slave_select_array)
+    self.o.write_register(self.dev_id, SLAVE_SELECT, slave_select)
 
 
   def set_spi_slave_select(self, slave_bit, enable):
@@ -751,27 +762,17 @@ class SPI:
     if self.debug:
       print "get read data"
 
-    #first get the length of the character from the slave device
-    char_len = (self.get_character_length() / 8)
-      #XXX: There can be a local shadow copy here so I don't have to keep
-      #XXX: (cont) reading from the control register
-
-
-
-    #read all the read data
-    read_array0 = self.o.read(self.dev_id, READ_DATA0, 1) 
-    read_array1 = self.o.read(self.dev_id, READ_DATA1, 1) 
-    read_array2 = self.o.read(self.dev_id, READ_DATA2, 1) 
-    read_array3 = self.o.read(self.dev_id, READ_DATA3, 1) 
+    #read all the read data in one burst
+    read_words = self.o.read_registers([(self.dev_id, READ_DATA0),
+                                        (self.dev_id, READ_DATA1),
+                                        (self.dev_id, READ_DATA2),
+                                        (self.dev_id, READ_DATA3)])
     if self.debug:
-      print "read data:\n\t%s\n\t%s\n\t%s\n\t%s" % (str(read_array0), str(read_array1), str(read_array2), str(read_array3))
+      print "read data:\n\t0x%08X\n\t0x%08X\n\t0x%08X\n\t0x%08X" % tuple(read_words)
     #only read the data that is relavent to
     #Example Character length == 8, then only read the 8 bits and return that value to the caller
-    read_data = Array('B')
-    read_data.extend(read_array3)
-    read_data.extend(read_array2)
-    read_data.extend(read_array1)
-    read_data.extend(read_array0)
+    read_words.reverse()
+    read_data = olympus.words_to_bytes(read_words)
 
     if self.debug:
       print "Assembled read data: %s" % str(read_data)
@@ -804,14 +805,17 @@ class SPI:
 
     #this write data is in the form of an array and should be the correct
     #length that corresponds to the character length
-    char_len = (self.get_character_length() / 8)
+    #the character length and the bit order are both in the control register,
+    #only read it once
+    control = self.get_control()
+    char_len = _character_length(control) / 8
     if char_len == 0:
       char_len = 1
   
-    if self.is_lsb_enabled():
+    if control & CONTROL_LSB_ENABLE:
       if self.debug:
         print "LSB Enabled"
-      while char_len > write_data:
+      while char_len > len(write_data):
         write_data.insert(0, 0xFF)
 
       while (len(write_data) % 4) != 0:
@@ -831,37 +835,19 @@ class SPI:
     if self.debug:  
       print "write data: %s" % str(write_data)
 
-    if len(write_data) == 4:
-      self.o.write(self.dev_id, WRITE_DATA0, write_data[0:4])
-      if self.debug:
-        print "R0: %s" % str(write_data[0:4])
-    elif len(write_data) == 8:
-      self.o.write(self.dev_id, WRITE_DATA0, write_data[4:8])
-      self.o.write(self.dev_id, WRITE_DATA1, write_data[0:4])
-      if self.debug:
-        print "R0: %s" % str(write_data[4:8])
-        print "R1: %s" % str(write_data[0:4])
-    elif len(write_data) == 12:
-      self.o.write(self.dev_id, WRITE_DATA0, write_data[8:12])
-      self.o.write(self.dev_id, WRITE_DATA1, write_data[4:8])
-      self.o.write(self.dev_id, WRITE_DATA2, write_data[0:4])
-      if self.debug:
-        print "R0: %s" % str(write_data[8:12])
-        print "R1: %s" % str(write_data[4:8])
-        print "R2: %s" % str(write_data[0:4])
-    elif len(write_data) == 16:
-      self.o.write(self.dev_id, WRITE_DATA0, write_data[12:16])
-      self.o.write(self.dev_id, WRITE_DATA0, write_data[8:12])
-      self.o.write(self.dev_id, WRITE_DATA1, write_data[4:8])
-      self.o.write(self.dev_id, WRITE_DATA2, write_data[0:4])
-      if self.debug:
-        print "R0: %s" % str(write_data[12:16])
-        print "R1: %s" % str(write_data[8:12])
-        print "R2: %s" % str(write_data[4:8])
-        print "R3: %s" % str(write_data[0:4])
-    else:
+    if len(write_data) not in [4, 8, 12, 16]:
       raise SPIError("Write data is incorrect length!")
 
+    #the last word goes into WRITE_DATA0, write them all in one burst
+    write_words = list(olympus.bytes_to_words(write_data))
+    write_words.reverse()
+    registers = []
+    for i in range (0, len(write_words)):
+      registers.append((self.dev_id, WRITE_DATA0 + i, write_words[i]))
+      if self.debug:
+        print "R%d: 0x%08X" % (i, write_words[i])
+    self.o.write_registers(registers)
+
 def unit_test(oly, dev_id):
   print "Unit test!"
   spi = SPI(oly, dev_id)
@@ -90,9 +90,7 @@ class UART:
     Raises:
       OlympusCommError: Error in communication
     """
-    control_array = self.o.read(self.dev_id, CONTROL, 1) 
-    control = control_array[0] << 24 | control_array[1] << 16 | control_array[2] << 8 | control_array[3]
-    return control
+    return self.o.read_register(self.dev_id, CONTROL)
 
   def set_control(self, control):
     """set_control
@@ -135,9 +133,7 @@ class UART:
     Raises:
       OlympusCommError: Error in communication
     """
-    status_array = self.o.read(self.dev_id, STATUS, 1) 
-
-    self.status = status_array[0] << 24 | status_array[1] << 16 | status_array[2] << 8 | status_array[3]
+    self.status = self.o.read_register(self.dev_id, STATUS)
     return self.status
 
 
@@ -412,9 +408,9 @@ class UART:
     if self.debug:
       print "getting the bytes to read"
 
-    in_data = self.o.read(self.dev_id, READ_COUNT, 1)
-    print "in_data: " + str(in_data)
-    return in_data[0] << 24 | in_data[1] << 16 | in_data[2] << 8 | in_data[3]
+    read_count = self.o.read_register(self.dev_id, READ_COUNT)
+    print "read count: %d" % read_count
+    return read_count
 
   def read_all_data(self):
     """read_all_data
@@ -456,9 +452,9 @@ class UART:
     if self.debug:
       print "getting available space in the write buffer"
 
-    in_data = self.o.read(self.dev_id, WRITE_AVAILABLE, 1)
-    print "write available: " + str(in_data)
-    return in_data[0] << 24 | in_data[1] << 16 | in_data[2] << 8 | in_data[3]
+    write_available = self.o.read_register(self.dev_id, WRITE_AVAILABLE)
+    print "write available: %d" % write_available
+    return write_available
 
   def get_baudrate(self):
     """get_baudrate
@@ -484,11 +480,9 @@ class UART:
     if self.debug:
       print "getting baurdrate"
 
-    prescaler_array = self.o.read(self.dev_id, PRESCALER, 1)
-    prescaler = prescaler_array[0] << 24 | prescaler_array[1] << 16 | prescaler_array[2] << 8 | prescaler_array[3]
+    prescaler = self.o.read_register(self.dev_id, PRESCALER)
     print "prescaler: %d" % prescaler
-    clock_divide_array = self.o.read(self.dev_id, CLOCK_DIVIDER, 1)
-    clock_divide = clock_divide_array[0] << 24 | clock_divide_array[1] << 16 | clock_divide_array[2] << 8 | clock_divide_array[3]
+    clock_divide = self.o.read_register(self.dev_id, CLOCK_DIVIDER)
     print "clock divide: %d" % clock_divide
     
     if prescaler > 0:
@@ -520,8 +514,7 @@ class UART:
     if self.debug:
       print "setting baudrate"
 
-    prescaler_array = self.o.read(self.dev_id, PRESCALER, 1)
-    prescaler = prescaler_array[0] << 24 | prescaler_array[1] << 16 | prescaler_array[2] << 8 | prescaler_array[3]
+    prescaler = self.o.read_register(self.dev_id, PRESCALER)
 
     clock_divide = prescaler / baudrate
 
@@ -0,0 +1,281 @@
+#Distributed under the MIT licesnse.
+#Copyright (c) 2011 Dave McCoy (dave.mccoy@cospandesign.com)
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy of
+#this software and associated documentation files (the "Software"), to deal in
+#the Software without restriction, including without limitation the rights to
+#use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+#of the Software, and to permit persons to whom the Software is furnished to do
+#so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+""" drt_cache
+
+On disk cache of the Device ROM Table (DRT) of the boards
+
+Every host session reads the DRT, the cache keeps the DRT of each board
+(keyed by the USB IDs and serial number of the board) with a fingerprint of
+the DRT header. The image builder (ibuilder gen_drt) writes a CRC32 of the
+device entries in word 3 of the header, so the header (version and ID word,
+number of devices and the hash) changes whenever a device entry changes. For
+a board that is in the cache only the header is read, when its fingerprint
+matches the cached DRT is used and the devices are not read
+
+Images built before the hash was added have a 0 in word 3, the header can not
+tell that their devices changed so their DRT is always read from the board
+and is not cached
+
+The cache is a JSON file, ~/.olympus/drt_cache.json by default, the location
+can be changed with the OLYMPUS_DRT_CACHE environment variable
+
+"""
+
+__author__ = 'dave.mccoy@cospandesign.com (Dave McCoy)'
+
+import os
+import json
+import struct
+import hashlib
+import binascii
+from array import array as Array
+
+DEFAULT_CACHE_PATH = os.environ.get("OLYMPUS_DRT_CACHE",
+                                    os.path.join(os.path.expanduser("~"),
+                                                 ".olympus",
+                                                 "drt_cache.json"))
+
+#number of 32-bit words in the header of the DRT (version, ID word, number
+#of devices and the hash of the devices)
+DRT_HEADER_WORDS = 8
+#header word holding the CRC32 of the device entries
+DRT_HASH_WORD = 3
+
+
+def table_hash(words):
+  """table_hash
+
+  Returns the hash of the device entries the image builder writes in the
+  DRT header
+
+  Args:
+    words: list of the 32-bit words of the device entries
+
+  Returns:
+    32-bit hash, never 0
+
+  Raises:
+    Nothing
+  """
+  data = struct.pack(">%dI" % len(words), *words)
+  value = binascii.crc32(data) & 0xFFFFFFFF
+  if value == 0:
+    value = 1
+  return value
+
+
+def get_table_hash(header):
+  """get_table_hash
+
+  Returns the hash of the device entries stored in a DRT header
+
+  Args:
+    header: Array of the bytes of the DRT header
+
+  Returns:
+    32-bit hash, 0 if the image does not have one
+
+  Raises:
+    Nothing
+  """
+  offset = DRT_HASH_WORD * 4
+  if len(header) < offset + 4:
+    return 0
+  return struct.unpack(">I", Array('B', header[offset: offset + 4]).tostring())[0]
+
+
+def check_table_hash(drt):
+  """check_table_hash
+
+  Check the hash in the header of a DRT against its devices
+
+  Args:
+    drt: Array of the bytes of the whole DRT (the header and all the devices)
+
+  Returns:
+    True: the hash matches the devices
+    False: the image does not have a hash or the devices do not match it
+
+  Raises:
+    Nothing
+  """
+  raw = Array('B', drt[DRT_HEADER_WORDS * 4:]).tostring()
+  words = struct.unpack(">%dI" % (len(raw) / 4), raw[:len(raw) & ~0x03])
+  expected = get_table_hash(drt)
+  return expected != 0 and table_hash(words) == expected
+
+
+def fingerprint(header):
+  """fingerprint
+
+  Returns the fingerprint of a DRT, only the header is needed because it
+  holds the hash of the devices
+
+  Args:
+    header: Array of the bytes of the DRT header (extra bytes are ignored)
+
+  Returns:
+    string
+
+  Raises:
+    Nothing
+  """
+  header = Array('B', header[:DRT_HEADER_WORDS * 4])
+  return hashlib.sha1(header.tostring()).hexdigest()[:16]
+
+
+class DRTCache:
+  """DRTCache
+
+  Reads and writes the cache file, errors accessing the file are not fatal,
+  the DRT is then read from the board
+  """
+
+  def __init__(self, path = DEFAULT_CACHE_PATH):
+    self.path = path
+
+  def load(self):
+    """load
+
+    Read the cache file, pass the entries to lookup and store to read the
+    file once
+
+    Args:
+      Nothing
+
+    Returns:
+      dictionary of the cached boards
+
+    Raises:
+      Nothing
+    """
+    try:
+      f = open(self.path, "r")
+      try:
+        entries = json.load(f)
+      finally:
+        f.close()
+    except (IOError, OSError, ValueError):
+      return {}
+    if not isinstance(entries, dict):
+      return {}
+    return entries
+
+  def lookup(self, identity, image_fingerprint, entries = None):
+    """lookup
+
+    Find the DRT of a board
+
+    Args:
+      identity: string identifying the board
+      image_fingerprint: fingerprint of the DRT header read from the board
+      entries: cache entries returned by load, if not specified the file
+        is read
+
+    Returns:
+      Array of the bytes of the DRT
+      None if the board is not cached or the image changed
+
+    Raises:
+      Nothing
+    """
+    if entries is None:
+      entries = self.load()
+    entry = entries.get(identity)
+    if not isinstance(entry, dict) or entry.get("fingerprint") != image_fingerprint:
+      return None
+    try:
+      return Array('B', binascii.unhexlify(entry["drt"]))
+    except (KeyError, TypeError):
+      return None
+
+  def store(self, identity, image_fingerprint, drt, entries = None):
+    """store
+
+    Save the DRT of a board
+
+    Args:
+      identity: string identifying the board
+      image_fingerprint: fingerprint of the DRT header
+      drt: Array of the bytes of the DRT
+      entries: cache entries returned by load, updated and written back,
+        if not specified the file is read
+
+    Returns:
+      True: the DRT was saved
+      False: the cache could not be written
+
+    Raises:
+      Nothing
+    """
+    if entries is None:
+      entries = self.load()
+    entries[identity] = {"fingerprint": image_fingerprint,
+                         "drt": binascii.hexlify(Array('B', drt).tostring())}
+    return self._save(entries)
+
+  def invalidate(self, identity = None):
+    """invalidate
+
+    Drop the DRT of a board (or of all the boards)
+
+    Args:
+      identity: string identifying the board, None for all boards
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    if identity is None:
+      self._save({})
+      return
+    entries = self.load()
+    if identity in entries:
+      del entries[identity]
+      self._save(entries)
+
+  def _save(self, entries):
+    """_save
+
+    Replace the cache file atomically so processes that share the cache
+    never see a partial file
+
+    Returns:
+      True: the file was written
+      False: the cache could not be written
+    """
+    temp_path = "%s.%d.tmp" % (self.path, os.getpid())
+    try:
+      directory = os.path.dirname(self.path)
+      if len(directory) > 0 and not os.path.exists(directory):
+        os.makedirs(directory)
+      f = open(temp_path, "w")
+      try:
+        json.dump(entries, f)
+      finally:
+        f.close()
+      os.rename(temp_path, self.path)
+    except (IOError, OSError):
+      return False
+    return True
@@ -0,0 +1,502 @@
+#Distributed under the MIT licesnse.
+#Copyright (c) 2011 Dave McCoy (dave.mccoy@cospandesign.com)
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy of
+#this software and associated documentation files (the "Software"), to deal in
+#the Software without restriction, including without limitation the rights to
+#use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+#of the Software, and to permit persons to whom the Software is furnished to do
+#so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+""" board
+
+In-process model of an Olympus image behind the Dionysus FTDI interface
+
+EmulatedBoard has the same read_data/write_data/purge_buffers interface as
+the pyftdi device Dionysus opens, the commands written to it are decoded and
+executed on the slave models (slaves.py) and the responses are queued to be
+read back, the time for the responses to arrive is set with a latency and a
+bandwidth so the host code can be measured without a board
+
+  from userland.emulator.board import EmulatedBoard, emulated_dionysus
+
+  board = EmulatedBoard(latency = 0.0005, bandwidth = 20000000)
+  oly = emulated_dionysus(board)
+  oly.ping()
+
+The peripherals are placed on the bus in order starting at device 1 (device 0
+is the DRT), the memories are placed back to back on the memory bus starting
+at address 0
+
+Not emulated: the core dump command is ignored
+
+"""
+
+__author__ = 'dave.mccoy@cospandesign.com (Dave McCoy)'
+
+import time
+import struct
+import threading
+from collections import deque
+
+from userland import codec
+from userland.emulator.slaves import EmulatedSlave
+from userland.emulator.slaves import EmulatedMemory
+from userland.emulator.slaves import EmulatedGPIO
+from userland.emulator.slaves import EmulatedUART
+from userland.emulator.slaves import EmulatedI2C
+from userland.emulator.slaves import EmulatedSPI
+from userland.emulator.slaves import EmulatedI2S
+from userland.emulator.slaves import EmulatedLogicAnalyzer
+from userland.drt_cache import table_hash
+from userland.drt_cache import DRT_HASH_WORD
+
+#first word of the DRT: version (cbuilder/drt/drt.json) and identification
+DRT_VERSION           = 0x0005
+DRT_ID_WORD           = 0xC594
+#number of words in the DRT header and in each device entry
+DRT_HEADER_WORDS      = 8
+DRT_DEVICE_WORDS      = 8
+
+
+def default_slaves():
+  """default_slaves
+
+  Returns one of each of the peripherals that have a model
+
+  Args:
+    Nothing
+
+  Returns:
+    list of slave models
+
+  Raises:
+    Nothing
+  """
+  return [EmulatedGPIO(),
+          EmulatedUART(),
+          EmulatedI2C(),
+          EmulatedSPI(),
+          EmulatedI2S(),
+          EmulatedLogicAnalyzer()]
+
+
+class EmulatedDRT(EmulatedSlave):
+  """EmulatedDRT
+
+  Read only Device ROM Table describing the peripherals and memories of the
+  board
+  """
+
+  def __init__(self, slaves, memories):
+    self.words = [(DRT_VERSION << 16) | DRT_ID_WORD,
+                  len(slaves) + len(memories),
+                  0, 0, 0, 0, 0, 0]
+    for i in range(len(slaves)):
+      self.words += self._entry(slaves[i], (i + 1) << 24)
+    for memory in memories:
+      self.words += self._entry(memory, memory.offset)
+    #the image builder writes the hash of the devices in the header
+    self.words[DRT_HASH_WORD] = table_hash(self.words[DRT_HEADER_WORDS:])
+    self.size = len(self.words)
+    EmulatedSlave.__init__(self)
+
+  def _entry(self, slave, address):
+    return [slave.device_type, slave.flags, address, slave.size, 0, 0, 0, 0]
+
+  def reset(self):
+    self.registers = list(self.words)
+
+  def write(self, address, value):
+    pass
+
+
+class EmulatedBoard:
+  """EmulatedBoard
+
+  Decodes the commands written with write_data and queues the responses that
+  the image would send back to be read with read_data
+  """
+
+  def __init__(self, slaves = None, memories = None, latency = 0.0,
+               bandwidth = None, debug = False):
+    """__init__
+
+    Args:
+      slaves: list of peripheral models (EmulatedSlave), the first one is
+        device 1, if not specified one of each model is created
+      memories: list of EmulatedMemory, if not specified a 4MB memory is
+        created
+      latency: seconds between a command arriving and its response being
+        available
+      bandwidth: bytes per second of the link in each direction, None for
+        an unlimited link
+      debug: print out debug messages
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    if slaves is None:
+      slaves = default_slaves()
+    if memories is None:
+      memories = [EmulatedMemory()]
+
+    self.slaves = slaves
+    self.memories = memories
+    offset = 0
+    for memory in memories:
+      memory.offset = offset
+      offset += memory.size
+    for slave in slaves + memories:
+      slave.board = self
+    self.drt = EmulatedDRT(slaves, memories)
+
+    self.latency = latency
+    self.bandwidth = bandwidth
+    self.debug = debug
+
+    self.lock = threading.Lock()
+    self.in_buffer = bytearray()
+    #(time the data is available, data)
+    self.out_queue = deque()
+    self.out_ready = 0.0
+
+    self.command_count = 0
+    self.bytes_written = 0
+    self.bytes_read = 0
+
+  def open(self, *args, **kwargs):
+    pass
+
+  def close(self):
+    pass
+
+  def purge_buffers(self):
+    """purge_buffers
+
+    Drop the commands that have not been decoded and the responses that have
+    not been read
+
+    Args:
+      Nothing
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    with self.lock:
+      self.in_buffer = bytearray()
+      self.out_queue.clear()
+
+  def write_data(self, data):
+    """write_data
+
+    Send commands to the board, blocks for the time it takes the link to
+    carry the data
+
+    Args:
+      data: string, bytearray or array of the bytes to send
+
+    Returns:
+      number of bytes written
+
+    Raises:
+      Nothing
+    """
+    if self.bandwidth is not None:
+      time.sleep(len(data) / float(self.bandwidth))
+
+    with self.lock:
+      self.bytes_written += len(data)
+      self.in_buffer.extend(data)
+      position = 0
+      while True:
+        used = self._process_command(position)
+        if used == 0:
+          break
+        position += used
+        self._send_interrupts()
+      del self.in_buffer[:position]
+    return len(data)
+
+  def read_data(self, size):
+    """read_data
+
+    Read the responses that have arrived
+
+    Args:
+      size: maximum number of bytes to read
+
+    Returns:
+      string of the bytes that are available (can be empty)
+
+    Raises:
+      Nothing
+    """
+    now = time.time()
+    chunks = []
+    available = 0
+    with self.lock:
+      while len(self.out_queue) > 0 and available < size:
+        ready, data = self.out_queue[0]
+        if ready > now:
+          break
+        if len(data) > size - available:
+          self.out_queue[0] = (ready, data[size - available:])
+          data = data[:size - available]
+        else:
+          self.out_queue.popleft()
+        chunks.append(data)
+        available += len(data)
+      self.bytes_read += available
+    return str(bytearray().join(chunks))
+
+  def interrupt(self, device_id):
+    """interrupt
+
+    Send an interrupt for a device to the host
+
+    Args:
+      device_id: device (bus offset) that is interrupting
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    with self.lock:
+      self._send_interrupt_frame(1 << device_id)
+
+  def read_memory_words(self, address, count):
+    """read_memory_words
+
+    Read from the memory bus
+
+    Args:
+      address: word address on the memory bus
+      count: number of 32-bit words
+
+    Returns:
+      bytearray of big endian words, addresses without a memory read as 0
+
+    Raises:
+      Nothing
+    """
+    data = bytearray()
+    end = address + count
+    while address < end:
+      memory = self._find_memory(address)
+      if memory is None:
+        data.extend(bytearray((end - address) * 4))
+        break
+      length = min(end, memory.offset + memory.size) - address
+      data.extend(memory.read_words(address - memory.offset, length))
+      address += length
+    return data
+
+  def write_memory_words(self, address, data):
+    """write_memory_words
+
+    Write to the memory bus
+
+    Args:
+      address: word address on the memory bus
+      data: buffer of big endian words, writes outside of the memories are
+        dropped
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    position = 0
+    while position < len(data):
+      memory = self._find_memory(address)
+      if memory is None:
+        break
+      length = min(len(data) - position,
+                   (memory.offset + memory.size - address) * 4)
+      memory.write_words(address - memory.offset,
+                         data[position: position + length])
+      position += length
+      address += length / 4
+
+  def _find_memory(self, address):
+    for memory in self.memories:
+      if memory.offset <= address < memory.offset + memory.size:
+        return memory
+    return None
+
+  def _find_slave(self, device_id):
+    if device_id == 0:
+      return self.drt
+    if device_id <= len(self.slaves):
+      return self.slaves[device_id - 1]
+    return None
+
+  def _process_command(self, position):
+    """_process_command
+
+    Execute the command at the position in the input buffer
+
+    Returns:
+      number of bytes used, 0 if the command is not complete
+    """
+    buf = self.in_buffer
+    start = buf.find(chr(codec.ID_BYTE), position)
+    if start < 0:
+      #nothing useful in the buffer
+      return len(buf) - position
+    if start > position:
+      return start - position
+
+    if len(buf) - start < 2:
+      return 0
+    command = buf[start + 1] & ~codec.COMMAND_MEMORY_BUS
+    mem_device = (buf[start + 1] & codec.COMMAND_MEMORY_BUS) > 0
+
+    if command == codec.COMMAND_RESET:
+      if len(buf) - start < len(codec.RESET_PACKET):
+        return 0
+      self.reset()
+      return len(codec.RESET_PACKET)
+
+    if command == codec.COMMAND_CORE_DUMP:
+      if len(buf) - start < len(codec.CORE_DUMP_PACKET):
+        return 0
+      return len(codec.CORE_DUMP_PACKET)
+
+    if len(buf) - start < codec.COMMAND_HEADER.size:
+      return 0
+    id_byte, command_byte, count, address_high, address_low = \
+        codec.COMMAND_HEADER.unpack_from(buffer(buf), start)
+    device_id = count & 0xFF
+    length = count >> 8
+    address = (address_high << 16) | address_low
+    echo = codec.response_address(device_id, address, mem_device)
+
+    if command == codec.COMMAND_PING:
+      self.command_count += 1
+      self._respond(struct.pack(">I", codec.PING_STATUS << 24))
+      return codec.COMMAND_HEADER.size
+
+    if command == codec.COMMAND_WRITE:
+      size = codec.COMMAND_HEADER.size + length * 4
+      if len(buf) - start < size:
+        return 0
+      self.command_count += 1
+      data = buf[start + codec.COMMAND_HEADER.size: start + size]
+      if mem_device:
+        self.write_memory_words(address, data)
+      else:
+        slave = self._find_slave(device_id)
+        if slave is not None:
+          slave.write_words(address, data)
+      last = 0
+      if length > 0:
+        last = struct.unpack_from(">I", buffer(data), len(data) - 4)[0]
+      self._respond(struct.pack(">III",
+                                (codec.WRITE_STATUS << 24) | length,
+                                echo,
+                                last))
+      return size
+
+    if command == codec.COMMAND_READ:
+      self.command_count += 1
+      if mem_device:
+        data = self.read_memory_words(address, length)
+      else:
+        slave = self._find_slave(device_id)
+        if slave is None:
+          data = bytearray(length * 4)
+        else:
+          data = slave.read_words(address, length)
+      self._respond(struct.pack(">II",
+                                (codec.READ_STATUS << 24) | length,
+                                echo) + str(data))
+      return codec.COMMAND_HEADER.size
+
+    if self.debug:
+      print "EmulatedBoard: unknown command: 0x%02X" % command
+    return codec.COMMAND_HEADER.size
+
+  def reset(self):
+    """reset
+
+    Reset all the peripherals (the memories keep their contents)
+
+    Args:
+      Nothing
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    for slave in self.slaves + self.memories:
+      slave.interrupt = False
+      slave.reset()
+
+  def _send_interrupts(self):
+    interrupts = 0
+    for i in range(len(self.slaves)):
+      if self.slaves[i].interrupt:
+        self.slaves[i].interrupt = False
+        interrupts |= 1 << (i + 1)
+    if interrupts:
+      self._send_interrupt_frame(interrupts)
+
+  def _send_interrupt_frame(self, interrupts):
+    self._respond(struct.pack(">II", codec.INTERRUPT_STATUS << 24,
+                              interrupts & 0xFFFFFFFF))
+
+  def _respond(self, rsp):
+    """queue a response, it is available after the latency of the board and
+    the time the link takes to carry it"""
+    data = chr(codec.RESPONSE_ID_BYTE) + rsp
+    ready = time.time() + self.latency
+    if self.bandwidth is not None:
+      ready = max(ready, self.out_ready) + len(data) / float(self.bandwidth)
+    self.out_ready = ready
+    self.out_queue.append((ready, data))
+
+
+def emulated_dionysus(board = None, debug = False):
+  """emulated_dionysus
+
+  Returns a Dionysus that talks to an emulated board
+
+  Args:
+    board: EmulatedBoard, if not specified a board with the default
+      peripherals is created
+    debug: print out debug messages
+
+  Returns:
+    Dionysus
+
+  Raises:
+    Nothing
+  """
+  from userland.dionysus.dionysus import Dionysus
+  if board is None:
+    board = EmulatedBoard(debug = debug)
+  return Dionysus(debug = debug, dev = board)
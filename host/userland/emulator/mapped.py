@@ -0,0 +1,278 @@
+#Distributed under the MIT licesnse.
+#Copyright (c) 2011 Dave McCoy (dave.mccoy@cospandesign.com)
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy of
+#this software and associated documentation files (the "Software"), to deal in
+#the Software without restriction, including without limitation the rights to
+#use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+#of the Software, and to permit persons to whom the Software is furnished to do
+#so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+""" mapped
+
+File backed model of an Olympus image for the memory mapped interface
+(memory_mapped.py)
+
+The image file has the layout of the map, the host maps the same file, the
+registers of the slave models are kept in their windows and the memory bus is
+the file itself
+
+A mapped bus does not tell the image when the host accesses it, update
+applies the registers the host changed to the models and writes the state of
+the models back into the file, reads do not have side effects (a register
+that is cleared on read keeps its value until the model changes it)
+
+"""
+
+__author__ = 'dave.mccoy@cospandesign.com (Dave McCoy)'
+
+import os
+import mmap
+import struct
+import threading
+
+from userland.memory_mapped.memory_mapped import map_size
+from userland.memory_mapped.memory_mapped import CONTROL_WORD
+from userland.memory_mapped.memory_mapped import CONTROL_RESET
+from userland.memory_mapped.memory_mapped import INTERRUPT_WORD
+from userland.memory_mapped.memory_mapped import INTERRUPT_ACK_WORD
+from userland.memory_mapped.memory_mapped import PERIPHERAL_OFFSET
+from userland.memory_mapped.memory_mapped import DEVICE_WINDOW
+from userland.memory_mapped.memory_mapped import MEMORY_OFFSET
+from userland.emulator.board import EmulatedDRT
+from userland.emulator.board import default_slaves
+from userland.emulator.slaves import EmulatedMemory
+
+
+class MappedImage:
+  """MappedImage
+
+  Keeps the image file in sync with the slave models
+  """
+
+  def __init__(self, path, slaves = None, memory_size = 0x10000):
+    """__init__
+
+    Create the image file
+
+    Args:
+      path: file to create, the host maps the same file
+      slaves: list of peripheral models (EmulatedSlave), the first one is
+        device 1, if not specified one of each model is created
+      memory_size: size of the memory bus in bytes
+
+    Returns:
+      Nothing
+
+    Raises:
+      IOError: the file can not be created
+    """
+    if slaves is None:
+      slaves = default_slaves()
+    self.path = path
+    self.slaves = slaves
+    self.memory_size = memory_size
+    memory = EmulatedMemory(size = memory_size / 4)
+    memory.offset = 0
+    self.drt = EmulatedDRT(slaves, [memory])
+    for slave in slaves:
+      slave.board = self
+
+    f = open(path, "wb")
+    f.truncate(map_size(memory_size))
+    f.close()
+    self.fd = os.open(path, os.O_RDWR)
+    self.map = mmap.mmap(self.fd, map_size(memory_size))
+    #the values the model put in the windows, a different value was written
+    #by the host
+    self.published = {}
+    self.lock = threading.Lock()
+    self.thread = None
+    self.update_count = 0
+    with self.lock:
+      self._publish()
+
+  def close(self):
+    """close
+
+    Stop updating the image and close the file
+
+    Args:
+      Nothing
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    self.stop()
+    if self.map is not None:
+      self.map.close()
+      self.map = None
+      os.close(self.fd)
+
+  def _devices(self):
+    return [self.drt] + self.slaves
+
+  def _get_word(self, offset):
+    return struct.unpack_from(">I", self.map, offset)[0]
+
+  def _set_word(self, offset, value):
+    struct.pack_into(">I", self.map, offset, value & 0xFFFFFFFF)
+
+  def _publish(self):
+    """write the registers of the models into their windows"""
+    devices = self._devices()
+    for device_id in range(len(devices)):
+      registers = devices[device_id].registers
+      base = PERIPHERAL_OFFSET + device_id * DEVICE_WINDOW
+      for address in range(len(registers)):
+        value = registers[address] & 0xFFFFFFFF
+        self._set_word(base + address * 4, value)
+        self.published[(device_id, address)] = value
+
+  def update(self):
+    """update
+
+    Apply the reset, interrupt acknowledges and register writes of the host
+    to the models and write the state of the models back into the file
+
+    Args:
+      Nothing
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    with self.lock:
+      self.update_count += 1
+      if self._get_word(CONTROL_WORD * 4) & CONTROL_RESET:
+        self._set_word(CONTROL_WORD * 4, 0)
+        self._set_word(INTERRUPT_WORD * 4, 0)
+        for slave in self.slaves:
+          slave.interrupt = False
+          slave.reset()
+        self._publish()
+
+      ack = self._get_word(INTERRUPT_ACK_WORD * 4)
+      if ack:
+        self._set_word(INTERRUPT_ACK_WORD * 4, 0)
+        self._set_word(INTERRUPT_WORD * 4,
+                       self._get_word(INTERRUPT_WORD * 4) & ~ack)
+
+      devices = self._devices()
+      for device_id in range(len(devices)):
+        device = devices[device_id]
+        base = PERIPHERAL_OFFSET + device_id * DEVICE_WINDOW
+        for address in range(len(device.registers)):
+          value = self._get_word(base + address * 4)
+          if value != self.published[(device_id, address)]:
+            device.write(address, value)
+      self._publish()
+      self._collect_interrupts()
+
+  def interrupt(self, device_id):
+    """interrupt
+
+    Raise the interrupt of a device
+
+    Args:
+      device_id: device (bus offset) that is interrupting
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    with self.lock:
+      self._set_word(INTERRUPT_WORD * 4,
+                     self._get_word(INTERRUPT_WORD * 4) | (1 << device_id))
+
+  def _collect_interrupts(self):
+    interrupts = 0
+    for i in range(len(self.slaves)):
+      if self.slaves[i].interrupt:
+        self.slaves[i].interrupt = False
+        interrupts |= 1 << (i + 1)
+    if interrupts:
+      self._set_word(INTERRUPT_WORD * 4,
+                     self._get_word(INTERRUPT_WORD * 4) | interrupts)
+
+  def read_memory_words(self, address, count):
+    """read_memory_words
+
+    Read from the memory bus
+
+    Args:
+      address: word address on the memory bus
+      count: number of 32-bit words
+
+    Returns:
+      string of the big endian words
+
+    Raises:
+      Nothing
+    """
+    offset = MEMORY_OFFSET + address * 4
+    return self.map[offset: offset + count * 4]
+
+  def start(self, interval = 0.001):
+    """start
+
+    Update the image from a thread so drivers that wait for the models see
+    them change
+
+    Args:
+      interval: time in seconds between updates
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    if self.thread is not None:
+      return
+    self.stopped = threading.Event()
+    self.thread = threading.Thread(target = self._run, args = (interval,))
+    self.thread.daemon = True
+    self.thread.start()
+
+  def stop(self):
+    """stop
+
+    Stop the update thread
+
+    Args:
+      Nothing
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    if self.thread is None:
+      return
+    self.stopped.set()
+    self.thread.join()
+    self.thread = None
+
+  def _run(self, interval):
+    while not self.stopped.wait(interval):
+      self.update()
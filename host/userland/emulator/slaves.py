@@ -0,0 +1,614 @@
+#Distributed under the MIT licesnse.
+#Copyright (c) 2011 Dave McCoy (dave.mccoy@cospandesign.com)
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy of
+#this software and associated documentation files (the "Software"), to deal in
+#the Software without restriction, including without limitation the rights to
+#use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+#of the Software, and to permit persons to whom the Software is furnished to do
+#so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+""" slaves
+
+Register models of the Olympus slaves used by the emulated board
+
+Each model keeps the state of the registers of a core and reproduces the
+side effects the host drivers depend on (busy bits that clear, status flags,
+FIFOs and interrupts), the models complete every operation immediately
+
+"""
+
+__author__ = 'dave.mccoy@cospandesign.com (Dave McCoy)'
+
+import struct
+
+from userland.drivers import gpio
+from userland.drivers import spi
+from userland.drivers import i2c
+from userland.drivers import uart
+from userland.drivers import i2s
+from userland.drivers import logic_analyzer
+
+#Device types, found in cbuilder/drt/drt.json
+DEVICE_GPIO           = 0x01
+DEVICE_UART           = 0x02
+DEVICE_I2C            = 0x03
+DEVICE_SPI            = 0x04
+DEVICE_MEMORY         = 0x05
+DEVICE_I2S            = 0x0B
+DEVICE_LOGIC_ANALYZER = 0x0C
+
+#DRT flags
+FLAG_STANDARD_DEVICE  = 0x00000001
+FLAG_MEMORY_DEVICE    = 0x00010000
+
+
+class EmulatedSlave:
+  """EmulatedSlave
+
+  A peripheral with a bank of read/write registers, subclasses add the
+  behavior of a specific core
+  """
+
+  device_type = 0x00
+  flags = FLAG_STANDARD_DEVICE
+  #number of registers
+  size = 1
+
+  def __init__(self):
+    self.board = None
+    self.interrupt = False
+    self.reset()
+
+  def reset(self):
+    """reset
+
+    Put the registers back to their power on values
+
+    Args:
+      Nothing
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    self.registers = [0] * self.size
+
+  def read(self, address):
+    """read
+
+    Read a single register
+
+    Args:
+      address: register address
+
+    Returns:
+      32-bit value
+
+    Raises:
+      Nothing
+    """
+    if address < len(self.registers):
+      return self.registers[address]
+    return 0
+
+  def write(self, address, value):
+    """write
+
+    Write a single register
+
+    Args:
+      address: register address
+      value: 32-bit value
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    if address < len(self.registers):
+      self.registers[address] = value
+
+  def read_words(self, address, count):
+    """read_words
+
+    Read a burst of registers
+
+    Args:
+      address: address of the first register
+      count: number of 32-bit words
+
+    Returns:
+      string of the big endian words
+
+    Raises:
+      Nothing
+    """
+    return struct.pack(">%dI" % count,
+                       *[self.read(address + i) for i in range(count)])
+
+  def write_words(self, address, data):
+    """write_words
+
+    Write a burst of registers
+
+    Args:
+      address: address of the first register
+      data: buffer of big endian 32-bit words
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    words = struct.unpack(">%dI" % (len(data) / 4), str(data))
+    for i in range(len(words)):
+      self.write(address + i, words[i])
+
+  def raise_interrupt(self):
+    """raise_interrupt
+
+    Flag an interrupt, the board sends it to the host after the current
+    command
+
+    Args:
+      Nothing
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    self.interrupt = True
+
+
+class EmulatedMemory(EmulatedSlave):
+  """EmulatedMemory
+
+  A memory device on the memory bus, the contents are kept as big endian
+  words so bursts are copied without unpacking them
+  """
+
+  device_type = DEVICE_MEMORY
+  flags = FLAG_STANDARD_DEVICE | FLAG_MEMORY_DEVICE
+
+  def __init__(self, size = 0x100000):
+    """__init__
+
+    Args:
+      size: number of 32-bit words
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    self.size = size
+    EmulatedSlave.__init__(self)
+
+  def reset(self):
+    #a reset does not clear a memory
+    if not hasattr(self, "data"):
+      self.data = bytearray(self.size * 4)
+
+  def read(self, address):
+    return struct.unpack_from(">I", self.data, address * 4)[0]
+
+  def write(self, address, value):
+    struct.pack_into(">I", self.data, address * 4, value)
+
+  def read_words(self, address, count):
+    return self.data[address * 4: (address + count) * 4]
+
+  def write_words(self, address, data):
+    self.data[address * 4: address * 4 + len(data)] = data
+
+
+class EmulatedGPIO(EmulatedSlave):
+  """EmulatedGPIO
+
+  The input pins are driven with set_inputs, a pin that changes to the level
+  selected in INTERRUPT_EDGE sets its bit in INTERRUPTS (cleared on read)
+  """
+
+  device_type = DEVICE_GPIO
+  size = 5
+
+  def reset(self):
+    EmulatedSlave.reset(self)
+    self.inputs = 0
+
+  def set_inputs(self, inputs):
+    """set_inputs
+
+    Drive the input pins
+
+    Args:
+      inputs: 32-bit value of the pins
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    changed = (self.inputs ^ inputs) & ~self.registers[gpio.GPIO_OUTPUT_ENABLE]
+    self.inputs = inputs
+    edge = self.registers[gpio.INTERRUPT_EDGE]
+    triggered = changed & ~(inputs ^ edge) & self.registers[gpio.INTERRUPT_ENABLE]
+    if triggered:
+      self.registers[gpio.INTERRUPTS] |= triggered & 0xFFFFFFFF
+      self.raise_interrupt()
+
+  def read(self, address):
+    if address == gpio.GPIO_PORT:
+      output_enable = self.registers[gpio.GPIO_OUTPUT_ENABLE]
+      return ((self.registers[gpio.GPIO_PORT] & output_enable) |
+              (self.inputs & ~output_enable)) & 0xFFFFFFFF
+    if address == gpio.INTERRUPTS:
+      value = self.registers[gpio.INTERRUPTS]
+      self.registers[gpio.INTERRUPTS] = 0
+      return value
+    return EmulatedSlave.read(self, address)
+
+
+class EmulatedSPI(EmulatedSlave):
+  """EmulatedSPI
+
+  Setting GO_BUSY shifts the write data out and the read data in, by default
+  MISO is looped back to MOSI, a function can be attached to model a slave
+  """
+
+  device_type = DEVICE_SPI
+  size = 12
+
+  def __init__(self, clock_rate = 50000000, transfer = None):
+    """__init__
+
+    Args:
+      clock_rate: rate of the clock that drives the core
+      transfer: function that takes the four write data words and returns
+        the four read data words
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    self.clock_rate = clock_rate
+    self.transfer = transfer
+    self.transactions = 0
+    EmulatedSlave.__init__(self)
+
+  def reset(self):
+    EmulatedSlave.reset(self)
+    self.registers[spi.CLOCK_RATE] = self.clock_rate
+
+  def write(self, address, value):
+    if address == spi.CLOCK_RATE:
+      return
+    EmulatedSlave.write(self, address, value)
+    if address == spi.CONTROL and (value & spi.CONTROL_GO_BUSY):
+      self._transaction()
+
+  def _transaction(self):
+    write_data = self.registers[spi.WRITE_DATA0: spi.WRITE_DATA3 + 1]
+    read_data = write_data
+    if self.transfer is not None:
+      read_data = self.transfer(write_data)
+    self.registers[spi.READ_DATA0: spi.READ_DATA3 + 1] = list(read_data)
+    self.registers[spi.CONTROL] &= ~spi.CONTROL_GO_BUSY
+    self.transactions += 1
+    if self.registers[spi.CONTROL] & spi.CONTROL_INTERRUPT_ENABLE:
+      self.raise_interrupt()
+
+
+class EmulatedI2C(EmulatedSlave):
+  """EmulatedI2C
+
+  I2C devices are modeled as register files: the first byte written after
+  the address sets the register pointer, following writes and reads access
+  the register and move the pointer, an address without a device is not
+  acknowledged
+  """
+
+  device_type = DEVICE_I2C
+  size = 7
+
+  def __init__(self, clock_rate = 50000000, devices = None):
+    """__init__
+
+    Args:
+      clock_rate: rate of the clock that drives the core
+      devices: dictionary of 7-bit I2C address: bytearray of the registers
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    self.clock_rate = clock_rate
+    if devices is None:
+      devices = {}
+    self.devices = devices
+    EmulatedSlave.__init__(self)
+
+  def reset(self):
+    EmulatedSlave.reset(self)
+    self.registers[i2c.CLOCK_RATE] = self.clock_rate
+    self.selected = None
+    self.pointer = None
+
+  def write(self, address, value):
+    if address in [i2c.CLOCK_RATE, i2c.STATUS, i2c.RECEIVE]:
+      return
+    EmulatedSlave.write(self, address, value)
+    if address == i2c.CONTROL and (value & i2c.CONTROL_RESET):
+      self.reset()
+    elif address == i2c.COMMAND:
+      self._command(value)
+
+  def _command(self, command):
+    ack = True
+    if command & i2c.COMMAND_START:
+      i2c_id = self.registers[i2c.TRANSMIT] & 0xFF
+      self.selected = None
+      if (i2c_id >> 1) in self.devices:
+        self.selected = self.devices[i2c_id >> 1]
+        #a write sets the pointer first, a read continues from the pointer
+        if (i2c_id & 0x01) == 0:
+          self.pointer = None
+      ack = self.selected is not None
+
+    elif command & i2c.COMMAND_WRITE:
+      ack = self.selected is not None
+      if ack:
+        value = self.registers[i2c.TRANSMIT] & 0xFF
+        if self.pointer is None:
+          self.pointer = value
+        else:
+          self.selected[self.pointer % len(self.selected)] = value
+          self.pointer += 1
+
+    elif command & i2c.COMMAND_READ:
+      value = 0xFF
+      if self.selected is not None:
+        if self.pointer is None:
+          self.pointer = 0
+        value = self.selected[self.pointer % len(self.selected)]
+        self.pointer += 1
+      self.registers[i2c.RECEIVE] = value
+
+    if command & i2c.COMMAND_STOP:
+      self.selected = None
+
+    status = i2c.STATUS_IRQ_FLAG
+    if not ack:
+      status |= i2c.STATUS_READ_ACK_N
+    self.registers[i2c.STATUS] = status
+    if self.registers[i2c.CONTROL] & i2c.CONTROL_INTERRUPT_EN:
+      self.raise_interrupt()
+
+
+class EmulatedUART(EmulatedSlave):
+  """EmulatedUART
+
+  Data written to WRITE_DATA (a two byte length followed by the data) is
+  collected in 'transmitted', data to receive is queued with receive and read
+  back from READ_DATA in the same format
+  """
+
+  device_type = DEVICE_UART
+  size = 8
+
+  def __init__(self, fifo_size = 2048, loopback = False):
+    """__init__
+
+    Args:
+      fifo_size: size of the write FIFO in bytes
+      loopback: transmitted data is received
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    self.fifo_size = fifo_size
+    self.loopback = loopback
+    EmulatedSlave.__init__(self)
+
+  def reset(self):
+    EmulatedSlave.reset(self)
+    self.transmitted = bytearray()
+    self.received = bytearray()
+    self.read_request = 0
+
+  def receive(self, data):
+    """receive
+
+    Queue data that arrived on the RX pin
+
+    Args:
+      data: string or bytearray
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    self.received.extend(data)
+    if self.registers[uart.CONTROL] & uart.CONTROL_INT_READ:
+      self.registers[uart.STATUS] |= uart.STATUS_INT_READ
+      self.raise_interrupt()
+
+  def read(self, address):
+    if address == uart.WRITE_AVAILABLE:
+      return self.fifo_size
+    if address == uart.READ_COUNT:
+      return len(self.received)
+    if address == uart.STATUS:
+      status = self.registers[uart.STATUS]
+      self.registers[uart.STATUS] = 0
+      return status
+    return EmulatedSlave.read(self, address)
+
+  def write(self, address, value):
+    if address == uart.READ_COUNT:
+      self.read_request = value
+      return
+    EmulatedSlave.write(self, address, value)
+    if address == uart.CONTROL and (value & uart.CONTROL_RESET):
+      self.reset()
+
+  def read_words(self, address, count):
+    if address != uart.READ_DATA:
+      return EmulatedSlave.read_words(self, address, count)
+
+    length = min(self.read_request, len(self.received), count * 4 - 2)
+    data = bytearray(struct.pack(">H", length)) + self.received[:length]
+    del self.received[:length]
+    data.extend(bytearray(count * 4 - len(data)))
+    return data
+
+  def write_words(self, address, data):
+    if address != uart.WRITE_DATA:
+      return EmulatedSlave.write_words(self, address, data)
+
+    data = bytearray(data)
+    length = struct.unpack_from(">H", str(data[:2]))[0]
+    self.transmitted.extend(data[2: 2 + length])
+    if self.loopback:
+      self.receive(data[2: 2 + length])
+    if self.registers[uart.CONTROL] & uart.CONTROL_INT_WRITE:
+      self.registers[uart.STATUS] |= uart.STATUS_INT_WRITE
+      self.raise_interrupt()
+
+
+class EmulatedI2S(EmulatedSlave):
+  """EmulatedI2S
+
+  Writing the size of a memory block plays it: the block is copied from the
+  memory bus into 'played', the block is marked empty again and an interrupt
+  is raised
+  """
+
+  device_type = DEVICE_I2S
+  size = 8
+
+  def __init__(self, clock_rate = 50000000):
+    """__init__
+
+    Args:
+      clock_rate: rate of the clock that drives the core
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    self.clock_rate = clock_rate
+    EmulatedSlave.__init__(self)
+
+  def reset(self):
+    EmulatedSlave.reset(self)
+    self.registers[i2s.CLOCK_RATE] = self.clock_rate
+    self.registers[i2s.STATUS] = i2s.STATUS_MEM_0_EMPTY | i2s.STATUS_MEM_1_EMPTY
+    self.played = bytearray()
+
+  def write(self, address, value):
+    if address in [i2s.CLOCK_RATE, i2s.STATUS]:
+      return
+    EmulatedSlave.write(self, address, value)
+    if address == i2s.MEM_0_SIZE and value > 0:
+      self._play(i2s.MEM_0_BASE, i2s.MEM_0_SIZE)
+    elif address == i2s.MEM_1_SIZE and value > 0:
+      self._play(i2s.MEM_1_BASE, i2s.MEM_1_SIZE)
+
+  def _play(self, base, size):
+    if self.board is not None:
+      self.played.extend(self.board.read_memory_words(self.registers[base],
+                                                      self.registers[size]))
+    self.registers[size] = 0
+    if self.registers[i2s.CONTROL] & i2s.CONTROL_INTERRUPT_ENABLE:
+      self.raise_interrupt()
+
+
+class EmulatedLogicAnalyzer(EmulatedSlave):
+  """EmulatedLogicAnalyzer
+
+  Enabling the capture finishes it immediately with the samples queued with
+  set_capture, the samples are read back from DATA
+  """
+
+  device_type = DEVICE_LOGIC_ANALYZER
+  size = logic_analyzer.DATA
+
+  def reset(self):
+    EmulatedSlave.reset(self)
+    self.capture = []
+
+  def set_capture(self, samples):
+    """set_capture
+
+    Set the samples returned by the next capture
+
+    Args:
+      samples: list of 32-bit values
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    self.capture = list(samples)
+
+  def read(self, address):
+    if address == logic_analyzer.DATA_COUNT:
+      return len(self.capture)
+    if address >= logic_analyzer.DATA:
+      index = address - logic_analyzer.DATA
+      if index < len(self.capture):
+        return self.capture[index]
+      return 0
+    return EmulatedSlave.read(self, address)
+
+  def write(self, address, value):
+    if address in [logic_analyzer.STATUS, logic_analyzer.DATA_COUNT]:
+      return
+    EmulatedSlave.write(self, address, value)
+    if address != logic_analyzer.CONTROL:
+      return
+    if value & logic_analyzer.CONTROL_RESET:
+      capture = self.capture
+      self.reset()
+      self.capture = capture
+      return
+    if value & logic_analyzer.CONTROL_RESTART_LA:
+      self.registers[logic_analyzer.STATUS] = 0
+    if value & logic_analyzer.CONTROL_ENABLE_LA:
+      self.registers[logic_analyzer.STATUS] = logic_analyzer.STATUS_FINISHED
+      if value & logic_analyzer.CONTROL_ENABLE_INT:
+        self.raise_interrupt()
@@ -0,0 +1,352 @@
+#Distributed under the MIT licesnse.
+#Copyright (c) 2011 Dave McCoy (dave.mccoy@cospandesign.com)
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy of
+#this software and associated documentation files (the "Software"), to deal in
+#the Software without restriction, including without limitation the rights to
+#use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+#of the Software, and to permit persons to whom the Software is furnished to do
+#so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+""" framer
+
+Buffers the raw bytes received from an Olympus image and splits them into
+response frames
+
+Each response starts with an identification (sync) byte, the framer scans its
+buffer for the sync byte instead of reading the device one byte at a time
+and hands out the body of the frame as a memoryview
+
+Unsolicited frames (interrupts) can arrive between the responses, a handler
+can be registered for them by the status byte that follows the sync byte so
+they are removed from the stream before the responses are matched
+
+"""
+
+__author__ = 'dave.mccoy@cospandesign.com (Dave McCoy)'
+
+import time
+
+from userland import codec
+
+#Identification byte at the start of every response
+SYNC_BYTE = codec.RESPONSE_ID_BYTE
+
+
+class ResponseFramer:
+  """ResponseFramer
+
+  Owns the receive buffer of a communication channel
+  """
+
+  #size of the reads requested from the device
+  chunk_size = 0x10000
+  #time to wait before polling a device that did not return any data, used
+  #when a wait strategy is not set
+  poll_interval = 0.0005
+
+  def __init__(self, read_data, sync = SYNC_BYTE, debug = False):
+    """__init__
+
+    Args:
+      read_data: function that takes a maximum size and returns a string of
+        the bytes that are available (pyftdi Ftdi.read_data)
+      sync: identification byte at the start of every frame
+      debug: print out debug messages
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    self.read_data = read_data
+    self.sync = chr(sync)
+    self.debug = debug
+    self.buffer = bytearray()
+    self.start = 0
+    self.desync_count = 0
+    #time spent waiting for a sync byte and the bytes thrown away looking for
+    #one
+    self.sync_time = 0.0
+    self.discarded_bytes = 0
+    self.handlers = {}
+    #WaitStrategy (wait.py) used when the device does not have any data
+    self.wait = None
+
+  def add_handler(self, status, length, handler):
+    """add_handler
+
+    Register a handler for unsolicited frames that start with a status byte
+
+    Args:
+      status: the byte following the sync byte that identifies the frame
+      length: number of bytes in the frame following the sync byte
+      handler: function that is called with the memoryview of the frame
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    self.handlers[status] = (length, handler)
+
+  def clear(self):
+    """clear
+
+    Drop all the buffered data, this should be called whenever the device
+    buffers are purged
+
+    Args:
+      Nothing
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    self.buffer = bytearray()
+    self.start = 0
+
+  def buffered(self):
+    """buffered
+
+    Returns the number of bytes that have been received but not consumed
+
+    Args:
+      Nothing
+
+    Returns:
+      Number of buffered bytes
+
+    Raises:
+      Nothing
+    """
+    return len(self.buffer) - self.start
+
+  def get_frame(self, length, timeout, validate = None):
+    """get_frame
+
+    Find the next sync byte and return the 'length' bytes that follow it,
+    any data found before the sync byte is discarded
+
+    If a validate function is specified it is called with each candidate
+    frame, a rejected frame is counted as a desync and the framer continues
+    to scan from the byte after the rejected sync byte (stale data or a sync
+    byte that was actually part of the data of another frame)
+
+    Args:
+      length: number of bytes in the frame following the sync byte
+      timeout: absolute time (time.time()) to stop waiting for the frame
+      validate: function that takes the frame and returns True if it is the
+        expected frame
+
+    Returns:
+      memoryview of the frame body (not including the sync byte)
+      None if the frame was not received before the timeout
+
+    Raises:
+      Nothing
+    """
+    while True:
+      if not self.find_sync(timeout):
+        return None
+      #consume the sync byte
+      self.start += 1
+      handled = self._handle(timeout)
+      if handled is None:
+        return None
+      if handled:
+        continue
+      frame = self.get_bytes(length, timeout)
+      if frame is None:
+        return None
+      if validate is None or validate(frame):
+        return frame
+
+      if self.debug:
+        print "framer: rejected frame, resynchronizing"
+      self.desync_count += 1
+      #continue the scan right after the rejected sync byte
+      self.start -= length
+
+  def dispatch(self, timeout):
+    """dispatch
+
+    Wait for an unsolicited frame and pass it to its handler, any other
+    frame found is discarded and counted as a desync
+
+    Args:
+      timeout: absolute time (time.time()) to stop waiting for the frame
+
+    Returns:
+      True: A frame was passed to a handler
+      False: Timeout
+
+    Raises:
+      Nothing
+    """
+    while True:
+      if not self.find_sync(timeout):
+        return False
+      self.start += 1
+      handled = self._handle(timeout)
+      if handled is None:
+        return False
+      if handled:
+        return True
+
+      if self.debug:
+        print "framer: discarded an unexpected frame"
+      self.desync_count += 1
+
+  def _handle(self, timeout):
+    """_handle
+
+    Pass the frame following a sync byte to its handler if the status byte
+    has a handler registered
+
+    Returns:
+      True: the frame was handled
+      False: the frame does not have a handler
+      None: Timeout
+    """
+    if len(self.handlers) == 0:
+      return False
+    if not self._fill(1, timeout):
+      return None
+    status = self.buffer[self.start]
+    if status not in self.handlers:
+      return False
+
+    length, handler = self.handlers[status]
+    frame = self.get_bytes(length, timeout)
+    if frame is None:
+      return None
+    handler(frame)
+    return True
+
+  def find_sync(self, timeout):
+    """find_sync
+
+    Scan the buffer for the sync byte, reading more data if needed, all the
+    data in front of the sync byte is discarded
+
+    Args:
+      timeout: absolute time (time.time()) to stop waiting for the sync byte
+
+    Returns:
+      True: The sync byte is the next byte in the buffer
+      False: Timeout
+
+    Raises:
+      Nothing
+    """
+    start = None
+    while True:
+      index = self.buffer.find(self.sync, self.start)
+      if index >= 0:
+        if index > self.start:
+          self.discarded_bytes += index - self.start
+          if self.debug:
+            print "framer: discarded %d bytes" % (index - self.start)
+        self.start = index
+        if start is not None:
+          self.sync_time += time.time() - start
+        return True
+
+      #nothing in the buffer is useful
+      if start is None:
+        start = time.time()
+      self.discarded_bytes += self.buffered()
+      self.clear()
+      if not self._fill(1, timeout):
+        self.sync_time += time.time() - start
+        return False
+
+  def get_bytes(self, length, timeout):
+    """get_bytes
+
+    Return the next 'length' bytes of the buffer without looking for a sync
+    byte (the body of a variable length frame)
+
+    Args:
+      length: number of bytes to return
+      timeout: absolute time (time.time()) to stop waiting for the data
+
+    Returns:
+      memoryview of the data
+      None if the data was not received before the timeout
+
+    Raises:
+      Nothing
+    """
+    if not self._fill(length, timeout):
+      return None
+    view = memoryview(self.buffer)[self.start: self.start + length]
+    self.start += length
+    return view
+
+  def _fill(self, length, timeout):
+    """_fill
+
+    Read from the device until at least 'length' bytes are buffered
+
+    the buffer is replaced (never resized) so memoryviews that were handed
+    out earlier stay valid
+
+    Args:
+      length: number of bytes that should be buffered
+      timeout: absolute time (time.time()) to stop waiting for the data
+
+    Returns:
+      True: the data is buffered
+      False: timeout
+
+    Raises:
+      Nothing
+    """
+    available = self.buffered()
+    if available >= length:
+      return True
+
+    chunks = [self.buffer[self.start:]]
+    attempt = 0
+    wait_start = None
+    while available < length:
+      data = self.read_data(max(self.chunk_size, length - available))
+      if len(data) > 0:
+        chunks.append(data)
+        available += len(data)
+        attempt = 0
+        continue
+      now = time.time()
+      if wait_start is None:
+        wait_start = now
+      if now >= timeout:
+        break
+      if self.wait is None:
+        time.sleep(self.poll_interval)
+      else:
+        self.wait.poll(attempt, timeout)
+      attempt += 1
+
+    if wait_start is not None and self.wait is not None:
+      self.wait.finished(time.time() - wait_start)
+
+    self.buffer = bytearray().join(chunks)
+    self.start = 0
+    return available >= length
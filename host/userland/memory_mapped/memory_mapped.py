@@ -0,0 +1,419 @@
+#Distributed under the MIT licesnse.
+#Copyright (c) 2011 Dave McCoy (dave.mccoy@cospandesign.com)
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy of
+#this software and associated documentation files (the "Software"), to deal in
+#the Software without restriction, including without limitation the rights to
+#use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+#of the Software, and to permit persons to whom the Software is furnished to do
+#so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+""" memory_mapped
+
+Communication with an Olympus image whose Wishbone address space is mapped
+into the address space of the host (a processor attached to the FPGA bus,
+like the Beaglebone memory interface)
+
+The device node (or a file for testing) is mapped with mmap, reads and writes
+are copies to and from the map, there are no packets and no responses
+
+Layout of the map (byte offsets), the bus bridge presents the words big
+endian, the same byte order as the data of the other interfaces:
+
+  0x00000000: control page
+    word 0: control (bit 0: reset the master)
+    word 1: pending interrupts (bit n: device n)
+    word 2: interrupt acknowledge, the bits written are cleared in word 1
+  0x00001000: peripheral bus, a 4KB window for each device (the DRT is
+    device 0), the window of device n starts at 0x1000 + n * 0x1000
+  0x00101000: memory bus
+
+"""
+
+__author__ = 'dave.mccoy@cospandesign.com (Dave McCoy)'
+
+import os
+import time
+import mmap
+import struct
+import ctypes
+from array import array as Array
+
+from userland.olympus import Olympus
+from userland.olympus import OlympusCommError
+from userland.olympus import OlympusRequest
+from userland.olympus import WAIT_INTERRUPT
+
+#words of the control page
+CONTROL_WORD          = 0
+INTERRUPT_WORD        = 1
+INTERRUPT_ACK_WORD    = 2
+#bits of the control word
+CONTROL_RESET         = 0x00000001
+
+#size of the control page in bytes
+CONTROL_SIZE          = 0x1000
+#size of the window of each peripheral in bytes (1024 registers)
+DEVICE_WINDOW         = 0x1000
+#number of devices on the peripheral bus
+MAX_DEVICES           = 256
+PERIPHERAL_OFFSET     = CONTROL_SIZE
+MEMORY_OFFSET         = PERIPHERAL_OFFSET + DEVICE_WINDOW * MAX_DEVICES
+
+#identification word in the first word of the DRT
+DRT_ID_WORD           = 0xC594
+
+WORD = struct.Struct(">I")
+
+
+def map_size(memory_size):
+  """map_size
+
+  Returns the number of bytes to map for a memory bus of a given size
+
+  Args:
+    memory_size: size of the memory bus in bytes
+
+  Returns:
+    size of the map in bytes
+
+  Raises:
+    Nothing
+  """
+  return MEMORY_OFFSET + memory_size
+
+
+def _source_view(data):
+  """view of the bytes to write, the data is only copied if it does not
+  support the buffer protocol"""
+  try:
+    view = memoryview(data)
+    if view.itemsize == 1:
+      return view
+  except TypeError:
+    pass
+  try:
+    #array and the old buffer protocol objects
+    return memoryview((ctypes.c_char * len(data)).from_buffer(data))
+  except TypeError:
+    return memoryview(str(bytearray(data)))
+
+
+class MemoryMapped(Olympus):
+  """MemoryMapped
+
+  Concrete Class that accesses an Olympus image through a memory map
+  """
+
+  def __init__(self, path = "/dev/uio0", memory_size = 0, offset = 0,
+               debug = False):
+    """__init__
+
+    Args:
+      path: device node (or file) to map
+      memory_size: size of the memory bus in bytes
+      offset: offset of the map in the device node
+      debug: print out debug messages
+
+    Returns:
+      Nothing
+
+    Raises:
+      OlympusCommError: the device can not be mapped
+    """
+    Olympus.__init__(self, debug)
+    self.name = "MemoryMapped"
+    self.path = path
+    self.memory_size = memory_size
+    self.map = None
+    self.window = None
+    self.fd = None
+    try:
+      self.fd = os.open(path, os.O_RDWR | getattr(os, "O_SYNC", 0))
+      self.map = mmap.mmap(self.fd, map_size(memory_size), mmap.MAP_SHARED,
+                           mmap.PROT_READ | mmap.PROT_WRITE, offset = offset)
+    except (EnvironmentError, ValueError), err:
+      if self.fd is not None:
+        os.close(self.fd)
+        self.fd = None
+      raise OlympusCommError("Failed to map %s: %s" % (path, str(err)))
+
+    #writable view of the whole map, slices of it do not copy the data
+    self._buffer = (ctypes.c_char * len(self.map)).from_buffer(self.map)
+    self.window = memoryview(self._buffer)
+
+  def __del__(self):
+    self.close()
+
+  def close(self):
+    """close
+
+    Unmap the device
+
+    Args:
+      Nothing
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    #the views have to be released before the map is closed
+    self.window = None
+    self._buffer = None
+    if self.map is not None:
+      self.map.close()
+      self.map = None
+    if self.fd is not None:
+      os.close(self.fd)
+      self.fd = None
+
+  def _offset(self, device_id, address, length, mem_device):
+    """_offset
+
+    Returns the position of a register/memory access in the map
+
+    Raises:
+      OlympusCommError: the access is outside of the map
+    """
+    if self.map is None:
+      raise OlympusCommError("%s is not mapped" % self.path)
+    size = length * 4
+    if mem_device:
+      offset = MEMORY_OFFSET + address * 4
+      if address < 0 or address * 4 + size > self.memory_size:
+        raise OlympusCommError("Memory access 0x%08X (%d words) is outside of the memory bus" % (address, length))
+      return offset
+
+    if device_id < 0 or device_id >= MAX_DEVICES or \
+        address < 0 or address * 4 + size > DEVICE_WINDOW:
+      raise OlympusCommError("Access to device %d address 0x%04X (%d words) is outside of its window" % (device_id, address, length))
+    return PERIPHERAL_OFFSET + device_id * DEVICE_WINDOW + address * 4
+
+  def read_view(self, device_id, address, length = 1, mem_device = False):
+    """read_view
+
+    Returns a view of registers/memory in the map without copying them, the
+    view follows the contents of the bus
+
+    Args:
+      device_id: Device identification number, found in the DRT
+      address: Address of the register/memory to read
+      length: Number of 32 bit words
+      mem_device: True if the device is on the memory bus
+
+    Returns:
+      memoryview of the big endian words
+
+    Raises:
+      OlympusCommError: the access is outside of the map
+    """
+    offset = self._offset(device_id, address, length, mem_device)
+    return self.window[offset: offset + length * 4]
+
+  def _read(self, device_id, address, length, mem_device):
+    offset = self._offset(device_id, address, length, mem_device)
+    data = Array('B')
+    data.fromstring(buffer(self.map, offset, length * 4))
+    return data
+
+  def _write(self, device_id, address, data, mem_device):
+    view = _source_view(data)
+    length = len(view) / 4
+    offset = self._offset(device_id, address, length, mem_device)
+    self.window[offset: offset + length * 4] = view[:length * 4]
+
+  def _get_control(self, word):
+    return WORD.unpack_from(self.map, word * 4)[0]
+
+  def _set_control(self, word, value):
+    WORD.pack_into(self.map, word * 4, value & 0xFFFFFFFF)
+
+  def read(self, device_id, address, length = 1, mem_device = False):
+    """read
+
+    read data from the Olympus image
+
+    Args:
+      device_id: Device identification number, found in the DRT
+      address: Address of the register/memory to read
+      mem_device: True if the device is on the memory bus
+      length: Number of 32 bit words to read from the FPGA
+
+    Returns:
+      A byte array containing the raw data returned from Olympus
+
+    Raises:
+      OlympusCommError: the access is outside of the map
+    """
+    with self.lock:
+      start = time.time()
+      data = self._read(device_id, address, length, mem_device)
+      self._record_request(OlympusRequest(OlympusRequest.READ, device_id,
+                                          address, length = length,
+                                          mem_device = mem_device),
+                           time.time() - start)
+    return data
+
+  def write(self, device_id, address, data = None, mem_device = False):
+    """write
+
+    Write data to an Olympus image
+
+    Args:
+      device_id: Device identification number, found in the DRT
+      address: Address of the register/memory to read
+      mem_device: True if the device is on the memory bus
+      data: Array of raw bytes to send to the device
+
+    Returns:
+      Nothing
+
+    Raises:
+      OlympusCommError: the access is outside of the map
+    """
+    with self.lock:
+      start = time.time()
+      self._write(device_id, address, data, mem_device)
+      self._record_request(OlympusRequest(OlympusRequest.WRITE, device_id,
+                                          address, length = len(data) / 4,
+                                          mem_device = mem_device),
+                           time.time() - start)
+
+  def flush_queue(self):
+    """flush_queue
+
+    Resolve all the queued requests in order, the accesses complete
+    immediately so there is nothing to pipeline
+
+    Args:
+      Nothing
+
+    Returns:
+      Nothing
+
+    Raises:
+      OlympusCommError: the access is outside of the map, the failed request
+      and all requests behind it are resolved with the error
+    """
+    with self.lock:
+      requests = self.request_queue
+      self.request_queue = []
+      for i in range (0, len(requests)):
+        request = requests[i]
+        start = time.time()
+        try:
+          response = None
+          if request.command == OlympusRequest.READ:
+            response = self._read(request.device_id, request.address,
+                                  request.length, request.mem_device)
+          else:
+            self._write(request.device_id, request.address, request.data,
+                        request.mem_device)
+        except OlympusCommError, err:
+          for r in requests[i:]:
+            r.set_error(err)
+          raise
+
+        self._record_request(request, time.time() - start)
+        request.set_result(response)
+
+  def ping(self):
+    """ping
+
+    Checks the identification word of the DRT
+
+    Args:
+      Nothing
+
+    Returns:
+      Nothing
+
+    Raises:
+      OlympusCommError: the DRT was not found
+    """
+    with self.lock:
+      start = time.time()
+      offset = self._offset(0, 0, 1, False)
+      value = WORD.unpack_from(self.map, offset)[0]
+      self.statistics.record("ping", None, 0, time.time() - start)
+    if (value & 0xFFFF) != DRT_ID_WORD:
+      raise OlympusCommError("DRT not found at %s (0x%08X)" % (self.path, value))
+
+  def reset(self):
+    """reset
+
+    Software reset the Olympus FPGA Master, this may not actually reset the
+    entire FPGA image
+
+    Args:
+      Nothing
+
+    Returns:
+      Nothing
+
+    Raises:
+      OlympusCommError: the device is not mapped
+    """
+    with self.lock:
+      if self.map is None:
+        raise OlympusCommError("%s is not mapped" % self.path)
+      if self.debug:
+        print "Sending reset..."
+      self.invalidate_registers()
+      self._set_control(CONTROL_WORD, CONTROL_RESET)
+
+  def wait_for_interrupts(self, wait_time = 1):
+    """wait_for_interrupts
+
+    Poll the pending interrupts for the specified amount of time, the
+    interrupts that are found are acknowledged
+
+    Args:
+      wait_time: the amount of time in seconds to wait for an interrupt
+
+    Returns:
+      True: Interrupts were detected
+      False: No interrupts detected
+
+    Raises:
+      Nothing
+    """
+    strategy = self.wait_strategies[WAIT_INTERRUPT]
+    start = time.time()
+    timeout = start + wait_time
+    attempt = 0
+    while True:
+      with self.lock:
+        interrupts = self.pending_interrupts
+        if interrupts == 0 and self.map is not None:
+          interrupts = self._get_control(INTERRUPT_WORD)
+          if interrupts != 0:
+            self._set_control(INTERRUPT_ACK_WORD, interrupts)
+            self._interrupts_received(interrupts)
+        if interrupts != 0:
+          self.interrupts = self.pending_interrupts
+          self.pending_interrupts = 0
+          break
+      if time.time() >= timeout:
+        strategy.finished(time.time() - start)
+        return False
+      strategy.poll(attempt, timeout)
+      attempt += 1
+
+    strategy.finished(time.time() - start)
+    if self.debug:
+      print "interrupts: " + str(self.interrupts)
+    return True
@@ -37,6 +37,7 @@ import sys
 import os
 import string
 import json
+import threading
 from array import array as Array
 
 #put olympus in the system path
@@ -44,6 +45,161 @@ sys.path.append(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, "c
 import drt as drt_controller
 from drt import DRTManager
 
+from userland import codec
+from userland.stats import TransactionStats
+from userland.wait import SpinWait
+from userland.wait import BlockingWait
+from userland.drt_cache import DRTCache
+from userland.drt_cache import DRT_HEADER_WORDS
+from userland.drt_cache import fingerprint
+from userland.drt_cache import get_table_hash
+from userland.drt_cache import check_table_hash
+
+#NumPy is optional, when it is installed words are returned as uint32 arrays
+try:
+  import numpy
+except ImportError:
+  numpy = None
+
+#array type code of an unsigned 32-bit value
+WORD_TYPECODE = 'I'
+if Array(WORD_TYPECODE).itemsize != 4:
+  WORD_TYPECODE = 'L'
+
+#Shadow register modes
+#  always read from the device (default)
+REGISTER_VOLATILE   = "volatile"
+#  only the host writes the register, reads are served from the shadow copy
+REGISTER_CACHEABLE  = "cacheable"
+#  the register can not be read back, reads return the last value written
+REGISTER_WRITE_ONLY = "write only"
+
+#Operations that have their own wait strategy (wait.py)
+#  waiting for the response of a register/memory access or a ping
+WAIT_REGISTER       = "register"
+#  waiting for an interrupt
+WAIT_INTERRUPT      = "interrupt"
+
+
+def _raw_bytes(data):
+  """convert a byte array, string or buffer into a string of bytes"""
+  if isinstance(data, str):
+    return data
+  if hasattr(data, "tobytes"):
+    return data.tobytes()
+  if hasattr(data, "tostring"):
+    return data.tostring()
+  return str(bytearray(data))
+
+
+def bytes_to_words(data):
+  """bytes_to_words
+
+  Convert big endian raw bytes (as read from Olympus) into 32-bit words
+
+  Args:
+    data: byte array, string or buffer, the length must be a multiple of 4
+
+  Returns:
+    numpy uint32 array if NumPy is installed, otherwise an array of unsigned
+    32-bit values
+
+  Raises:
+    Nothing
+  """
+  raw = _raw_bytes(data)
+  if numpy is not None:
+    return numpy.frombuffer(raw, dtype = numpy.dtype('>u4')).astype(numpy.uint32)
+
+  words = Array(WORD_TYPECODE)
+  words.fromstring(raw)
+  if sys.byteorder == "little":
+    words.byteswap()
+  return words
+
+
+def words_to_bytes(words):
+  """words_to_bytes
+
+  Convert 32-bit words into big endian raw bytes (to write to Olympus)
+
+  Args:
+    words: list, array or numpy array of 32-bit values
+
+  Returns:
+    Array of bytes
+
+  Raises:
+    Nothing
+  """
+  if numpy is not None:
+    return Array('B', numpy.asarray(words, dtype = numpy.dtype('>u4')).tobytes())
+
+  data = Array(WORD_TYPECODE, words)
+  if sys.byteorder == "little":
+    data.byteswap()
+  return Array('B', data.tostring())
+
+
+def _byte_view(data):
+  """_byte_view
+
+  Returns a read only view of the bytes of any object that supports the
+  buffer protocol (string, bytearray, array, mmap, numpy array) without
+  copying the data
+
+  Args:
+    data: source of the bytes
+
+  Returns:
+    tuple of (view, length in bytes), use _byte_slice to split the view
+
+  Raises:
+    TypeError: data does not support the buffer protocol
+  """
+  try:
+    #the old buffer protocol also covers array and mmap
+    view = buffer(data)
+  except TypeError:
+    view = memoryview(data)
+    if view.itemsize != 1:
+      view = memoryview(view.tobytes())
+  return (view, len(view))
+
+
+def _byte_slice(view, position, size):
+  """slice a view returned by _byte_view without copying the data"""
+  if isinstance(view, memoryview):
+    return view[position: position + size]
+  return buffer(view, position, size)
+
+
+def _register_runs(registers):
+  """_register_runs
+
+  Split a list of registers into runs of consecutive addresses on the same
+  device, each run can be accessed with a single burst packet
+
+  Args:
+    registers: list of tuples that start with (device_id, address)
+
+  Returns:
+    list of tuples: (device_id, address, index of the first register, count)
+
+  Raises:
+    Nothing
+  """
+  runs = []
+  for i in range (0, len(registers)):
+    device_id, address = registers[i][0:2]
+    if len(runs) > 0:
+      run_device_id, run_address, index, count = runs[-1]
+      if (run_device_id == device_id) and (run_address + count == address):
+        runs[-1] = (run_device_id, run_address, index, count + 1)
+        continue
+    runs.append((device_id, address, i, 1))
+  return runs
+
 
 class OlympusCommError(Exception):
   """OlympusCommError
@@ -58,6 +214,109 @@ class OlympusCommError(Exception):
     return repr(self.value)
 
 
+class OlympusRequest:
+  """OlympusRequest
+
+  A read or write that has been queued on an Olympus interface, the request is
+  resolved when the response is received from the image (see flush_queue)
+
+  If a callback is specified it is called with the request once the request is
+  resolved
+  """
+
+  READ  = codec.COMMAND_READ
+  WRITE = codec.COMMAND_WRITE
+
+  def __init__(self, command, device_id, address, length = 1, data = None,
+               mem_device = False, callback = None):
+    self.command = command
+    self.device_id = device_id
+    self.address = address
+    self.length = length
+    self.data = data
+    self.mem_device = mem_device
+    self.callback = callback
+    self.response = None
+    self.error = None
+    self.finished = False
+
+  def done(self):
+    """done
+
+    Returns True if the request has been resolved
+
+    Args:
+      Nothing
+
+    Returns:
+      True: A response or an error has been received
+      False: The request is still pending
+
+    Raises:
+      Nothing
+    """
+    return self.finished
+
+  def result(self):
+    """result
+
+    Returns the result of the request
+
+    Args:
+      Nothing
+
+    Returns:
+      read: A byte array containing the raw data returned from Olympus
+      write: Nothing
+
+    Raises:
+      OlympusCommError: The request is still pending or it failed
+    """
+    if not self.finished:
+      raise OlympusCommError("Request has not been sent to Olympus")
+    if self.error is not None:
+      raise self.error
+    return self.response
+
+  def set_result(self, response):
+    """set_result
+
+    Resolve the request with the response and call the callback
+
+    Args:
+      response: data returned from Olympus (None for writes)
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    self.response = response
+    self.finished = True
+    if self.callback is not None:
+      self.callback(self)
+
+  def set_error(self, error):
+    """set_error
+
+    Resolve the request with an error and call the callback
+
+    Args:
+      error: OlympusCommError that occured while processing the request
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    self.error = error
+    self.finished = True
+    if self.callback is not None:
+      self.callback(self)
+
+
 class Olympus:
   """Olympus
   
@@ -68,6 +327,16 @@ class Olympus:
   read_timeout  = 3
   interrupts = 0
   interrupt_address = 0
+  #number of queued requests that will trigger an automatic flush
+  max_queue_depth = 64
+  #time the interrupt dispatcher holds the interface while it waits for an
+  #interrupt
+  interrupt_poll = 0.01
+  #largest number of 32-bit words in one memory packet (the packet length
+  #field is 24-bits), 64KB matches the USB transfer size of the FTDI chip
+  memory_packet_words = 0x4000
+  #number of memory packets sent back to back before waiting for responses
+  memory_pipeline_depth = 8
   
   def __init__(self, debug = False):
     self.name = "Olympus"
@@ -75,6 +344,23 @@ class Olympus:
     if debug:
       print "Debug Enabled"
     self.drt_manager = DRTManager()
+    self.request_queue = []
+    self.register_modes = {}
+    self.shadow_registers = {}
+    #serializes access to the interface between the interrupt dispatcher and
+    #the application
+    self.lock = threading.RLock()
+    self.pending_interrupts = 0
+    self.interrupt_handlers = {}
+    self.dispatcher = None
+    self.statistics = TransactionStats()
+    #responses arrive within microseconds and are polled for without
+    #sleeping (the FTDI read blocks up to its latency timer), interrupts can
+    #take seconds
+    self.wait_strategies = {WAIT_REGISTER: SpinWait(),
+                            WAIT_INTERRUPT: BlockingWait()}
+    #DRTs of the boards seen before, None to always read the full DRT
+    self.drt_cache = DRTCache()
 
   def __del__(self):
     print "Closing Olympus"
@@ -120,6 +406,126 @@ class Olympus:
     """
     return self.timeout
 
+  def set_wait_strategy(self, operation, strategy):
+    """set_wait_strategy
+
+    Sets how the host waits for the board during an operation
+
+    Args:
+      operation: WAIT_REGISTER or WAIT_INTERRUPT
+      strategy: WaitStrategy (SpinWait, BackoffWait or BlockingWait)
+
+    Returns:
+      Nothing
+
+    Raises:
+      OlympusCommError: Unknown operation
+    """
+    if operation not in [WAIT_REGISTER, WAIT_INTERRUPT]:
+      raise OlympusCommError("Unknown wait operation: %s" % str(operation))
+    self.wait_strategies[operation] = strategy
+
+  def get_wait_strategy(self, operation):
+    """get_wait_strategy
+
+    Returns the wait strategy of an operation
+
+    Args:
+      operation: WAIT_REGISTER or WAIT_INTERRUPT
+
+    Returns:
+      WaitStrategy
+
+    Raises:
+      KeyError: Unknown operation
+    """
+    return self.wait_strategies[operation]
+
+  def set_register_mode(self, device_id, address, mode):
+    """set_register_mode
+
+    Sets how the host keeps a shadow copy of a register
+
+      REGISTER_VOLATILE: always read the register from the device
+      REGISTER_CACHEABLE: the register only changes when the host writes it,
+        reads are served from the shadow copy after the first access
+      REGISTER_WRITE_ONLY: the register can not be read back, reads return
+        the last value written
+
+    Writes always go to the device and update the shadow copy (write-through)
+
+    Args:
+      device_id:  Device identification number, this number is found in the DRT
+      address:  Address of the register
+      mode: REGISTER_VOLATILE, REGISTER_CACHEABLE or REGISTER_WRITE_ONLY
+
+    Returns:
+      Nothing
+
+    Raises:
+      OlympusCommError: Unknown mode
+    """
+    if mode not in [REGISTER_VOLATILE, REGISTER_CACHEABLE, REGISTER_WRITE_ONLY]:
+      raise OlympusCommError("Unknown register mode: %s" % str(mode))
+
+    key = (device_id, address)
+    self.shadow_registers.pop(key, None)
+    if mode == REGISTER_VOLATILE:
+      self.register_modes.pop(key, None)
+    else:
+      self.register_modes[key] = mode
+
+  def invalidate_registers(self, device_id = None):
+    """invalidate_registers
+
+    Drop the shadow copies of the registers, the next read of a cacheable
+    register will go to the device
+
+    This is called when the image is reset
+
+    Args:
+      device_id: only invalidate the registers of this device, if None all
+        the registers are invalidated
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    if device_id is None:
+      self.shadow_registers = {}
+      return
+
+    for key in self.shadow_registers.keys():
+      if key[0] == device_id:
+        del self.shadow_registers[key]
+
+  def _interrupts_received(self, interrupts):
+    """record interrupts that were received, a device that interrupts may
+    have changed its own registers so the cacheable shadow copies of the
+    devices that are flagged are dropped"""
+    self.pending_interrupts |= interrupts
+    for key in self.shadow_registers.keys():
+      if (((1 << key[0]) & interrupts) > 0) and \
+          (self.register_modes.get(key) == REGISTER_CACHEABLE):
+        del self.shadow_registers[key]
+
+  def _update_shadow(self, device_id, address, words, written = True):
+    """store the values of registers that were read or written"""
+    if len(self.register_modes) == 0:
+      return
+    for i in range (0, len(words)):
+      key = (device_id, address + i)
+      mode = self.register_modes.get(key, REGISTER_VOLATILE)
+      if mode == REGISTER_CACHEABLE or (written and mode == REGISTER_WRITE_ONLY):
+        self.shadow_registers[key] = int(words[i]) & 0xFFFFFFFF
+
+  def _drop_shadow(self, device_id, address, count):
+    """forget the shadow copies of registers that are about to be written"""
+    for i in range (0, count):
+      self.shadow_registers.pop((device_id, address + i), None)
+
   def read_register(self, device_id, address):
     """read_register
 
@@ -136,8 +542,124 @@ class Olympus:
     Raises:
       OlympusCommError: Error in communication
     """
-    register_array = self.read(device_id, address, 1) 
-    return register_array[0] << 24 | register_array[1] << 16 | register_array[2] << 8 | register_array[3]
+    key = (device_id, address)
+    if key in self.shadow_registers:
+      return self.shadow_registers[key]
+
+    value = int(self.read_words(device_id, address, 1)[0])
+    self._update_shadow(device_id, address, [value], written = False)
+    return value
+
+  def read_registers(self, registers):
+    """read_registers
+
+    Reads a group of registers with as few transactions as possible
+
+    Registers with consecutive addresses on the same device are read with a
+    single burst read, all the reads are sent together with flush_queue
+
+    Args:
+      registers: list of (device_id, address) tuples
+
+    Returns:
+      list of 32-bit unsigned integers in the same order as registers
+
+    Raises:
+      OlympusCommError: Error in communication
+    """
+    values = {}
+    for register in registers:
+      if register in self.shadow_registers:
+        values[register] = self.shadow_registers[register]
+
+    addresses = sorted(set([r for r in registers if r not in values]))
+    requests = []
+    for device_id, address, index, count in _register_runs(addresses):
+      requests.append((device_id, address, self.queue_read(device_id, address, count)))
+    if len(requests) > 0:
+      self.flush_queue()
+
+    for device_id, address, request in requests:
+      words = bytes_to_words(request.result())
+      for i in range (0, len(words)):
+        values[(device_id, address + i)] = int(words[i])
+      self._update_shadow(device_id, address, words, written = False)
+    return [values[register] for register in registers]
+
+  def write_registers(self, registers):
+    """write_registers
+
+    Writes a group of registers with as few transactions as possible
+
+    The registers are written in order, registers with consecutive addresses
+    on the same device are combined into a single burst write and all the
+    writes are sent together with flush_queue
+
+    Args:
+      registers: list of (device_id, address, value) tuples
+
+    Returns:
+      Nothing
+
+    Raises:
+      OlympusCommError: Error in communication
+    """
+    writes = []
+    for device_id, address, index, count in _register_runs(registers):
+      words = [r[2] & 0xFFFFFFFF for r in registers[index: index + count]]
+      self._drop_shadow(device_id, address, count)
+      self.queue_write(device_id, address, words_to_bytes(words))
+      writes.append((device_id, address, words))
+    self.flush_queue()
+
+    for device_id, address, words in writes:
+      self._update_shadow(device_id, address, words)
+
+  def read_words(self, device_id, address, count, mem_device = False):
+    """read_words
+
+    Reads 32-bit words from Olympus, the raw data is converted in one step
+    instead of one word at a time
+
+    Args:
+      device_id:  Device identification number, this number is found in the DRT
+      address:  Address of the register/memory to read
+      count: Number of 32-bit words to read
+      mem_device: Whether the device is on the memory bus or the peripheral bus
+
+    Returns:
+      numpy uint32 array if NumPy is installed, otherwise an array of
+      unsigned 32-bit values
+
+    Raises:
+      OlympusCommError: Error in communication
+    """
+    return bytes_to_words(self.read(device_id, address, count, mem_device = mem_device))
+
+  def write_words(self, device_id, address, words, mem_device = False):
+    """write_words
+
+    Writes 32-bit words to Olympus
+
+    Args:
+      device_id:  Device identification number, this number is found in the DRT
+      address:  Address of the register/memory to write
+      words: list, array or numpy array of 32-bit values
+      mem_device: Whether the device is on the memory bus or the peripheral bus
+
+    Returns:
+      Nothing
+
+    Raises:
+      OlympusCommError: Error in communication
+    """
+    if mem_device:
+      self.write(device_id, address, words_to_bytes(words), mem_device = True)
+      return
+
+    self._drop_shadow(device_id, address, len(words))
+    self.write(device_id, address, words_to_bytes(words))
+    self._update_shadow(device_id, address, words)
 
 
   def read(self, device_id, address, length = 1, mem_device = False):
@@ -166,23 +688,44 @@ class Olympus:
     """
     raise AssertionError("read function is not implemented")
 
-  def read_memory(self, address, size):
+  def read_memory(self, address, size, progress = None):
     """read_memory
 
     Reads a byte array of the specified size from the specified address from
     memory
 
+    Large reads are split into packets of memory_packet_words and
+    memory_pipeline_depth packets are sent at a time
+
     Args:
       address: Starting location o memory to read from
       size: total number of 32-bit words to read
+      progress: function called with (bytes read, total bytes) after each
+        group of packets
 
     Returns:
-      Nothing
+      A byte array containing the raw data
 
     Raises:
       OlympusCommError: Error in communication
     """
-    return self.read(0, address, size, mem_device=True)
+    data = Array('B')
+    position = 0
+    with self.lock:
+      while position < size:
+        requests = []
+        while position < size and len(requests) < self.memory_pipeline_depth:
+          count = min(self.memory_packet_words, size - position)
+          requests.append(self.queue_read(0, address + position, count,
+                                          mem_device = True))
+          position += count
+        self.flush_queue()
+
+        for request in requests:
+          data.extend(request.result())
+        if progress is not None:
+          progress(len(data), size * 4)
+    return data
 
   def write_register(self, device_id, address, value):
     """write_register
@@ -200,12 +743,7 @@ class Olympus:
     Raises:
       OlympusCommError: Error in communication
     """
-    register_array = Array('B', [0x00, 0x00, 0x00, 0x00])
-    register_array[0]  = (value >> 24) & 0xFF
-    register_array[1]  = (value >> 16) & 0xFF
-    register_array[2]  = (value >> 8) & 0xFF
-    register_array[3]  = (value) & 0xFF
-    self.write(device_id, address, register_array)
+    self.write_words(device_id, address, [value & 0xFFFFFFFF])
 
   def set_register_bit(self, device_id, address, bit):
     """set_register_bit
@@ -271,14 +809,22 @@ class Olympus:
     return ((register & bit_mask) > 0)
 
 
-  def write_memory(self, address, data):
+  def write_memory(self, address, data, progress = None):
     """write_memory
 
     Writes the byte of array of bytes down to the memory of the bus
 
+    Large writes are split into packets of memory_packet_words and
+    memory_pipeline_depth packets are sent at a time, the data is not copied
+    until it is packed into a packet
+
     Args:
       address: Starting location of memory to write to
-      data: A byte array of raw values to write to the memory
+      data: Raw values to write to the memory, any object that supports the
+        buffer protocol (string, bytearray, array, mmap, numpy array), the
+        last word is padded with zeros
+      progress: function called with (bytes written, total bytes) after each
+        group of packets
 
     Returns:
       Nothing
@@ -286,7 +832,24 @@ class Olympus:
     Raises:
       OlympusCommError: Error in communication
     """
-    self.write(0, address, data, mem_device = True)
+    view, total = _byte_view(data)
+    packet_size = self.memory_packet_words * 4
+    position = 0
+    with self.lock:
+      while position < total:
+        count = 0
+        while position < total and count < self.memory_pipeline_depth:
+          chunk = _byte_slice(view, position, packet_size)
+          if (len(chunk) % 4) != 0:
+            chunk = bytearray(chunk) + bytearray(4 - (len(chunk) % 4))
+          self.queue_write(0, address + (position / 4), chunk,
+                           mem_device = True)
+          position += packet_size
+          count += 1
+        self.flush_queue()
+
+        if progress is not None:
+          progress(min(position, total), total)
 
   def write(self, device_id, address, data = None, mem_device = False):
     """write
@@ -310,11 +873,207 @@ class Olympus:
     raise AssertionError("write function is not implemented")
 
 
+  def queue_read(self, device_id, address, length = 1, mem_device = False,
+                 callback = None):
+    """queue_read
+
+    Queue a read request, the read is not sent to Olympus until flush_queue
+    is called or the queue is full
+
+    Args:
+      device_id: Device identification number, found in the DRT
+      address: Address of the register/memory to read
+      length: Number of 32 bit words to read from the FPGA
+      mem_device: True if the device is on the memory bus
+      callback: function to call with the request when it is resolved
+
+    Returns:
+      OlympusRequest: the result() of the request is the raw byte array
+
+    Raises:
+      OlympusCommError: Error in communication (if the queue was flushed)
+    """
+    request = OlympusRequest(OlympusRequest.READ, device_id, address,
+                             length = length,
+                             mem_device = mem_device,
+                             callback = callback)
+    return self._queue_request(request)
+
+  def queue_write(self, device_id, address, data, mem_device = False,
+                  callback = None):
+    """queue_write
+
+    Queue a write request, the write is not sent to Olympus until flush_queue
+    is called or the queue is full
+
+    Args:
+      device_id: Device identification number, found in the DRT
+      address: Address of the register/memory to write
+      data: Array of raw bytes to send to the device
+      mem_device: True if the device is on the memory bus
+      callback: function to call with the request when it is resolved
+
+    Returns:
+      OlympusRequest
+
+    Raises:
+      OlympusCommError: Error in communication (if the queue was flushed)
+    """
+    request = OlympusRequest(OlympusRequest.WRITE, device_id, address,
+                             length = len(data) / 4,
+                             data = data,
+                             mem_device = mem_device,
+                             callback = callback)
+    return self._queue_request(request)
+
+  def _queue_request(self, request):
+    with self.lock:
+      self.request_queue.append(request)
+      if len(self.request_queue) >= self.max_queue_depth:
+        self.flush_queue()
+    return request
+
+  def flush_queue(self):
+    """flush_queue
+
+    Send all the queued requests to Olympus and resolve them in order
+
+    This implementation sends each request one at a time with read and write,
+    a board specific implementation can override this to send all the
+    requests at once
+
+    Args:
+      Nothing
+
+    Returns:
+      Nothing
+
+    Raises:
+      OlympusCommError: Error in communication, the failed request and all
+      requests behind it are resolved with the error
+    """
+    with self.lock:
+      requests = self.request_queue
+      self.request_queue = []
+      for i in range (0, len(requests)):
+        request = requests[i]
+        start = time.time()
+        try:
+          if request.command == OlympusRequest.READ:
+            response = self.read(request.device_id,
+                                 request.address,
+                                 request.length,
+                                 mem_device = request.mem_device)
+          else:
+            self.write(request.device_id,
+                       request.address,
+                       request.data,
+                       mem_device = request.mem_device)
+            response = None
+        except OlympusCommError, err:
+          for r in requests[i:]:
+            r.set_error(err)
+          raise
+
+        self._record_request(request, time.time() - start)
+        request.set_result(response)
+
+  def _record_request(self, request, latency):
+    """add a resolved read or write to the statistics"""
+    operation = "write"
+    if request.command == OlympusRequest.READ:
+      operation = "read"
+    device_id = request.device_id
+    if request.mem_device:
+      device_id = "memory"
+    self.statistics.record(operation, device_id, request.length * 4, latency)
+
+  def stats(self):
+    """stats
+
+    Returns the statistics of the transactions on this interface
+
+    Args:
+      Nothing
+
+    Returns:
+      dictionary of counters (see TransactionStats.snapshot), the latency
+      of each operation is broken down by device id and payload size, the
+      counters of the wait strategies are under 'wait'
+
+    Raises:
+      Nothing
+    """
+    extra = self._transport_stats()
+    extra["wait"] = dict([(operation, strategy.stats()) for
+                          operation, strategy in self.wait_strategies.items()])
+    return self.statistics.snapshot(extra)
+
+  def _transport_stats(self):
+    """counters specific to the communication method, override to add them"""
+    return {}
+
+  def reset_stats(self):
+    """reset_stats
+
+    Clear the transaction statistics and the wait strategy counters
+
+    Args:
+      Nothing
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    self.statistics.reset()
+    for strategy in self.wait_strategies.values():
+      strategy.reset_stats()
+
+  def start_stats_dump(self, interval = 10, stream = None):
+    """start_stats_dump
+
+    Periodically write the statistics (as a line of JSON) to a stream
+
+    Args:
+      interval: time in seconds between dumps
+      stream: file to write to, sys.stdout if None
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    self.statistics.start_dump(self.stats, interval, stream)
+
+  def stop_stats_dump(self):
+    """stop_stats_dump
+
+    Stop the periodic dump of the statistics
+
+    Args:
+      Nothing
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    self.statistics.stop_dump()
+
   def read_drt(self):
     """read_drt
       
     Read the contents of the DRT
 
+    When the board can be identified only the header is read if the DRT is
+    in the cache, the header holds a hash of the devices (see drt_cache) and
+    the cached DRT is used when the header matches. Otherwise the header
+    gives the size of the table and the whole table is read
+
     Args:
       Nothing
 
@@ -324,13 +1083,51 @@ class Olympus:
     Raises:
       OlympusCommError: When a failure of communication is detected
     """
-    data = Array('B')
-    data = self.read(0, 0, 8)
-    num_of_devices  = drt_controller.get_number_of_devices(data)
+    identity = self.get_board_identity()
+    entries = None
+    if identity is not None and self.drt_cache is not None:
+      entries = self.drt_cache.load()
+
+    header = self.read(0, 0, DRT_HEADER_WORDS)
+    #an image without the hash of the devices can not be validated
+    if get_table_hash(header) == 0:
+      entries = None
+
+    if entries is not None:
+      drt = self.drt_cache.lookup(identity, fingerprint(header), entries)
+      if drt is not None:
+        if self.debug:
+          print "DRT of %s found in the cache" % identity
+        self.drt_manager.set_drt(drt)
+        return
+
+    num_of_devices  = drt_controller.get_number_of_devices(header)
     len_to_read = num_of_devices * 8
-
     data = self.read(0, 0, len_to_read + 8)
+
     self.drt_manager.set_drt(data)
+    #the header is only trusted to stand for the devices read with it
+    if entries is not None and check_table_hash(data):
+      self.drt_cache.store(identity, fingerprint(data), data, entries)
+
+  def get_board_identity(self):
+    """get_board_identity
+
+    Returns a string that identifies the board (USB IDs and serial number),
+    the DRT cache is keyed by it, must be overriden by a class that can
+    identify its board
+
+    Args:
+      Nothing
+
+    Returns:
+      string
+      None if the board cannot be identified (the DRT is not cached)
+
+    Raises:
+      Nothing
+    """
+    return None
 
   def pretty_print_drt(self):
     """pretty_print_drt
@@ -434,6 +1231,25 @@ class Olympus:
     """
     return self.drt_manager.is_memory_device(device_index)
 
+  def find_devices(self, device_type, memory_device = None):
+    """find_devices
+
+    Returns the indexes of all the devices of a type found on the DRT
+
+    Args:
+      device_type: Standard device ID
+      memory_device: True: only devices on the memory bus
+                     False: only devices on the peripheral bus
+                     None: devices on both busses
+
+    Returns:
+      tuple of device indexes (empty if there are no devices of the type)
+
+    Raises:
+      Nothing
+    """
+    return self.drt_manager.find_devices(device_type, memory_device)
+
   def get_total_memory_size(self):
     """get_total_memory_size
 
@@ -546,3 +1362,112 @@ class Olympus:
       return True
     return False
 
+  def on_interrupt(self, device_id, handler):
+    """on_interrupt
+
+    Register a function to call when a device interrupts, the function is
+    called from the interrupt dispatcher thread with the device_id
+
+    Args:
+      device_id: device to listen to
+      handler: function that takes the device_id
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    with self.lock:
+      self.interrupt_handlers.setdefault(device_id, []).append(handler)
+
+  def remove_interrupt_handler(self, device_id, handler):
+    """remove_interrupt_handler
+
+    Remove a function registered with on_interrupt
+
+    Args:
+      device_id: device the function was registered for
+      handler: function to remove
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    with self.lock:
+      handlers = self.interrupt_handlers.get(device_id, [])
+      if handler in handlers:
+        handlers.remove(handler)
+
+  def start_interrupt_dispatcher(self):
+    """start_interrupt_dispatcher
+
+    Start a thread that waits for interrupts and calls the functions
+    registered with on_interrupt, the application can keep using the
+    interface while the thread is running
+
+    The dispatcher takes the interrupts that are received so
+    wait_for_interrupts should not be used while it is running
+
+    Args:
+      Nothing
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    if self.dispatcher is not None:
+      return
+    self.dispatcher = threading.Thread(target = self._dispatch_interrupts)
+    self.dispatcher.daemon = True
+    self.dispatcher.start()
+
+  def stop_interrupt_dispatcher(self):
+    """stop_interrupt_dispatcher
+
+    Stop the interrupt dispatcher thread
+
+    Args:
+      Nothing
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    dispatcher = self.dispatcher
+    self.dispatcher = None
+    if dispatcher is not None and dispatcher is not threading.current_thread():
+      dispatcher.join()
+
+  def _dispatch_interrupts(self):
+    while self.dispatcher is threading.current_thread():
+      try:
+        if not self.wait_for_interrupts(wait_time = self.interrupt_poll):
+          continue
+      except OlympusCommError, err:
+        if self.debug:
+          print "Interrupt dispatcher: %s" % str(err)
+        continue
+
+      interrupts = self.interrupts
+      with self.lock:
+        handlers = []
+        for device_id in self.interrupt_handlers.keys():
+          if ((1 << device_id) & interrupts) > 0:
+            for handler in self.interrupt_handlers[device_id]:
+              handlers.append((device_id, handler))
+
+      #the handlers are called without the lock held so they can use the
+      #interface
+      for device_id, handler in handlers:
+        try:
+          handler(device_id)
+        except Exception, err:
+          print "Interrupt handler for device %d failed: %s" % (device_id, str(err))
+
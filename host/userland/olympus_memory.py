@@ -0,0 +1,394 @@
+#Distributed under the MIT licesnse.
+#Copyright (c) 2011 Dave McCoy (dave.mccoy@cospandesign.com)
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy of
+#this software and associated documentation files (the "Software"), to deal in
+#the Software without restriction, including without limitation the rights to
+#use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+#of the Software, and to permit persons to whom the Software is furnished to do
+#so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+""" olympus_memory
+
+Byte addressable view of the memory bus of an Olympus image
+
+The memory is read and written a page at a time through an LRU page cache,
+sequential access reads the following pages ahead of time and written pages
+are only sent to the image when they are evicted or flush is called
+
+"""
+
+__author__ = 'dave.mccoy@cospandesign.com (Dave McCoy)'
+
+import os
+from collections import OrderedDict
+
+
+class OlympusMemory:
+  """OlympusMemory
+
+  Buffer like view of the memory bus, supports len, indexing, slicing and the
+  file interface (seek, tell, read, readinto, write)
+
+  Byte offset 'n' of the view is in the 32-bit word at 'base + n / 4' of the
+  memory bus (big endian, like read_memory/write_memory)
+  """
+
+  def __init__(self, olympus, size = None, base = 0, page_size = 4096,
+               cache_pages = 64, read_ahead = 4):
+    """__init__
+
+    Args:
+      olympus: Olympus interface
+      size: number of bytes in the view, if None the total memory size from
+        the DRT (in 32-bit words) is used
+      base: address of the first word on the memory bus
+      page_size: number of bytes in a page, multiple of 4
+      cache_pages: maximum number of pages in the cache
+      read_ahead: number of pages that are read after a page when the memory
+        is accessed sequentially
+
+    Returns:
+      Nothing
+
+    Raises:
+      ValueError: page_size is not a multiple of 4
+      DRTError: size is not specified and the DRT is not defined
+    """
+    if page_size <= 0 or (page_size % 4) != 0:
+      raise ValueError("page_size must be a multiple of 4")
+    if size is None:
+      size = olympus.get_total_memory_size() * 4
+
+    self.o = olympus
+    self.size = size
+    self.base = base
+    self.page_size = page_size
+    self.cache_pages = max(cache_pages, 1)
+    self.read_ahead = read_ahead
+    self.pages = OrderedDict()
+    self.dirty = set()
+    self.position = 0
+    self.last_page = None
+    self.hits = 0
+    self.misses = 0
+
+  def __len__(self):
+    return self.size
+
+  def __getitem__(self, index):
+    if isinstance(index, slice):
+      start, stop, step = index.indices(self.size)
+      if step == 1:
+        return self.read_bytes(start, max(stop - start, 0))
+      indexes = range(start, stop, step)
+      if len(indexes) == 0:
+        return bytearray()
+      low = min(indexes)
+      data = self.read_bytes(low, max(indexes) - low + 1)
+      return bytearray([data[i - low] for i in indexes])
+
+    if index < 0:
+      index += self.size
+    if index < 0 or index >= self.size:
+      raise IndexError("OlympusMemory index out of range")
+    return self.read_bytes(index, 1)[0]
+
+  def __setitem__(self, index, value):
+    if isinstance(index, slice):
+      start, stop, step = index.indices(self.size)
+      if step != 1:
+        raise ValueError("OlympusMemory only supports contiguous slices")
+      if len(value) != max(stop - start, 0):
+        raise ValueError("OlympusMemory can not be resized")
+      self.write_bytes(start, value)
+      return
+
+    if index < 0:
+      index += self.size
+    if index < 0 or index >= self.size:
+      raise IndexError("OlympusMemory index out of range")
+    self.write_bytes(index, bytearray([value]))
+
+  def seek(self, offset, whence = os.SEEK_SET):
+    """seek
+
+    Move the position of the file interface
+
+    Args:
+      offset: offset in bytes
+      whence: os.SEEK_SET, os.SEEK_CUR or os.SEEK_END
+
+    Returns:
+      The new position
+
+    Raises:
+      ValueError: The position is negative
+    """
+    if whence == os.SEEK_CUR:
+      offset += self.position
+    elif whence == os.SEEK_END:
+      offset += self.size
+    if offset < 0:
+      raise ValueError("Negative seek position %d" % offset)
+    self.position = offset
+    return self.position
+
+  def tell(self):
+    """tell
+
+    Returns the position of the file interface
+    """
+    return self.position
+
+  def read(self, size = -1):
+    """read
+
+    Read from the current position
+
+    Args:
+      size: number of bytes to read, -1 reads to the end of the memory
+
+    Returns:
+      bytearray of the data
+
+    Raises:
+      OlympusCommError: Error in communication
+    """
+    if size < 0:
+      size = self.size - self.position
+    data = self.read_bytes(self.position, max(min(size, self.size - self.position), 0))
+    self.position += len(data)
+    return data
+
+  def readinto(self, buf):
+    """readinto
+
+    Read from the current position into a writable buffer (bytearray,
+    memoryview, array)
+
+    Args:
+      buf: destination of the data, len(buf) bytes are read
+
+    Returns:
+      Number of bytes read
+
+    Raises:
+      OlympusCommError: Error in communication
+    """
+    view = memoryview(buf)
+    data = self.read(len(view))
+    view[:len(data)] = data
+    return len(data)
+
+  def write(self, data):
+    """write
+
+    Write at the current position, the data is written to the image when the
+    pages are evicted or when flush is called
+
+    Args:
+      data: bytes to write (any object that supports the buffer protocol)
+
+    Returns:
+      Number of bytes written
+
+    Raises:
+      OlympusCommError: Error in communication
+      ValueError: The data goes past the end of the memory
+    """
+    data = bytearray(data)
+    self.write_bytes(self.position, data)
+    self.position += len(data)
+    return len(data)
+
+  def memoryview(self, start = 0, stop = None):
+    """memoryview
+
+    Returns a memoryview of a copy of a region of the memory
+
+    Args:
+      start: first byte
+      stop: byte after the last byte, None for the end of the memory
+
+    Returns:
+      memoryview
+
+    Raises:
+      OlympusCommError: Error in communication
+    """
+    if stop is None:
+      stop = self.size
+    return memoryview(self[start: stop])
+
+  def read_bytes(self, offset, size):
+    """read_bytes
+
+    Read a region of the memory through the page cache
+
+    Args:
+      offset: first byte
+      size: number of bytes
+
+    Returns:
+      bytearray of the data
+
+    Raises:
+      OlympusCommError: Error in communication
+      ValueError: The region goes past the end of the memory
+    """
+    self._check_region(offset, size)
+    data = bytearray()
+    while size > 0:
+      index = offset / self.page_size
+      page_offset = offset % self.page_size
+      page = self._get_page(index)
+      count = min(size, len(page) - page_offset)
+      data += page[page_offset: page_offset + count]
+      offset += count
+      size -= count
+    return data
+
+  def write_bytes(self, offset, data):
+    """write_bytes
+
+    Write a region of the memory through the page cache, the pages are
+    marked dirty and written back by flush
+
+    Args:
+      offset: first byte
+      data: bytes to write
+
+    Returns:
+      Nothing
+
+    Raises:
+      OlympusCommError: Error in communication
+      ValueError: The region goes past the end of the memory
+    """
+    view = memoryview(bytearray(data))
+    self._check_region(offset, len(view))
+    position = 0
+    while position < len(view):
+      index = offset / self.page_size
+      page_offset = offset % self.page_size
+      count = min(len(view) - position, self._page_length(index) - page_offset)
+      if page_offset == 0 and count == self._page_length(index) and index not in self.pages:
+        #the whole page is replaced, there is no need to read it
+        self._add_page(index, bytearray(view[position: position + count]))
+      else:
+        page = self._get_page(index)
+        page[page_offset: page_offset + count] = view[position: position + count]
+      self.dirty.add(index)
+      position += count
+      offset += count
+
+  def flush(self):
+    """flush
+
+    Write all the dirty pages to the image, consecutive pages are sent
+    together
+
+    Args:
+      Nothing
+
+    Returns:
+      Nothing
+
+    Raises:
+      OlympusCommError: Error in communication
+    """
+    indexes = sorted(self.dirty)
+    while len(indexes) > 0:
+      count = 1
+      while count < len(indexes) and indexes[count] == indexes[0] + count:
+        count += 1
+      data = bytearray()
+      for index in indexes[:count]:
+        data += self.pages[index]
+      self.o.write_memory(self._page_address(indexes[0]), data)
+      for index in indexes[:count]:
+        self.dirty.discard(index)
+      indexes = indexes[count:]
+
+  def invalidate(self):
+    """invalidate
+
+    Drop all the cached pages, dirty pages are written back first, use this
+    when the image may have modified the memory
+
+    Args:
+      Nothing
+
+    Returns:
+      Nothing
+
+    Raises:
+      OlympusCommError: Error in communication
+    """
+    self.flush()
+    self.pages = OrderedDict()
+    self.last_page = None
+
+  def _check_region(self, offset, size):
+    if offset < 0 or size < 0 or offset + size > self.size:
+      raise ValueError("Region 0x%X - 0x%X is outside of the memory (0x%X bytes)" %
+                       (offset, offset + size, self.size))
+
+  def _page_length(self, index):
+    return min(self.page_size, self.size - index * self.page_size)
+
+  def _page_address(self, index):
+    return self.base + (index * self.page_size) / 4
+
+  def _get_page(self, index):
+    if index in self.pages:
+      self.hits += 1
+      page = self.pages.pop(index)
+      self.pages[index] = page
+      self.last_page = index
+      return page
+
+    self.misses += 1
+    count = 1
+    if self.last_page is not None and index == self.last_page + 1:
+      #sequential access, read the following pages at the same time
+      last = (self.size - 1) / self.page_size
+      while count <= self.read_ahead and count < self.cache_pages and \
+          index + count <= last and (index + count) not in self.pages:
+        count += 1
+
+    length = 0
+    for i in range (index, index + count):
+      length += self._page_length(i)
+    data = self.o.read_memory(self._page_address(index), (length + 3) / 4)
+    data = bytearray(data)
+    position = 0
+    for i in range (index, index + count):
+      self._add_page(i, data[position: position + self._page_length(i)])
+      position += self._page_length(i)
+
+    #the requested page is the most recently used
+    page = self.pages.pop(index)
+    self.pages[index] = page
+    self.last_page = index
+    return page
+
+  def _add_page(self, index, page):
+    self.pages[index] = page
+    while len(self.pages) > self.cache_pages:
+      old_index, old_page = self.pages.popitem(last = False)
+      if old_index in self.dirty:
+        self.o.write_memory(self._page_address(old_index), old_page)
+        self.dirty.discard(old_index)
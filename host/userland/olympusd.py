@@ -0,0 +1,1027 @@
+#Distributed under the MIT licesnse.
+#Copyright (c) 2011 Dave McCoy (dave.mccoy@cospandesign.com)
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy of
+#this software and associated documentation files (the "Software"), to deal in
+#the Software without restriction, including without limitation the rights to
+#use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+#of the Software, and to permit persons to whom the Software is furnished to do
+#so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+""" olympusd
+
+Daemon that owns the connection to an Olympus board and lets several
+processes (test harness, logic analyzer, audio player) share it
+
+Clients connect over a Unix socket (or TCP for boards in a rack driven from
+other machines) and use OlympusClient, a normal Olympus interface. The
+daemon takes the requests of the clients in turn, a few requests from each
+client at a time, and sends them to the board together in one burst
+
+Client protocol:
+
+  Request: tag (4), op (1), device id (1), address (4), length (4),
+           memory bus (1), followed by the data of a write (length * 4)
+  Response: tag (4), status (1), payload length (4), followed by the
+            payload (read data, interrupts, statistics or an error message)
+
+  Requests are answered in the order they are sent, a client can send
+  several requests (up to its window) before reading the responses
+
+  A batch of small writes is sent as a single request (OP_WRITE_BATCH), the
+  address is the number of writes, the length is the number of bytes that
+  follow, each write is: device id (1), address (4, bit 31 set for the
+  memory bus), number of words (2), data, the batch has one response
+
+"""
+
+__author__ = 'dave.mccoy@cospandesign.com (Dave McCoy)'
+
+import os
+import sys
+import time
+import json
+import struct
+import socket
+import argparse
+import threading
+from array import array as Array
+
+sys.path.append(os.path.join(os.path.dirname(__file__), os.pardir))
+
+from userland.olympus import Olympus
+from userland.olympus import OlympusCommError
+
+DEFAULT_SOCKET      = "/tmp/olympusd.sock"
+DEFAULT_PORT        = 9594
+#seconds a client waits for a response before giving up on olympusd
+DEFAULT_TIMEOUT     = 10.0
+
+#tag, op, device id, address, length, memory bus
+REQUEST_HEADER      = struct.Struct(">IBBIIB")
+#tag, status, payload length
+RESPONSE_HEADER     = struct.Struct(">IBI")
+#device id, address, number of words
+BATCH_ENTRY         = struct.Struct(">BIH")
+BATCH_MEMORY_BUS    = 0x80000000
+
+OP_READ             = 0x01
+OP_WRITE            = 0x02
+OP_PING             = 0x03
+OP_RESET            = 0x04
+#the address is the time to wait in milliseconds
+OP_INTERRUPTS       = 0x05
+OP_STATS            = 0x06
+#the address is the number of writes, the length the number of bytes
+OP_WRITE_BATCH      = 0x07
+
+STATUS_OK           = 0x00
+STATUS_ERROR        = 0x01
+
+
+def _recv_all(sock, size):
+  """read exactly size bytes from a socket, None if the socket was closed"""
+  chunks = []
+  while size > 0:
+    data = sock.recv(size)
+    if len(data) == 0:
+      return None
+    chunks.append(data)
+    size -= len(data)
+  return "".join(chunks)
+
+
+def _write_words(data):
+  """number of 32-bit words in the data of a write, the packets only carry
+  whole words, other data would desync the connection"""
+  if len(data) % 4 != 0:
+    raise OlympusCommError("Write data must be a multiple of 4 bytes, got %d bytes" %
+                           len(data))
+  return len(data) / 4
+
+
+def parse_address(address):
+  """parse_address
+
+  Decode the address of olympusd
+
+  Args:
+    address: path of a Unix socket, a (host, port) tuple or a "host:port"
+      string
+
+  Returns:
+    path of the Unix socket (string) or (host, port) tuple
+
+  Raises:
+    Nothing
+  """
+  if isinstance(address, tuple):
+    return address
+  if (":" in address) and (os.sep not in address):
+    host, port = address.rsplit(":", 1)
+    return (host, int(port))
+  return address
+
+
+def pack_batch(writes):
+  """pack_batch
+
+  Pack a group of writes into the payload of an OP_WRITE_BATCH request
+
+  Args:
+    writes: list of (device_id, address, data, mem_device) tuples, data is
+      the raw bytes to write
+
+  Returns:
+    string
+
+  Raises:
+    OlympusCommError: the data of a write is not a multiple of 4 bytes
+  """
+  chunks = []
+  for device_id, address, data, mem_device in writes:
+    if not isinstance(data, str):
+      data = str(bytearray(data))
+    if mem_device:
+      address |= BATCH_MEMORY_BUS
+    chunks.append(BATCH_ENTRY.pack(device_id & 0xFF, address & 0xFFFFFFFF,
+                                   _write_words(data)))
+    chunks.append(data)
+  return "".join(chunks)
+
+
+def unpack_batch(payload):
+  """unpack_batch
+
+  Decode the payload of an OP_WRITE_BATCH request
+
+  Args:
+    payload: string
+
+  Returns:
+    list of (device_id, address, data, mem_device) tuples, data is an array
+    of bytes
+
+  Raises:
+    Nothing
+  """
+  writes = []
+  position = 0
+  while position + BATCH_ENTRY.size <= len(payload):
+    device_id, address, length = BATCH_ENTRY.unpack_from(payload, position)
+    position += BATCH_ENTRY.size
+    data = Array('B', payload[position: position + length * 4])
+    position += length * 4
+    writes.append((device_id, address & ~BATCH_MEMORY_BUS, data,
+                   (address & BATCH_MEMORY_BUS) > 0))
+  return writes
+
+
+class _DaemonRequest:
+  """a request received from a client"""
+
+  def __init__(self, client, tag, op, device_id, address, length, mem_device,
+               data):
+    self.client = client
+    self.tag = tag
+    self.op = op
+    self.device_id = device_id
+    self.address = address
+    self.length = length
+    self.mem_device = mem_device
+    self.data = data
+    self.received = time.time()
+    self.deadline = None
+
+
+class _DaemonClient:
+  """connection and statistics of one client"""
+
+  def __init__(self, connection, client_id):
+    self.connection = connection
+    self.client_id = client_id
+    self.requests = []
+    #responses are sent together after each burst
+    self.responses = []
+    self.interrupt_waiters = []
+    self.pending_interrupts = 0
+    #time the oldest pending interrupt was received
+    self.pending_since = None
+    self.connected = time.time()
+    self.request_count = 0
+    self.bytes_read = 0
+    self.bytes_written = 0
+    self.total_latency = 0.0
+    self.max_latency = 0.0
+
+  def stats(self):
+    elapsed = max(time.time() - self.connected, 1e-6)
+    average_latency = 0.0
+    if self.request_count > 0:
+      average_latency = self.total_latency / self.request_count
+    return {"client": self.client_id,
+            "requests": self.request_count,
+            "bytes read": self.bytes_read,
+            "bytes written": self.bytes_written,
+            "throughput": (self.bytes_read + self.bytes_written) / elapsed,
+            "average latency": average_latency,
+            "max latency": self.max_latency}
+
+
+class OlympusDaemon:
+  """OlympusDaemon
+
+  Shares one Olympus interface between the clients connected to a Unix or
+  TCP socket
+  """
+
+  #largest number of requests taken from a client before moving to the next
+  client_burst = 16
+  #time to wait for an interrupt when a client is waiting for one
+  interrupt_poll = 0.01
+  #seconds the interrupts are kept for a client that is not waiting for
+  #them, older interrupts are dropped instead of being delivered stale
+  interrupt_hold = 1.0
+
+  def __init__(self, olympus, path = DEFAULT_SOCKET, debug = False):
+    """__init__
+
+    Args:
+      olympus: Olympus interface to share (Dionysus)
+      path: path of the Unix socket, or (host, port) to listen on TCP, see
+        parse_address
+      debug: print out debug messages
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    self.o = olympus
+    self.path = parse_address(path)
+    self.tcp = isinstance(self.path, tuple)
+    #address the socket is bound to (the TCP port is assigned when port 0 is
+    #requested)
+    self.address = None
+    self.debug = debug
+    self.clients = []
+    self.client_count = 0
+    self.work = threading.Condition()
+    self.running = False
+    self.listener = None
+    self.threads = []
+
+  def start(self):
+    """start
+
+    Open the socket and start the threads that serve the clients
+
+    Args:
+      Nothing
+
+    Returns:
+      Nothing
+
+    Raises:
+      socket.error: The socket could not be opened
+    """
+    if self.tcp:
+      self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+      self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    else:
+      if os.path.exists(self.path):
+        os.remove(self.path)
+      self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    self.listener.bind(self.path)
+    self.address = self.listener.getsockname()
+    self.listener.listen(5)
+    #wake up periodically to see if the daemon was stopped
+    self.listener.settimeout(0.1)
+    self.running = True
+    for target in [self._accept, self._schedule]:
+      thread = threading.Thread(target = target)
+      thread.daemon = True
+      thread.start()
+      self.threads.append(thread)
+
+  def stop(self):
+    """stop
+
+    Stop serving the clients and close the socket
+
+    Args:
+      Nothing
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    with self.work:
+      self.running = False
+      self.work.notify_all()
+    for thread in self.threads:
+      thread.join()
+    self.threads = []
+    for client in self.clients:
+      client.connection.close()
+    self.listener.close()
+    if not self.tcp and os.path.exists(self.path):
+      os.remove(self.path)
+
+  def serve_forever(self):
+    """serve_forever
+
+    Serve the clients until the process is interrupted
+
+    Args:
+      Nothing
+
+    Returns:
+      Nothing
+
+    Raises:
+      socket.error: The socket could not be opened
+    """
+    self.start()
+    try:
+      while True:
+        time.sleep(1)
+    except KeyboardInterrupt:
+      pass
+    self.stop()
+
+  def get_stats(self):
+    """get_stats
+
+    Returns the throughput (bytes/second) and latency (seconds) of each
+    connected client
+
+    Args:
+      Nothing
+
+    Returns:
+      list of dictionaries, one for each client
+
+    Raises:
+      Nothing
+    """
+    with self.work:
+      return [client.stats() for client in self.clients]
+
+  def _accept(self):
+    while self.running:
+      try:
+        connection, address = self.listener.accept()
+      except socket.timeout:
+        continue
+      except socket.error:
+        break
+
+      connection.settimeout(None)
+      if self.tcp:
+        #the responses are already grouped, do not wait for more data
+        connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+      with self.work:
+        self.client_count += 1
+        client = _DaemonClient(connection, self.client_count)
+        self.clients.append(client)
+      if self.debug:
+        print "olympusd: client %d connected" % client.client_id
+      thread = threading.Thread(target = self._read_client, args = (client,))
+      thread.daemon = True
+      thread.start()
+
+  def _read_client(self, client):
+    while self.running:
+      try:
+        header = _recv_all(client.connection, REQUEST_HEADER.size)
+        if header is None:
+          break
+        tag, op, device_id, address, length, mem_device = REQUEST_HEADER.unpack(header)
+        data = None
+        if op == OP_WRITE:
+          data = _recv_all(client.connection, length * 4)
+          if data is None:
+            break
+          data = Array('B', data)
+        elif op == OP_WRITE_BATCH:
+          data = _recv_all(client.connection, length)
+          if data is None:
+            break
+          data = unpack_batch(data)
+      except socket.error:
+        break
+
+      request = _DaemonRequest(client, tag, op, device_id, address, length,
+                               mem_device > 0, data)
+      with self.work:
+        client.requests.append(request)
+        self.work.notify()
+
+    if self.debug:
+      print "olympusd: client %d disconnected" % client.client_id
+    with self.work:
+      if client in self.clients:
+        self.clients.remove(client)
+    client.connection.close()
+
+  def _next_batch(self):
+    """take a few requests from each client in turn"""
+    with self.work:
+      while self.running:
+        batch = []
+        for client in self.clients:
+          batch.extend(client.requests[:self.client_burst])
+          del client.requests[:self.client_burst]
+        waiting = len([c for c in self.clients if len(c.interrupt_waiters) > 0]) > 0
+        if len(batch) > 0 or waiting:
+          #start with the next client the next time around
+          if len(self.clients) > 1:
+            self.clients.append(self.clients.pop(0))
+          return batch
+        self.work.wait(0.1)
+    return []
+
+  def _schedule(self):
+    while self.running:
+      batch = self._next_batch()
+      for request in batch:
+        if request.op in [OP_READ, OP_WRITE]:
+          self._queue(request)
+
+        elif request.op == OP_WRITE_BATCH:
+          self._queue_batch(request)
+
+        elif request.op == OP_INTERRUPTS:
+          request.deadline = request.received + request.address / 1000.0
+          request.client.interrupt_waiters.append(request)
+
+        else:
+          #everything that was queued in front of it is sent first
+          self._flush()
+          self._execute(request)
+
+      self._flush()
+      if len(batch) == 0:
+        self._check_interrupts()
+      self._send_responses()
+
+  def _queue(self, request):
+    """queue a read or a write, the interface sends its queue when it is
+    full so a failure of the board can be raised here"""
+    state = {"answered": False}
+    def complete(olympus_request):
+      state["answered"] = True
+      if olympus_request.error is not None:
+        self._respond(request, STATUS_ERROR, str(olympus_request.error))
+      elif request.op == OP_READ:
+        self._respond(request, STATUS_OK, olympus_request.response)
+      else:
+        self._respond(request, STATUS_OK)
+
+    try:
+      if request.op == OP_READ:
+        self.o.queue_read(request.device_id, request.address, request.length,
+                          mem_device = request.mem_device,
+                          callback = complete)
+      else:
+        self.o.queue_write(request.device_id, request.address, request.data,
+                           mem_device = request.mem_device,
+                           callback = complete)
+    except OlympusCommError, err:
+      #the requests that were sent were answered by their callbacks
+      if self.debug:
+        print "olympusd: %s" % str(err)
+      if not state["answered"]:
+        self._respond(request, STATUS_ERROR, str(err))
+
+  def _queue_batch(self, request):
+    """queue the writes of a batch, the batch is answered when the last write
+    is resolved"""
+    state = {"remaining": len(request.data), "error": None, "answered": False}
+    def answer():
+      state["answered"] = True
+      if state["error"] is not None:
+        self._respond(request, STATUS_ERROR, str(state["error"]))
+      else:
+        self._respond(request, STATUS_OK)
+
+    def complete(olympus_request):
+      if olympus_request.error is not None and state["error"] is None:
+        state["error"] = olympus_request.error
+      state["remaining"] -= 1
+      if state["remaining"] == 0 and not state["answered"]:
+        answer()
+
+    if len(request.data) == 0:
+      answer()
+      return
+    try:
+      for device_id, address, data, mem_device in request.data:
+        self.o.queue_write(device_id, address, data, mem_device = mem_device,
+                           callback = complete)
+    except OlympusCommError, err:
+      #the writes behind the failure were never queued, answer the batch now
+      if self.debug:
+        print "olympusd: %s" % str(err)
+      if state["error"] is None:
+        state["error"] = err
+      if not state["answered"]:
+        answer()
+
+  def _flush(self):
+    try:
+      self.o.flush_queue()
+    except OlympusCommError, err:
+      #the failed requests were already answered with the error
+      if self.debug:
+        print "olympusd: %s" % str(err)
+
+  def _execute(self, request):
+    try:
+      if request.op == OP_PING:
+        self.o.ping()
+        self._respond(request, STATUS_OK)
+      elif request.op == OP_RESET:
+        self.o.reset()
+        self._respond(request, STATUS_OK)
+      elif request.op == OP_STATS:
+        self._respond(request, STATUS_OK, json.dumps(self.get_stats()))
+      else:
+        self._respond(request, STATUS_ERROR, "Unknown request: %d" % request.op)
+    except OlympusCommError, err:
+      self._respond(request, STATUS_ERROR, str(err))
+
+  def _check_interrupts(self):
+    interrupts = 0
+    try:
+      if self.o.wait_for_interrupts(wait_time = self.interrupt_poll):
+        interrupts = self.o.interrupts
+    except OlympusCommError, err:
+      if self.debug:
+        print "olympusd: %s" % str(err)
+
+    now = time.time()
+    with self.work:
+      clients = list(self.clients)
+    for client in clients:
+      if client.pending_since is not None and \
+          now - client.pending_since > self.interrupt_hold:
+        #nobody asked for them in time
+        client.pending_interrupts = 0
+        client.pending_since = None
+      if interrupts != 0:
+        if client.pending_interrupts == 0:
+          client.pending_since = now
+        client.pending_interrupts |= interrupts
+      waiters = []
+      for request in client.interrupt_waiters:
+        if client.pending_interrupts != 0:
+          self._respond(request, STATUS_OK,
+                        struct.pack(">I", client.pending_interrupts))
+        elif now >= request.deadline:
+          self._respond(request, STATUS_OK, struct.pack(">I", 0))
+        else:
+          waiters.append(request)
+      if len(waiters) < len(client.interrupt_waiters):
+        client.pending_interrupts = 0
+        client.pending_since = None
+      client.interrupt_waiters = waiters
+
+  def _respond(self, request, status, payload = ""):
+    client = request.client
+    if not isinstance(payload, str):
+      payload = payload.tostring()
+
+    latency = time.time() - request.received
+    client.request_count += 1
+    client.total_latency += latency
+    client.max_latency = max(client.max_latency, latency)
+    if request.op == OP_READ and status == STATUS_OK:
+      client.bytes_read += len(payload)
+    elif request.op == OP_WRITE and status == STATUS_OK:
+      client.bytes_written += len(request.data)
+    elif request.op == OP_WRITE_BATCH and status == STATUS_OK:
+      client.bytes_written += sum([len(w[2]) for w in request.data])
+
+    client.responses.append(RESPONSE_HEADER.pack(request.tag, status, len(payload)))
+    client.responses.append(payload)
+
+  def _send_responses(self):
+    """send the responses of each client with as few writes as possible"""
+    with self.work:
+      clients = list(self.clients)
+    for client in clients:
+      if len(client.responses) == 0:
+        continue
+      data = "".join(client.responses)
+      client.responses = []
+      try:
+        client.connection.sendall(data)
+      except socket.error:
+        #the reader thread will clean up the client
+        pass
+
+
+class OlympusClient(Olympus):
+  """OlympusClient
+
+  Olympus interface that talks to a board through olympusd
+  """
+
+  #largest number of requests sent before waiting for a response, the
+  #network round trip is paid once per window instead of once per request
+  window = 64
+  #send consecutive small writes of a flush as a single request
+  batch_writes = False
+  #largest write (in 32-bit words) that is put in a batch
+  batch_write_words = 16
+  #largest number of writes in a batch
+  max_batch = 64
+
+  def __init__(self, path = DEFAULT_SOCKET, debug = False,
+               timeout = DEFAULT_TIMEOUT):
+    """__init__
+
+    Args:
+      path: path of the olympusd Unix socket, or (host, port) of an olympusd
+        listening on TCP, see parse_address
+      debug: print out debug messages
+      timeout: seconds to wait for a response (and to connect) before
+        raising OlympusCommError, None to wait forever
+
+    Returns:
+      Nothing
+
+    Raises:
+      OlympusCommError: Could not connect to olympusd
+    """
+    Olympus.__init__(self, debug)
+    self.name = "OlympusClient"
+    self.tag = 0
+    self.timeout = timeout
+    path = parse_address(path)
+    try:
+      if isinstance(path, tuple):
+        self.sock = socket.create_connection(path, timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+      else:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(path)
+    except socket.error, err:
+      raise OlympusCommError("Could not connect to olympusd at %s: %s" % (path, str(err)))
+
+  def __del__(self):
+    if hasattr(self, "sock"):
+      self.sock.close()
+
+  def close(self):
+    """close
+
+    Disconnect from olympusd
+
+    Args:
+      Nothing
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    self.sock.close()
+
+  def _send(self, op, device_id = 0, address = 0, length = 0,
+            mem_device = False, data = None):
+    self.tag = (self.tag + 1) & 0xFFFFFFFF
+    packet = REQUEST_HEADER.pack(self.tag, op, device_id & 0xFF,
+                                 address & 0xFFFFFFFF, length,
+                                 int(mem_device))
+    if data is not None:
+      if not isinstance(data, str):
+        data = str(bytearray(data))
+      packet += data
+    try:
+      self.sock.sendall(packet)
+    except socket.error, err:
+      raise OlympusCommError("Lost the connection to olympusd: %s" % str(err))
+    return self.tag
+
+  def _receive(self, tag):
+    try:
+      header = _recv_all(self.sock, RESPONSE_HEADER.size)
+      if header is None:
+        raise OlympusCommError("olympusd closed the connection")
+      rsp_tag, status, length = RESPONSE_HEADER.unpack(header)
+      payload = ""
+      if length > 0:
+        payload = _recv_all(self.sock, length)
+        if payload is None:
+          raise OlympusCommError("olympusd closed the connection")
+    except socket.timeout:
+      #a late response would be taken for the answer of the next request
+      timeout = self.sock.gettimeout()
+      self.sock.close()
+      raise OlympusCommError("No response from olympusd in %s seconds, disconnected" %
+                             str(timeout))
+    except socket.error, err:
+      raise OlympusCommError("Lost the connection to olympusd: %s" % str(err))
+
+    if rsp_tag != tag:
+      raise OlympusCommError("Response out of order: expected %d got %d" % (tag, rsp_tag))
+    if status != STATUS_OK:
+      raise OlympusCommError(payload)
+    return payload
+
+  def read(self, device_id, address, length = 1, mem_device = False):
+    """read
+
+    read data from the Olympus image through olympusd
+
+    Args:
+      device_id: Device identification number, found in the DRT
+      address: Address of the register/memory to read
+      length: Number of 32 bit words to read from the FPGA
+      mem_device: True if the device is on the memory bus
+
+    Returns:
+      A byte array containing the raw data returned from Olympus
+
+    Raises:
+      OlympusCommError
+    """
+    with self.lock:
+      tag = self._send(OP_READ, device_id, address, length, mem_device)
+      return Array('B', self._receive(tag))
+
+  def write(self, device_id, address, data = None, mem_device = False):
+    """write
+
+    Write data to an Olympus image through olympusd
+
+    Args:
+      device_id: Device identification number, found in the DRT
+      address: Address of the register/memory to write
+      data: Array of raw bytes to send to the device
+      mem_device: True if the device is on the memory bus
+
+    Returns:
+      Nothing
+
+    Raises:
+      OlympusCommError: Error in communication or the data is not a multiple
+      of 4 bytes (nothing is sent)
+    """
+    length = _write_words(data)
+    with self.lock:
+      tag = self._send(OP_WRITE, device_id, address, length,
+                       mem_device, data)
+      self._receive(tag)
+
+  def queue_write(self, device_id, address, data, mem_device = False,
+                  callback = None):
+    """queue_write
+
+    Queue a write request, the data is checked before it is queued so a bad
+    write does not fail the other requests of the flush
+
+    Args:
+      device_id: Device identification number, found in the DRT
+      address: Address of the register/memory to write
+      data: Array of raw bytes to send to the device
+      mem_device: True if the device is on the memory bus
+      callback: function to call with the request when it is resolved
+
+    Returns:
+      OlympusRequest
+
+    Raises:
+      OlympusCommError: Error in communication (if the queue was flushed) or
+      the data is not a multiple of 4 bytes (nothing is queued)
+    """
+    _write_words(data)
+    return Olympus.queue_write(self, device_id, address, data, mem_device,
+                               callback)
+
+  def flush_queue(self):
+    """flush_queue
+
+    Send the queued requests to olympusd without waiting for the responses,
+    up to 'window' requests are outstanding at a time, when batch_writes is
+    set consecutive small writes are sent as a single request
+
+    Args:
+      Nothing
+
+    Returns:
+      Nothing
+
+    Raises:
+      OlympusCommError: Error in communication, the failed requests are
+      resolved with the error
+    """
+    with self.lock:
+      requests = self.request_queue
+      self.request_queue = []
+      #(tag, requests answered by the response)
+      outstanding = []
+      error = None
+      try:
+        for group in self._group_requests(requests):
+          if len(outstanding) >= self.window:
+            error = self._resolve(outstanding.pop(0), error)
+          outstanding.append((self._send_group(group), group))
+      except OlympusCommError, err:
+        #the connection is lost, nothing else will be answered
+        for request in requests:
+          if not request.done():
+            request.set_error(err)
+        raise
+
+      while len(outstanding) > 0:
+        error = self._resolve(outstanding.pop(0), error)
+
+      if error is not None:
+        raise error
+
+  def _group_requests(self, requests):
+    """split the requests into the groups sent as a single request"""
+    groups = []
+    for request in requests:
+      if self._batchable(request) and len(groups) > 0 and \
+          self._batchable(groups[-1][-1]) and len(groups[-1]) < self.max_batch:
+        groups[-1].append(request)
+        continue
+      groups.append([request])
+    return groups
+
+  def _batchable(self, request):
+    return self.batch_writes and request.command == request.WRITE and \
+           request.length <= self.batch_write_words
+
+  def _send_group(self, group):
+    request = group[0]
+    if len(group) > 1:
+      payload = pack_batch([(r.device_id, r.address, r.data, r.mem_device)
+                            for r in group])
+      return self._send(OP_WRITE_BATCH, address = len(group),
+                        length = len(payload), data = payload)
+    if request.command == request.READ:
+      return self._send(OP_READ, request.device_id, request.address,
+                        request.length, request.mem_device)
+    return self._send(OP_WRITE, request.device_id, request.address,
+                      request.length, request.mem_device, request.data)
+
+  def _resolve(self, sent, error):
+    """receive the response of a group of requests and resolve them, returns
+    the first error"""
+    tag, group = sent
+    try:
+      payload = self._receive(tag)
+    except OlympusCommError, err:
+      for request in group:
+        request.set_error(err)
+      if error is None:
+        error = err
+      return error
+    for request in group:
+      if request.command == request.READ:
+        request.set_result(Array('B', payload))
+      else:
+        request.set_result(None)
+    return error
+
+  def ping(self):
+    """ping
+
+    Pings the Olympus image
+
+    Args:
+      Nothing
+
+    Returns:
+      Nothing
+
+    Raises:
+      OlympusCommError
+    """
+    with self.lock:
+      self._receive(self._send(OP_PING))
+
+  def reset(self):
+    """reset
+
+    Software reset the Olympus FPGA Master
+
+    Args:
+      Nothing
+
+    Returns:
+      Nothing
+
+    Raises:
+      OlympusCommError
+    """
+    with self.lock:
+      self._receive(self._send(OP_RESET))
+      self.invalidate_registers()
+
+  def wait_for_interrupts(self, wait_time = 1):
+    """wait_for_interrupts
+
+    listen for interrupts for the specified amount of time
+
+    Args:
+      wait_time: the amount of time in seconds to wait for an interrupt
+
+    Returns:
+      True: Interrupts were detected
+      False: No interrupts detected
+
+    Raises:
+      OlympusCommError
+    """
+    with self.lock:
+      tag = self._send(OP_INTERRUPTS, address = int(wait_time * 1000))
+      #the daemon answers after the wait time
+      if self.timeout is not None:
+        self.sock.settimeout(self.timeout + wait_time)
+      try:
+        payload = self._receive(tag)
+      finally:
+        if self.timeout is not None:
+          try:
+            self.sock.settimeout(self.timeout)
+          except socket.error:
+            #the connection was closed
+            pass
+    interrupts = struct.unpack(">I", payload)[0]
+    if interrupts == 0:
+      return False
+    self.interrupts = interrupts
+    self._interrupts_received(interrupts)
+    self.pending_interrupts = 0
+    return True
+
+  def get_client_stats(self):
+    """get_client_stats
+
+    Returns the throughput (bytes/second) and latency (seconds) of all the
+    clients of olympusd
+
+    Args:
+      Nothing
+
+    Returns:
+      list of dictionaries, one for each client
+
+    Raises:
+      OlympusCommError
+    """
+    with self.lock:
+      return json.loads(self._receive(self._send(OP_STATS)))
+
+
+def main(argv):
+  parser = argparse.ArgumentParser(description = "Share an Olympus board between processes")
+  parser.add_argument("-s", "--socket", default = DEFAULT_SOCKET,
+                      help = "path of the Unix socket (default: %s)" % DEFAULT_SOCKET)
+  parser.add_argument("-t", "--tcp", metavar = "HOST:PORT",
+                      help = "listen on TCP instead of the Unix socket (port %d is the convention)" % DEFAULT_PORT)
+  parser.add_argument("-e", "--emulate", action = "store_true",
+                      help = "serve an emulated board")
+  parser.add_argument("-d", "--debug", action = "store_true",
+                      help = "print out debug messages")
+  args = parser.parse_args(argv)
+
+  address = args.socket
+  if args.tcp is not None:
+    address = parse_address(args.tcp)
+
+  if args.emulate:
+    from userland.emulator.board import emulated_dionysus
+    olympus = emulated_dionysus(debug = args.debug)
+  else:
+    from userland.dionysus.dionysus import Dionysus
+    olympus = Dionysus(debug = args.debug)
+  daemon = OlympusDaemon(olympus, address, debug = args.debug)
+  print "olympusd: serving %s" % str(address)
+  daemon.serve_forever()
+
+if __name__ == "__main__":
+  main(sys.argv[1:])
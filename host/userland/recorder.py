@@ -0,0 +1,379 @@
+#Distributed under the MIT licesnse.
+#Copyright (c) 2011 Dave McCoy (dave.mccoy@cospandesign.com)
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy of
+#this software and associated documentation files (the "Software"), to deal in
+#the Software without restriction, including without limitation the rights to
+#use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+#of the Software, and to permit persons to whom the Software is furnished to do
+#so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+""" recorder
+
+Binary log of the bytes sent to and received from a board and a device that
+replays a log
+
+The log starts with the 8 byte file header and is followed by records:
+
+  # TT TT TT TT TT TT TT TT DD NN NN NN NN <data>
+    # T = time the record was made, seconds since the epoch (double)
+    # D = direction: 'W' written to the board, 'R' read from the board,
+          'P' buffers purged
+    # N = number of data bytes
+
+The recorder wraps the FTDI device (or anything with the same read_data,
+write_data, purge_buffers interface), the records are put in a ring buffer
+and written to the file by a background thread so the link is not slowed
+down by the disk
+
+  oly.start_recording("session.olyrec")
+  ...
+  oly.stop_recording()
+
+  oly = Dionysus(dev = ReplayDevice("session.olyrec"))
+
+"""
+
+__author__ = 'dave.mccoy@cospandesign.com (Dave McCoy)'
+
+import time
+import struct
+import threading
+from collections import deque
+
+FILE_HEADER           = "OLYREC\x01\x00"
+#time, direction, length
+RECORD_HEADER         = struct.Struct(">dcI")
+
+RECORD_WRITE          = "W"
+RECORD_READ           = "R"
+RECORD_PURGE          = "P"
+
+
+class RecorderError(Exception):
+  """RecorderError
+
+  Errors associated with the transaction log:
+    Not a transaction log
+    Replayed data does not match the log
+  """
+  pass
+
+
+class TransactionRecorder:
+  """TransactionRecorder
+
+  Ring buffer of records flushed to a file by a writer thread, if the writer
+  can not keep up the newest records are dropped and counted
+  """
+
+  def __init__(self, path, capacity = 4096, flush_interval = 0.1):
+    """__init__
+
+    Args:
+      path: path of the log file, an existing file is replaced
+      capacity: number of records the ring buffer holds
+      flush_interval: seconds between the writes to the file
+
+    Returns:
+      Nothing
+
+    Raises:
+      IOError: the file can not be created
+    """
+    self.f = open(path, "wb")
+    self.f.write(FILE_HEADER)
+    self.capacity = capacity
+    self.flush_interval = flush_interval
+    self.slots = [None] * capacity
+    self.head = 0
+    self.tail = 0
+    self.lock = threading.Lock()
+    self.records = 0
+    self.dropped = 0
+    self.running = True
+    self.wakeup = threading.Event()
+    self.writer = threading.Thread(target = self._write_records,
+                                   name = "olympus-recorder")
+    self.writer.daemon = True
+    self.writer.start()
+
+  def record(self, direction, data = ""):
+    """record
+
+    Add a record to the ring buffer
+
+    Args:
+      direction: RECORD_WRITE, RECORD_READ or RECORD_PURGE
+      data: bytes of the record
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    entry = (time.time(), direction, str(data))
+    with self.lock:
+      if self.tail - self.head >= self.capacity:
+        self.dropped += 1
+        return
+      self.slots[self.tail % self.capacity] = entry
+      self.tail += 1
+      self.records += 1
+      #wake the writer early when the buffer is half full
+      full = self.tail - self.head >= self.capacity / 2
+    if full:
+      self.wakeup.set()
+
+  def flush(self):
+    """flush
+
+    Write all the records in the ring buffer to the file
+
+    Args:
+      Nothing
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    with self.lock:
+      head = self.head
+      tail = self.tail
+      entries = [self.slots[i % self.capacity] for i in range(head, tail)]
+      for i in range(head, tail):
+        self.slots[i % self.capacity] = None
+      self.head = tail
+
+    if len(entries) == 0:
+      return
+    chunks = []
+    for timestamp, direction, data in entries:
+      chunks.append(RECORD_HEADER.pack(timestamp, direction, len(data)))
+      chunks.append(data)
+    self.f.write("".join(chunks))
+    self.f.flush()
+
+  def close(self):
+    """close
+
+    Stop the writer thread, write the remaining records and close the file
+
+    Args:
+      Nothing
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    if not self.running:
+      return
+    self.running = False
+    self.wakeup.set()
+    self.writer.join()
+    self.flush()
+    self.f.close()
+
+  def _write_records(self):
+    while self.running:
+      self.wakeup.wait(self.flush_interval)
+      self.wakeup.clear()
+      self.flush()
+
+
+class RecordingDevice:
+  """RecordingDevice
+
+  Passes all the calls through to a device and records the data
+  """
+
+  def __init__(self, dev, recorder):
+    """__init__
+
+    Args:
+      dev: device to record (pyftdi Ftdi, EmulatedBoard ...)
+      recorder: TransactionRecorder
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    self.dev = dev
+    self.recorder = recorder
+
+  def write_data(self, data):
+    self.recorder.record(RECORD_WRITE, data)
+    return self.dev.write_data(data)
+
+  def read_data(self, size):
+    data = self.dev.read_data(size)
+    if len(data) > 0:
+      self.recorder.record(RECORD_READ, data)
+    return data
+
+  def purge_buffers(self):
+    self.recorder.record(RECORD_PURGE)
+    self.dev.purge_buffers()
+
+  def close(self):
+    self.dev.close()
+
+  def __getattr__(self, name):
+    #everything else (latency timer, bitmode ...) goes to the device
+    return getattr(self.dev, name)
+
+
+def read_log(path):
+  """read_log
+
+  Read all the records of a log
+
+  Args:
+    path: path of the log file
+
+  Returns:
+    list of (time, direction, data)
+
+  Raises:
+    RecorderError: the file is not a transaction log
+  """
+  f = open(path, "rb")
+  try:
+    raw = f.read()
+  finally:
+    f.close()
+
+  if raw[:len(FILE_HEADER)] != FILE_HEADER:
+    raise RecorderError("%s is not a transaction log" % path)
+
+  records = []
+  position = len(FILE_HEADER)
+  while position + RECORD_HEADER.size <= len(raw):
+    timestamp, direction, length = RECORD_HEADER.unpack_from(raw, position)
+    position += RECORD_HEADER.size
+    records.append((timestamp, direction, raw[position: position + length]))
+    position += length
+  return records
+
+
+class ReplayDevice:
+  """ReplayDevice
+
+  Feeds a recorded session back to the host: every write releases the data
+  that was read after it in the log, with the same delay it had when it was
+  recorded (if timing is enabled)
+  """
+
+  def __init__(self, path, timing = True, strict = False):
+    """__init__
+
+    Args:
+      path: path of the log file
+      timing: reproduce the delay between a write and the data that followed
+        it, if False the data is available immediately
+      strict: raise a RecorderError when the host writes something that is
+        different from the log, otherwise the mismatch is counted
+
+    Returns:
+      Nothing
+
+    Raises:
+      RecorderError: the file is not a transaction log
+    """
+    self.records = deque(read_log(path))
+    self.timing = timing
+    self.strict = strict
+    #(time the data is available, data)
+    self.out_queue = deque()
+    self.mismatches = 0
+
+  def open(self, *args, **kwargs):
+    pass
+
+  def close(self):
+    pass
+
+  def finished(self):
+    """finished
+
+    Returns True when the whole log has been replayed
+
+    Args:
+      Nothing
+
+    Returns:
+      True: all the records have been replayed
+      False: records remain
+
+    Raises:
+      Nothing
+    """
+    return len(self.records) == 0 and len(self.out_queue) == 0
+
+  def purge_buffers(self):
+    self.out_queue.clear()
+    if len(self.records) > 0 and self.records[0][1] == RECORD_PURGE:
+      self.records.popleft()
+
+  def write_data(self, data):
+    data = str(data)
+    #reads that the host skipped are dropped
+    while len(self.records) > 0 and self.records[0][1] == RECORD_READ:
+      self.records.popleft()
+
+    if len(self.records) == 0 or self.records[0][1] != RECORD_WRITE:
+      self._mismatch("Write past the end of the log")
+      return len(data)
+
+    recorded_time, direction, recorded = self.records.popleft()
+    if recorded != data:
+      self._mismatch("Write does not match the log")
+
+    now = time.time()
+    while len(self.records) > 0 and self.records[0][1] == RECORD_READ:
+      timestamp, direction, rsp = self.records.popleft()
+      ready = now
+      if self.timing:
+        ready += timestamp - recorded_time
+      self.out_queue.append((ready, rsp))
+    return len(data)
+
+  def read_data(self, size):
+    now = time.time()
+    chunks = []
+    available = 0
+    while len(self.out_queue) > 0 and available < size:
+      ready, data = self.out_queue[0]
+      if ready > now:
+        break
+      if len(data) > size - available:
+        self.out_queue[0] = (ready, data[size - available:])
+        data = data[:size - available]
+      else:
+        self.out_queue.popleft()
+      chunks.append(data)
+      available += len(data)
+    return "".join(chunks)
+
+  def _mismatch(self, message):
+    self.mismatches += 1
+    if self.strict:
+      raise RecorderError(message)
@@ -0,0 +1,255 @@
+#Distributed under the MIT licesnse.
+#Copyright (c) 2011 Dave McCoy (dave.mccoy@cospandesign.com)
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy of
+#this software and associated documentation files (the "Software"), to deal in
+#the Software without restriction, including without limitation the rights to
+#use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+#of the Software, and to permit persons to whom the Software is furnished to do
+#so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+""" stats
+
+Counters and latency histograms of the transactions of an Olympus interface
+
+The latency of every transaction is recorded by operation, device id and
+payload size. The histograms use power of two buckets of microseconds so
+recording a transaction is only a few dictionary updates
+
+"""
+
+__author__ = 'dave.mccoy@cospandesign.com (Dave McCoy)'
+
+import sys
+import time
+import json
+import threading
+
+#latency histogram buckets: bucket n holds latencies < 2^n microseconds
+HISTOGRAM_BUCKETS = 32
+
+
+def size_bucket(size):
+  """size_bucket
+
+  Returns the power of two payload size bucket of a transaction
+
+  Args:
+    size: payload size in bytes
+
+  Returns:
+    Lower bound of the bucket (0, 1, 2, 4, 8 ...)
+
+  Raises:
+    Nothing
+  """
+  if size <= 0:
+    return 0
+  return 1 << (int(size).bit_length() - 1)
+
+
+class _OperationStats:
+  """counters of one (operation, device id, size bucket)"""
+
+  def __init__(self):
+    self.count = 0
+    self.total_time = 0.0
+    self.min_time = None
+    self.max_time = 0.0
+    self.histogram = [0] * HISTOGRAM_BUCKETS
+
+  def record(self, latency):
+    self.count += 1
+    self.total_time += latency
+    if self.min_time is None or latency < self.min_time:
+      self.min_time = latency
+    if latency > self.max_time:
+      self.max_time = latency
+    bucket = min(int(latency * 1000000).bit_length(), HISTOGRAM_BUCKETS - 1)
+    self.histogram[bucket] += 1
+
+
+class TransactionStats:
+  """TransactionStats
+
+  Collects the statistics of an Olympus interface
+  """
+
+  def __init__(self):
+    self.lock = threading.Lock()
+    self.dumper = None
+    self.reset()
+
+  def reset(self):
+    """reset
+
+    Clear all the counters
+
+    Args:
+      Nothing
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    with self.lock:
+      self.started = time.time()
+      self.operations = {}
+      self.bytes_read = 0
+      self.bytes_written = 0
+      self.timeouts = 0
+      self.purges = 0
+
+  def record(self, operation, device_id, size, latency):
+    """record
+
+    Record a transaction
+
+    Args:
+      operation: name of the operation ("read", "write", "ping" ...)
+      device_id: Device identification number
+      size: payload size in bytes
+      latency: time in seconds from the request to the response
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    key = (operation, device_id, size_bucket(size))
+    with self.lock:
+      stats = self.operations.get(key)
+      if stats is None:
+        stats = _OperationStats()
+        self.operations[key] = stats
+      stats.record(latency)
+      if operation == "read":
+        self.bytes_read += size
+      elif operation == "write":
+        self.bytes_written += size
+
+  def record_timeout(self):
+    with self.lock:
+      self.timeouts += 1
+
+  def record_purge(self):
+    with self.lock:
+      self.purges += 1
+
+  def snapshot(self, extra = None):
+    """snapshot
+
+    Returns the statistics as a dictionary (that can be converted to JSON)
+
+    Args:
+      extra: dictionary of additional counters to include
+
+    Returns:
+      dictionary:
+        elapsed: seconds since the counters were reset
+        bytes read, bytes written, throughput (bytes/second)
+        timeouts, purges
+        operations: list of dictionaries with the operation, device id,
+          size (lower bound of the size bucket), count, total/min/max/average
+          latency in seconds and the latency histogram, the histogram maps
+          the upper bound of each bucket in microseconds to a count
+
+    Raises:
+      Nothing
+    """
+    with self.lock:
+      elapsed = max(time.time() - self.started, 1e-9)
+      operations = []
+      for key in sorted(self.operations.keys()):
+        operation, device_id, size = key
+        stats = self.operations[key]
+        histogram = {}
+        for i in range (0, HISTOGRAM_BUCKETS):
+          if stats.histogram[i] > 0:
+            histogram[1 << i] = stats.histogram[i]
+        operations.append({"operation": operation,
+                           "device id": device_id,
+                           "size": size,
+                           "count": stats.count,
+                           "total time": stats.total_time,
+                           "min time": stats.min_time,
+                           "max time": stats.max_time,
+                           "average time": stats.total_time / stats.count,
+                           "histogram": histogram})
+
+      snapshot = {"elapsed": elapsed,
+                  "bytes read": self.bytes_read,
+                  "bytes written": self.bytes_written,
+                  "throughput": (self.bytes_read + self.bytes_written) / elapsed,
+                  "timeouts": self.timeouts,
+                  "purges": self.purges,
+                  "operations": operations}
+    if extra is not None:
+      snapshot.update(extra)
+    return snapshot
+
+  def start_dump(self, get_snapshot, interval, stream = None):
+    """start_dump
+
+    Start a thread that writes the statistics to a stream periodically
+
+    Args:
+      get_snapshot: function that returns the statistics to write
+      interval: time in seconds between dumps
+      stream: file to write to, sys.stdout if None
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    self.stop_dump()
+    if stream is None:
+      stream = sys.stdout
+    event = threading.Event()
+
+    def dump():
+      while not event.wait(interval):
+        stream.write(json.dumps(get_snapshot(), sort_keys = True) + "\n")
+        stream.flush()
+
+    thread = threading.Thread(target = dump)
+    thread.daemon = True
+    self.dumper = (thread, event)
+    thread.start()
+
+  def stop_dump(self):
+    """stop_dump
+
+    Stop the periodic dump thread
+
+    Args:
+      Nothing
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    if self.dumper is None:
+      return
+    thread, event = self.dumper
+    self.dumper = None
+    event.set()
+    thread.join()
@@ -0,0 +1,141 @@
+""" fake_ftdi
+
+In-process model of an FTDI device attached to an Olympus image, used to
+exercise the host side protocol without a board
+
+"""
+
+from array import array as Array
+
+
+class FakeFtdi:
+  """FakeFtdi
+
+  Decodes the commands written with write_data and queues the responses that
+  the image would send back to be read with read_data
+  """
+
+  def __init__(self):
+    self.registers = {}
+    self.memory = {}
+    self.in_buffer = Array('B')
+    self.out_buffer = Array('B')
+    self.write_count = 0
+    self.read_count = 0
+    self.purge_count = 0
+    #number of read/write/ping packets decoded
+    self.command_count = 0
+    #32-bit words returned by a core dump
+    self.core = []
+
+  def close(self):
+    pass
+
+  def purge_buffers(self):
+    self.purge_count += 1
+    self.in_buffer = Array('B')
+    self.out_buffer = Array('B')
+
+  def write_data(self, data):
+    self.write_count += 1
+    self.in_buffer.extend(Array('B', data))
+    while self._process_command():
+      pass
+    return len(data)
+
+  def read_data(self, size):
+    self.read_count += 1
+    data = self.out_buffer[:size]
+    self.out_buffer = self.out_buffer[size:]
+    return data.tostring()
+
+  def interrupt(self, interrupts):
+    """send an interrupt frame to the host"""
+    self._respond([0x01, 0x00, 0x00, 0x00] + self._bytes(interrupts))
+
+  def _process_command(self):
+    buf = self.in_buffer
+    while len(buf) > 0 and buf[0] != 0xCD:
+      buf.pop(0)
+
+    if len(buf) < 2:
+      return False
+
+    command = buf[1] & 0x0F
+    mem_device = (buf[1] & 0x10) > 0
+    if command == 0x03:
+      #reset
+      del buf[:5]
+      return True
+
+    if command == 0x0F:
+      #core dump
+      if len(buf) < 13:
+        return False
+      del buf[:13]
+      rsp = [0xF0] + self._bytes(len(self.core))[1:]
+      for word in self.core:
+        rsp += self._bytes(word)
+      self._respond(rsp)
+      return True
+
+    if len(buf) < 9:
+      return False
+
+    length = buf[2] << 16 | buf[3] << 8 | buf[4]
+    device_id = buf[5]
+    address = buf[6] << 16 | buf[7] << 8 | buf[8]
+    #the master echos back the full address
+    echo = device_id << 24 | address
+    if mem_device:
+      device_id = None
+
+    if command in [0x00, 0x01, 0x02]:
+      if (command != 0x01) or (len(buf) >= 9 + length * 4):
+        self.command_count += 1
+
+    if command == 0x00:
+      del buf[:9]
+      self._respond([0xFF, 0x00, 0x00, 0x00])
+
+    elif command == 0x01:
+      if len(buf) < 9 + length * 4:
+        return False
+      data = buf[9: 9 + length * 4]
+      del buf[:9 + length * 4]
+      value = 0
+      for i in range (0, length):
+        value = data[i * 4] << 24 | data[i * 4 + 1] << 16 | data[i * 4 + 2] << 8 | data[i * 4 + 3]
+        self._store(device_id, address + i, value)
+      rsp = [0xFE] + self._bytes(length)[1:] + self._bytes(echo) + self._bytes(value)
+      self._respond(rsp)
+
+    elif command == 0x02:
+      del buf[:9]
+      rsp = [0xFD] + self._bytes(length)[1:] + self._bytes(echo)
+      for i in range (0, length):
+        rsp += self._bytes(self._load(device_id, address + i))
+      self._respond(rsp)
+
+    else:
+      del buf[:9]
+
+    return True
+
+  def _store(self, device_id, address, value):
+    if device_id is None:
+      self.memory[address] = value
+    else:
+      self.registers[(device_id, address)] = value
+
+  def _load(self, device_id, address):
+    if device_id is None:
+      return self.memory.get(address, 0)
+    return self.registers.get((device_id, address), 0)
+
+  def _bytes(self, value):
+    return [(value >> 24) & 0xFF, (value >> 16) & 0xFF, (value >> 8) & 0xFF, value & 0xFF]
+
+  def _respond(self, rsp):
+    self.out_buffer.append(0xDC)
+    self.out_buffer.extend(rsp)
@@ -0,0 +1,84 @@
+import unittest
+import os
+import sys
+from array import array as Array
+
+sys.path.append(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+
+from userland import async_olympus
+from userland.async_olympus import AsyncOlympus
+from userland.olympus import OlympusCommError
+from userland.dionysus.dionysus import Dionysus
+from userland.tests.fake_ftdi import FakeFtdi
+
+
+class DeadFtdi(FakeFtdi):
+  """FakeFtdi of a board that stopped responding"""
+
+  def read_data(self, size):
+    return ""
+
+
+class Test (unittest.TestCase):
+  """Unit test for the non blocking Olympus front end"""
+
+  def setUp(self):
+    self.dev = FakeFtdi()
+    self.oly = Dionysus(dev = self.dev)
+    self.oly.read_timeout = 0.1
+    self.aoly = AsyncOlympus(self.oly)
+
+  def tearDown(self):
+    self.aoly.close()
+
+  def test_read_write(self):
+    write = self.aoly.write(2, 0x10, Array('B', [0x00, 0x00, 0x01, 0x02]))
+    read = self.aoly.read(2, 0x10)
+    self.assertEqual(write.wait(1), None)
+    self.assertEqual(read.wait(1).tolist(), [0x00, 0x00, 0x01, 0x02])
+
+  def test_ping(self):
+    self.assertEqual(self.aoly.ping().wait(1), None)
+
+  def test_interrupts(self):
+    self.dev.interrupt(0x04)
+    first = self.aoly.wait_for_interrupts(wait_time = 1)
+    self.assertEqual(first.wait(1), 0x04)
+
+  def test_interrupt_timeout(self):
+    self.assertEqual(self.aoly.wait_for_interrupts(wait_time = 0.05).wait(1), 0)
+
+  def test_close(self):
+    request = self.aoly.wait_for_interrupts(wait_time = 10)
+    self.aoly.close()
+    self.assertRaises(OlympusCommError, request.wait, 1)
+
+  def test_dead_board(self):
+    self.aoly.close()
+    oly = Dionysus(dev = DeadFtdi())
+    oly.read_timeout = 0.05
+    self.aoly = AsyncOlympus(oly)
+    #more reads than the depth of the queue of the interface
+    requests = [self.aoly.read(2, i) for i in range(200)]
+    for request in requests:
+      self.assertRaises(OlympusCommError, request.wait, 5)
+    self.assertTrue(self.aoly.thread.is_alive())
+    self.assertEqual(len(oly.request_queue), 0)
+    #later requests fail instead of hanging
+    self.assertRaises(OlympusCommError, self.aoly.ping().wait, 5)
+
+  @unittest.skipIf(async_olympus.asyncio is None, "asyncio is not available")
+  def test_event_loop(self):
+    self.aoly.close()
+    loop = async_olympus.asyncio.new_event_loop()
+    self.aoly = AsyncOlympus(self.oly, loop = loop)
+    try:
+      write = self.aoly.write(2, 0x10, Array('B', [0x00, 0x00, 0x01, 0x02]))
+      read = self.aoly.read(2, 0x10)
+      self.assertEqual(loop.run_until_complete(write), None)
+      self.assertEqual(loop.run_until_complete(read).tolist(), [0x00, 0x00, 0x01, 0x02])
+    finally:
+      loop.close()
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+
+from userland.benchmark import cases
+from userland.benchmark import history
+from userland.benchmark.runner import open_emulated
+
+
+class Test (unittest.TestCase):
+  """Unit test for the benchmark suite"""
+
+  def setUp(self):
+    self.directory = tempfile.mkdtemp()
+    self.oly, self.board = open_emulated(0.0, None, 16)
+    self.context = cases.Context(self.oly, 16, self.board)
+
+  def tearDown(self):
+    shutil.rmtree(self.directory)
+
+  def test_run_cases(self):
+    names = ["ping", "burst_read_16", "burst_read_64", "spi_set_write_data"]
+    results = cases.run_cases(self.oly, self.context, names, min_time = 0,
+                              max_iterations = 2)
+    self.assertEqual(sorted(results.keys()), sorted(names))
+    self.assertEqual(results["ping"]["iterations"], 1)
+    self.assertEqual(results["burst_read_16"]["bytes"], 64)
+    self.assertTrue("throughput" in results["burst_read_16"] or
+                    results["burst_read_16"]["median"] == 0)
+    self.assertTrue("skipped" in results["burst_read_64"])
+    self.assertTrue("median" in results["spi_set_write_data"])
+
+  def test_memory_clobber(self):
+    #without a scratch region the memory of a real board is not written
+    context = cases.Context(self.oly, 16)
+    results = cases.run_cases(self.oly, context, ["burst_write_16", "burst_read_16"],
+                              min_time = 0, max_iterations = 1)
+    self.assertTrue("skipped" in results["burst_write_16"])
+    self.assertTrue("median" in results["burst_read_16"])
+    #the emulated memory is 16 words
+    context = cases.Context(self.oly, 16, scratch = 8)
+    self.assertEqual(context.memory_address(8, write = True), 8)
+    self.assertRaises(cases.BenchmarkSkip, context.memory_address, 16, True)
+
+  def test_write_register(self):
+    self.oly.write_words(0, 0, [0x1234], mem_device = True)
+    results = cases.run_cases(self.oly, self.context, ["write_register"],
+                              min_time = 0, max_iterations = 2)
+    self.assertTrue("median" in results["write_register"])
+    #the memory was not touched
+    self.assertEqual(list(self.oly.read_words(0, 0, 1, mem_device = True)), [0x1234])
+
+  def test_history(self):
+    path = os.path.join(self.directory, "history.json")
+    self.assertEqual(history.load_history(path), [])
+    history.append_history(path, history.make_run({"ping": {"median": 1.0}}, "emulated"))
+    history.append_history(path, history.make_run({"ping": {"median": 2.0}}, "emulated"))
+    runs = history.load_history(path)
+    self.assertEqual(len(runs), 2)
+    #the last run of a history can be used as the baseline
+    self.assertEqual(history.load_baseline(path)["results"]["ping"]["median"], 2.0)
+
+  def test_compare(self):
+    baseline = history.make_run({"ping": {"median": 1.0},
+                                 "read_drt": {"median": 1.0},
+                                 "vcd_generation": {"skipped": "no device"}},
+                                "emulated")
+    run = history.make_run({"ping": {"median": 1.05},
+                            "read_drt": {"median": 1.5},
+                            "vcd_generation": {"median": 1.0}},
+                           "emulated")
+    comparison = history.compare(run, baseline)
+    self.assertEqual([entry[0] for entry in comparison], ["ping", "read_drt"])
+    self.assertFalse(comparison[0][4])
+    self.assertTrue(comparison[1][4])
+
+if __name__ == "__main__":
+  unittest.main()
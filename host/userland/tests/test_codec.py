@@ -0,0 +1,75 @@
+import unittest
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+
+from userland import codec
+from userland.codec import PacketEncoder
+
+
+class Test (unittest.TestCase):
+  """Unit test for the wire format of the Olympus commands"""
+
+  def test_read_header(self):
+    data = bytearray(codec.COMMAND_HEADER.size)
+    offset = codec.pack_command(data, 0, codec.COMMAND_READ, 0x05, 0x123456, 0x10)
+    self.assertEqual(offset, 9)
+    self.assertEqual(str(data), "CD0200001005123456".decode("hex"))
+
+  def test_memory_header(self):
+    data = bytearray(codec.COMMAND_HEADER.size)
+    codec.pack_command(data, 0, codec.COMMAND_WRITE, 0x05, 0x000100, 0x01,
+                       mem_device = True)
+    self.assertEqual(str(data), "CD1100000100000100".decode("hex"))
+
+  def test_encode_burst(self):
+    encoder = PacketEncoder()
+    data = encoder.encode([(codec.COMMAND_WRITE, 0x01, 0x02, 1, bytearray("\x00\x00\x00\x07"), False),
+                           (codec.COMMAND_READ, 0x01, 0x02, 1, None, False)])
+    self.assertEqual(str(data),
+                     ("CD0100000101000002" + "00000007" + "CD0200000101000002").decode("hex"))
+
+  def test_response(self):
+    self.assertEqual(codec.response_status(codec.COMMAND_READ), codec.READ_STATUS)
+    self.assertEqual(codec.response_status(codec.COMMAND_WRITE | codec.COMMAND_MEMORY_BUS),
+                     codec.WRITE_STATUS)
+    self.assertEqual(codec.response_length(codec.COMMAND_READ, 2), 16)
+    self.assertEqual(codec.response_address(0x02, 0x10), 0x02000010)
+    self.assertEqual(codec.response_address(0x02, 0x10, mem_device = True), 0x10)
+    status, count, address = codec.unpack_response_header("FD00000102000010".decode("hex"))
+    self.assertEqual((status, count, address), (0xFD, 1, 0x02000010))
+
+  def test_ascii_command(self):
+    self.assertEqual(codec.encode_ascii_command(codec.COMMAND_PING, 0x00),
+                     "L0000000000000000000000000000000")
+    self.assertEqual(codec.encode_ascii_command(codec.COMMAND_READ, 0x0100, count = 3,
+                                                mem_device = True),
+                     "L%0.7X00010002%0.8X00000000" % (2, 0x0100))
+    self.assertEqual(codec.encode_ascii_command(codec.COMMAND_WRITE, 0x0100, data = [1, 0xABCD]),
+                     "L%0.7X00000001%0.8X%0.8X%0.8X" % (1, 0x0100, 1, 0xABCD))
+
+  def test_decode_ascii_words(self):
+    response = "000000000000000000000000" + "0000000A" + "DEADBEEF"
+    self.assertEqual(codec.decode_ascii_words(response, 24, 2), [0x0A, 0xDEADBEEF])
+
+  def test_binary_command(self):
+    self.assertEqual(codec.encode_binary_command(codec.COMMAND_PING, 0x00),
+                     "CD" "00000000" "00000000" "00000000" "00000000".decode("hex"))
+    self.assertEqual(codec.encode_binary_command(codec.COMMAND_READ, 0x0100, count = 3,
+                                                 mem_device = True),
+                     "CD" "00000002" "00010002" "00000100" "00000000".decode("hex"))
+    self.assertEqual(codec.encode_binary_command(codec.COMMAND_WRITE, 0x0100, data = [1, 0xABCD]),
+                     "CD" "00000001" "00000001" "00000100" "00000001" "0000ABCD".decode("hex"))
+    #half the size of the ASCII command
+    self.assertEqual(len(codec.encode_binary_command(codec.COMMAND_WRITE, 0, data = [0] * 8)), 45)
+
+  def test_binary_response(self):
+    header = "DC" "00000001" "FFFFFFFD" "00000010".decode("hex")
+    self.assertEqual(codec.unpack_binary_response_header(header), (2, 0xFFFFFFFD, 0x10))
+    self.assertEqual(codec.unpack_binary_response_header("\x00" + header[1:]), None)
+    self.assertEqual(codec.decode_binary_words("0000000ADEADBEEF".decode("hex")),
+                     [0x0A, 0xDEADBEEF])
+
+if __name__ == "__main__":
+  unittest.main()
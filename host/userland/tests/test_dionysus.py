@@ -0,0 +1,139 @@
+import unittest
+import os
+import sys
+import time
+from array import array as Array
+
+sys.path.append(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+
+from userland.olympus import OlympusCommError
+from userland.dionysus.dionysus import Dionysus
+from userland.tests.fake_ftdi import FakeFtdi
+
+
+class Test (unittest.TestCase):
+  """Unit test for the Dionysus host interface"""
+
+  def setUp(self):
+    self.dev = FakeFtdi()
+    self.dionysus = Dionysus(dev = self.dev)
+    self.dionysus.read_timeout = 0.1
+
+  def test_read_write(self):
+    self.dionysus.write(1, 2, Array('B', [0x12, 0x34, 0x56, 0x78]))
+    data = self.dionysus.read(1, 2, 1)
+    self.assertEqual(data.tolist(), [0x12, 0x34, 0x56, 0x78])
+    self.assertEqual(self.dionysus.read_register(1, 2), 0x12345678)
+
+  def test_queue_single_burst(self):
+    requests = []
+    for i in range (0, 10):
+      self.dionysus.queue_write(3, i, Array('B', [0x00, 0x00, 0x00, i]))
+    for i in range (0, 10):
+      requests.append(self.dionysus.queue_read(3, i, 1))
+
+    self.assertFalse(requests[0].done())
+    self.dionysus.flush_queue()
+    self.assertEqual(self.dev.write_count, 1)
+    for i in range (0, 10):
+      self.assertTrue(requests[i].done())
+      self.assertEqual(requests[i].result()[3], i)
+
+  def test_queue_callback(self):
+    results = []
+    def callback(request):
+      results.append(request.result()[3])
+
+    self.dev.registers[(4, 0)] = 0xAA
+    self.dev.registers[(4, 1)] = 0xBB
+    self.dionysus.queue_read(4, 0, callback = callback)
+    self.dionysus.queue_read(4, 1, callback = callback)
+    self.dionysus.flush_queue()
+    self.assertEqual(results, [0xAA, 0xBB])
+
+  def test_queue_timeout(self):
+    request = self.dionysus.queue_read(1, 0, 1)
+    self.dev.write_data = lambda data: len(data)
+    self.assertRaises(OlympusCommError, self.dionysus.flush_queue)
+    self.assertTrue(request.done())
+    self.assertRaises(OlympusCommError, request.result)
+
+  def test_streaming(self):
+    self.dionysus.set_streaming(True)
+    self.dev.registers[(1, 5)] = 0x55
+    for i in range (0, 4):
+      self.assertEqual(self.dionysus.read_register(1, 5), 0x55)
+    self.assertEqual(self.dionysus.get_purge_count(), 0)
+    self.assertEqual(self.dev.purge_count, 0)
+
+  def test_streaming_stale_response(self):
+    self.dionysus.set_streaming(True)
+    self.dev.registers[(1, 5)] = 0x55
+    #stale response of an earlier read followed by a stray sync byte
+    self.dev._respond([0xFD, 0x00, 0x00, 0x01, 0x01, 0x00, 0x00, 0x07, 0xDC, 0x00, 0x00, 0x00])
+    self.assertEqual(self.dionysus.read_register(1, 5), 0x55)
+    self.assertEqual(self.dionysus.get_desync_count(), 2)
+    self.assertEqual(self.dionysus.get_purge_count(), 0)
+
+  def test_streaming_timeout_purges(self):
+    self.dionysus.set_streaming(True)
+    self.dev.write_data = lambda data: len(data)
+    self.assertRaises(OlympusCommError, self.dionysus.read, 1, 0, 1)
+    self.assertEqual(self.dionysus.get_purge_count(), 1)
+
+  def test_ping(self):
+    self.dionysus.ping()
+    self.dev.write_data = lambda data: len(data)
+    self.assertRaises(OlympusCommError, self.dionysus.ping)
+
+  def test_wait_for_interrupts(self):
+    self.assertFalse(self.dionysus.wait_for_interrupts(wait_time = 0.01))
+    self.dev.interrupt(1 << 3)
+    self.assertTrue(self.dionysus.wait_for_interrupts(wait_time = 0.01))
+    self.assertTrue(self.dionysus.is_interrupt_for_slave(3))
+    self.assertFalse(self.dionysus.is_interrupt_for_slave(2))
+
+  def test_interrupt_between_responses(self):
+    self.dionysus.set_streaming(True)
+    self.dev.interrupt(1 << 2)
+    self.dionysus.write_register(2, 0x00, 0x1234)
+    self.assertEqual(self.dionysus.read_register(2, 0x00), 0x1234)
+    self.assertEqual(self.dionysus.get_desync_count(), 0)
+    #the interrupt was kept while the responses were read
+    self.assertTrue(self.dionysus.wait_for_interrupts(wait_time = 0.01))
+    self.assertTrue(self.dionysus.is_interrupt_for_slave(2))
+
+  def test_interrupt_and_core_dump(self):
+    self.dev.core = [0x11111111, 0x22222222, 0x33333333]
+    write_data = self.dev.write_data
+    def interrupt_then_respond(data):
+      #an interrupt arrives just before the core dump response
+      self.dev.interrupt(1 << 2)
+      return write_data(data)
+    self.dev.write_data = interrupt_then_respond
+    self.assertEqual(list(self.dionysus.dump_core()), self.dev.core)
+    self.assertEqual(self.dionysus.get_desync_count(), 0)
+    self.assertTrue(self.dionysus.wait_for_interrupts(wait_time = 0.01))
+    self.assertTrue(self.dionysus.is_interrupt_for_slave(2))
+
+  def test_interrupt_dispatcher(self):
+    values = []
+    def handler(device_id):
+      values.append((device_id, self.dionysus.read_register(device_id, 0x01)))
+
+    self.dev.registers[(3, 0x01)] = 0xAA
+    self.dionysus.on_interrupt(3, handler)
+    self.dionysus.on_interrupt(4, handler)
+    self.dionysus.start_interrupt_dispatcher()
+    try:
+      with self.dionysus.lock:
+        self.dev.interrupt(1 << 3)
+      timeout = time.time() + 1
+      while len(values) == 0 and time.time() < timeout:
+        time.sleep(0.01)
+    finally:
+      self.dionysus.stop_interrupt_dispatcher()
+    self.assertEqual(values, [(3, 0xAA)])
+
+if __name__ == "__main__":
+  unittest.main()
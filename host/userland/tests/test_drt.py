@@ -0,0 +1,68 @@
+import unittest
+import os
+import sys
+import struct
+from array import array as Array
+
+sys.path.append(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+sys.path.append(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, os.pardir, "cbuilder", "drt"))
+
+from drt import DRTManager
+
+GPIO = 0x01
+UART = 0x02
+MEMORY = 0x05
+
+
+def build_drt(devices):
+  """devices: list of (type, flags, address, size)"""
+  words = [0x0005C594, len(devices), 0, 0, 0, 0, 0, 0]
+  for device in devices:
+    words += list(device) + [0, 0, 0, 0]
+  return Array('B', struct.pack(">%dI" % len(words), *words))
+
+
+class Test (unittest.TestCase):
+  """Unit test for the DRT manager"""
+
+  def setUp(self):
+    self.drt = DRTManager()
+    self.drt.set_drt(build_drt([(GPIO, 0x00000001, 0x01000000, 3),
+                                (UART, 0x00000001, 0x02000000, 8),
+                                (MEMORY, 0x00010001, 0x00000000, 0x800000),
+                                (GPIO, 0x00000001, 0x04000000, 3),
+                                (MEMORY, 0x00010001, 0x00800000, 0x800000)]))
+
+  def test_header(self):
+    self.assertEqual(self.drt.get_number_of_devices(), 5)
+    self.assertEqual(self.drt.version, 5)
+    self.assertEqual(self.drt.id_word, 0xC594)
+    self.assertEqual(len(self.drt.drt_lines), 8 + 5 * 8)
+    self.assertEqual(self.drt.drt_lines[0], "0005C594")
+
+  def test_fields(self):
+    self.assertEqual(self.drt.get_id_from_index(1), UART)
+    self.assertEqual(self.drt.get_address_from_index(3), 4)
+    self.assertEqual(self.drt.get_size_from_index(1), 8)
+    self.assertFalse(self.drt.is_memory_device(0))
+    self.assertTrue(self.drt.is_memory_device(2))
+    self.assertEqual(len(self.drt.get_device_flags(2)), 2)
+
+  def test_find_devices(self):
+    self.assertEqual(self.drt.find_devices(GPIO), (0, 3))
+    self.assertEqual(self.drt.find_devices(MEMORY, memory_device = True), (2, 4))
+    self.assertEqual(self.drt.find_devices(MEMORY, memory_device = False), ())
+    self.assertEqual(self.drt.find_devices(0x0F), ())
+    self.assertEqual(self.drt.get_bus_devices(False), (0, 1, 3))
+    self.assertEqual(self.drt.get_bus_devices(True), (2, 4))
+    self.assertTrue(self.drt.is_device_attached(UART))
+    self.assertFalse(self.drt.is_device_attached(0x0F))
+
+  def test_replace(self):
+    self.drt.set_drt(build_drt([(UART, 0x00000001, 0x01000000, 8)]))
+    self.assertEqual(self.drt.get_number_of_devices(), 1)
+    self.assertEqual(self.drt.find_devices(GPIO), ())
+    self.assertEqual(self.drt.find_devices(UART), (0,))
+
+if __name__ == "__main__":
+  unittest.main()
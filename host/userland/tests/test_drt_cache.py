@@ -0,0 +1,136 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+
+from userland.drt_cache import DRTCache
+from userland.drt_cache import DRT_HASH_WORD
+from userland.emulator.board import EmulatedBoard
+from userland.emulator.board import emulated_dionysus
+from userland.emulator.board import default_slaves
+
+
+class Test (unittest.TestCase):
+  """Unit test for the DRT cache"""
+
+  def setUp(self):
+    self.directory = tempfile.mkdtemp()
+    self.path = os.path.join(self.directory, "cache", "drt_cache.json")
+
+  def tearDown(self):
+    shutil.rmtree(self.directory)
+
+  def open_board(self, board, identity = "Dionysus:0403:8530:TEST"):
+    board.board_identity = identity
+    oly = emulated_dionysus(board)
+    oly.read_timeout = 0.5
+    oly.drt_cache = DRTCache(self.path)
+    return oly
+
+  def test_cached_drt(self):
+    board = EmulatedBoard()
+    oly = self.open_board(board)
+    oly.read_drt()
+    self.assertEqual(board.command_count, 2)
+    self.assertTrue(os.path.exists(self.path))
+    drt = oly.drt_manager.drt_string
+
+    #a new session only validates the cache
+    board = EmulatedBoard()
+    oly = self.open_board(board)
+    oly.read_drt()
+    self.assertEqual(board.command_count, 1)
+    self.assertEqual(oly.drt_manager.drt_string, drt)
+    self.assertEqual(oly.get_number_of_devices(), 7)
+
+  def test_image_changed(self):
+    oly = self.open_board(EmulatedBoard())
+    oly.read_drt()
+
+    board = EmulatedBoard(slaves = default_slaves()[:3])
+    oly = self.open_board(board)
+    oly.read_drt()
+    #the header, then the table
+    self.assertEqual(board.command_count, 2)
+    #the three peripherals and the memory
+    self.assertEqual(oly.get_number_of_devices(), 4)
+
+  def test_device_changed(self):
+    oly = self.open_board(EmulatedBoard())
+    oly.read_drt()
+
+    #same number of devices, a different last peripheral
+    slaves = default_slaves()
+    slaves[-1] = slaves[0].__class__()
+    board = EmulatedBoard(slaves = slaves)
+    oly = self.open_board(board)
+    oly.read_drt()
+    #the hash in the header changed, the table is read
+    self.assertEqual(board.command_count, 2)
+    self.assertEqual(oly.drt_manager.ids[len(slaves) - 1], slaves[0].device_type)
+    #the new image replaced the cached DRT
+    oly = self.open_board(EmulatedBoard(slaves = slaves))
+    oly.read_drt()
+    self.assertEqual(oly.drt_manager.ids[len(slaves) - 1], slaves[0].device_type)
+
+  def test_image_without_hash(self):
+    for i in range(2):
+      board = EmulatedBoard()
+      board.drt.registers[DRT_HASH_WORD] = 0
+      oly = self.open_board(board)
+      oly.read_drt()
+      #the header can not validate a cached DRT, it is never cached
+      self.assertEqual(board.command_count, 2)
+      self.assertEqual(oly.get_number_of_devices(), 7)
+    self.assertFalse(os.path.exists(self.path))
+
+  def test_single_load(self):
+    loads = []
+    class CountingCache(DRTCache):
+      def load(self):
+        loads.append(self.path)
+        return DRTCache.load(self)
+
+    for i in range(2):
+      oly = self.open_board(EmulatedBoard())
+      oly.drt_cache = CountingCache(self.path)
+      oly.read_drt()
+    #one load for the miss and the store, one for the hit
+    self.assertEqual(len(loads), 2)
+
+  def test_unidentified_board(self):
+    board = EmulatedBoard()
+    oly = emulated_dionysus(board)
+    oly.drt_cache = DRTCache(self.path)
+    oly.read_drt()
+    oly.read_drt()
+    self.assertEqual(board.command_count, 4)
+    self.assertFalse(os.path.exists(self.path))
+
+  def test_invalidate(self):
+    cache = DRTCache(self.path)
+    cache.store("a", "1234", [0x00, 0x01])
+    cache.store("b", "5678", [0x02])
+    self.assertEqual(list(cache.lookup("a", "1234")), [0x00, 0x01])
+    self.assertEqual(cache.lookup("a", "0000"), None)
+    cache.invalidate("a")
+    self.assertEqual(cache.lookup("a", "1234"), None)
+    self.assertEqual(list(cache.lookup("b", "5678")), [0x02])
+    cache.invalidate()
+    self.assertEqual(cache.lookup("b", "5678"), None)
+
+  def test_corrupt_file(self):
+    os.makedirs(os.path.dirname(self.path))
+    f = open(self.path, "w")
+    f.write("not json")
+    f.close()
+    cache = DRTCache(self.path)
+    self.assertEqual(cache.lookup("a", "1234"), None)
+    self.assertTrue(cache.store("a", "1234", [0x00]))
+    self.assertEqual(list(cache.lookup("a", "1234")), [0x00])
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+import os
+import sys
+import time
+from array import array as Array
+
+sys.path.append(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+
+from userland.emulator.board import EmulatedBoard
+from userland.emulator.board import emulated_dionysus
+from userland.emulator.slaves import EmulatedI2C
+from userland.emulator.slaves import EmulatedMemory
+from userland.drivers import spi
+from userland.drivers import i2c
+from userland.drivers import gpio
+
+#device offsets of the default peripherals
+GPIO_ID = 1
+UART_ID = 2
+I2C_ID = 3
+SPI_ID = 4
+
+
+class Test (unittest.TestCase):
+  """Unit test for the emulated board"""
+
+  def setUp(self):
+    self.board = EmulatedBoard()
+    self.oly = emulated_dionysus(self.board)
+    self.oly.read_timeout = 0.5
+
+  def test_ping(self):
+    self.oly.ping()
+    self.assertEqual(self.board.command_count, 1)
+
+  def test_drt(self):
+    self.oly.read_drt()
+    self.assertEqual(self.oly.get_number_of_devices(), 7)
+    self.assertEqual(self.oly.get_device_id(3), 4)
+    self.assertEqual(self.oly.get_device_address(3), SPI_ID)
+    self.assertTrue(self.oly.is_memory_device(6))
+    self.assertEqual(self.oly.get_device_size(6), 0x100000)
+
+  def test_memory(self):
+    data = Array('B', [i & 0xFF for i in range(4096)])
+    self.oly.write_memory(0x100, data)
+    self.assertEqual(self.oly.read_memory(0x100, 1024), data)
+
+  def test_memory_span(self):
+    board = EmulatedBoard(memories = [EmulatedMemory(4), EmulatedMemory(4)])
+    board.write_memory_words(2, bytearray(range(16)))
+    self.assertEqual(board.memories[1].data[:8], bytearray(range(8, 16)))
+    self.assertEqual(board.read_memory_words(2, 4), bytearray(range(16)))
+
+  def test_spi_loopback(self):
+    spi_dev = spi.SPI(self.oly, SPI_ID)
+    self.assertEqual(spi_dev.get_clock_rate(), 50000000)
+    spi_dev.set_character_length(32)
+    spi_dev.set_write_data(Array('B', [1, 2, 3, 4]))
+    spi_dev.start_transaction()
+    self.assertFalse(spi_dev.is_busy())
+    self.assertEqual(spi_dev.get_read_data(4).tolist(), [1, 2, 3, 4])
+
+  def test_i2c(self):
+    eeprom = bytearray(16)
+    board = EmulatedBoard(slaves = [EmulatedI2C(devices = {0x50: eeprom})])
+    oly = emulated_dionysus(board)
+    i2c_dev = i2c.I2C(oly, 1)
+    i2c_dev.write_to_i2c(0x50, Array('B', [0x04, 0xAA, 0xBB]))
+    self.assertEqual(eeprom[4:6], bytearray([0xAA, 0xBB]))
+    data = i2c_dev.read_from_i2c(0x50, Array('B', [0x04]), 2)
+    self.assertEqual(data.tolist(), [0xAA, 0xBB])
+    self.assertRaises(i2c.I2CError, i2c_dev.write_to_i2c, 0x51, Array('B', [0]))
+
+  def test_gpio_interrupt(self):
+    self.oly.write_register(GPIO_ID, gpio.INTERRUPT_ENABLE, 0x01)
+    self.oly.write_register(GPIO_ID, gpio.INTERRUPT_EDGE, 0x01)
+    self.board.slaves[0].set_inputs(0x01)
+    #the interrupt is sent after the next command
+    self.oly.ping()
+    self.assertTrue(self.oly.wait_for_interrupts(wait_time = 0.5))
+    self.assertTrue(self.oly.is_interrupt_for_slave(GPIO_ID))
+    self.assertEqual(self.oly.read_register(GPIO_ID, gpio.GPIO_PORT), 0x01)
+    self.assertEqual(self.oly.read_register(GPIO_ID, gpio.INTERRUPTS), 0x01)
+
+  def test_uart_loopback(self):
+    self.board.slaves[1].loopback = True
+    data = Array('B', [0x00, 0x03, 0x41, 0x42, 0x43, 0x00, 0x00, 0x00])
+    self.oly.write(UART_ID, 5, data)
+    self.assertEqual(self.board.slaves[1].transmitted, bytearray("ABC"))
+    self.assertEqual(self.oly.read_register(UART_ID, 6), 3)
+
+  def test_latency(self):
+    self.board.latency = 0.05
+    start = time.time()
+    self.oly.ping()
+    self.assertTrue(time.time() - start >= 0.05)
+
+  def test_bandwidth(self):
+    self.board.bandwidth = 100000
+    start = time.time()
+    self.oly.read_memory(0, 1000)
+    self.assertTrue(time.time() - start >= 0.04)
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+
+from userland.framer import ResponseFramer
+
+
+class Test (unittest.TestCase):
+  """Unit test for the response framer"""
+
+  def setUp(self):
+    self.chunks = []
+    self.reads = 0
+    self.framer = ResponseFramer(self.read_data)
+    self.framer.poll_interval = 0
+
+  def read_data(self, size):
+    self.reads += 1
+    if len(self.chunks) == 0:
+      return ""
+    return self.chunks.pop(0)
+
+  def test_frame(self):
+    self.chunks = ["\x00\x11\xDC\x01\x02\x03\x04\xDC\x05"]
+    frame = self.framer.get_frame(4, time.time() + 1)
+    self.assertEqual(frame.tobytes(), "\x01\x02\x03\x04")
+    self.assertEqual(self.framer.buffered(), 2)
+    self.assertEqual(self.reads, 1)
+
+  def test_split_frame(self):
+    self.chunks = ["\x00\xDC\x01", "\x02", "\x03\x04\x05\x06"]
+    frame = self.framer.get_frame(6, time.time() + 1)
+    self.assertEqual(frame.tobytes(), "\x01\x02\x03\x04\x05\x06")
+
+  def test_frames_stay_valid(self):
+    self.chunks = ["\xDC\xAA\xBB", "\xDC\xCC\xDD"]
+    first = self.framer.get_frame(2, time.time() + 1)
+    second = self.framer.get_frame(2, time.time() + 1)
+    self.assertEqual(first.tobytes(), "\xAA\xBB")
+    self.assertEqual(second.tobytes(), "\xCC\xDD")
+
+  def test_variable_length(self):
+    self.chunks = ["\xDC\x00\x00\x00\x02", "\x01\x02\x03\x04\x05\x06\x07\x08"]
+    header = self.framer.get_frame(4, time.time() + 1)
+    count = bytearray(header.tobytes())[3] * 4
+    body = self.framer.get_bytes(count, time.time() + 1)
+    self.assertEqual(len(body), 8)
+
+  def test_timeout(self):
+    self.chunks = ["\x01\x02\x03"]
+    self.assertEqual(self.framer.get_frame(4, time.time() + 0.01), None)
+    self.chunks = ["\xDC\x01"]
+    self.assertEqual(self.framer.get_frame(4, time.time() + 0.01), None)
+
+  def test_clear(self):
+    self.chunks = ["\xDC\x01\x02"]
+    self.framer.find_sync(time.time() + 1)
+    self.framer.clear()
+    self.assertEqual(self.framer.buffered(), 0)
+
+  def test_handler(self):
+    handled = []
+    self.framer.add_handler(0x01, 2, lambda frame: handled.append(frame.tobytes()))
+    self.chunks = ["\xDC\x01\x01\xDC\xFD\x02\xDC\x01\x03"]
+    frame = self.framer.get_frame(2, time.time() + 1)
+    self.assertEqual(frame.tobytes(), "\xFD\x02")
+    self.assertEqual(handled, ["\x01\x01"])
+    self.assertTrue(self.framer.dispatch(time.time() + 1))
+    self.assertEqual(handled, ["\x01\x01", "\x01\x03"])
+    self.assertFalse(self.framer.dispatch(time.time()))
+
+if __name__ == "__main__":
+  unittest.main()
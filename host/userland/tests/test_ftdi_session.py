@@ -0,0 +1,121 @@
+import unittest
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+
+from userland.dionysus.ftdi_session import FtdiSession
+from userland.dionysus.ftdi_session import FIFO_INTERFACE
+from userland.dionysus.ftdi_session import CONTROL_INTERFACE
+from userland.dionysus.ftdi_session import MODE_SYNC_FIFO
+from userland.dionysus.ftdi_session import MODE_ASYNC_FIFO
+from userland.dionysus.ftdi_session import MODE_BITBANG
+from userland.dionysus.dionysus import Dionysus
+from userland.dionysus.control.dionysus_control import Dionysus_Control
+from userland.tests.fake_ftdi import FakeFtdi
+
+
+class FakeUsbFtdi(FakeFtdi):
+  """FakeFtdi that records how the port is opened and configured"""
+
+  opened = []
+
+  def __init__(self):
+    FakeFtdi.__init__(self)
+    self.bitmodes = []
+    self.closed = False
+
+  def open(self, vendor, product, interface):
+    FakeUsbFtdi.opened.append((vendor, product, interface))
+
+  def close(self):
+    self.closed = True
+
+  def set_bitmode(self, direction, mode):
+    self.bitmodes.append((direction, mode))
+
+  def _set_frequency(self, frequency):
+    return frequency
+
+  def set_latency_timer(self, latency):
+    pass
+
+  def write_data_set_chunksize(self, size):
+    pass
+
+  def read_data_set_chunksize(self, size):
+    pass
+
+  def set_flowctrl(self, flowctrl):
+    pass
+
+
+class Test (unittest.TestCase):
+  """Unit test for the shared FTDI session"""
+
+  def setUp(self):
+    FakeUsbFtdi.opened = []
+    self.session = FtdiSession(0x0403, 0x8530, ftdi_class = FakeUsbFtdi)
+
+  def test_ports_opened_once(self):
+    self.session.async_fifo()
+    self.session.bitbang(0x00)
+    self.session.bitbang(0x40)
+    self.session.bitbang(0x00)
+    self.session.sync_fifo()
+    self.session.sync_fifo()
+    self.assertEqual(FakeUsbFtdi.opened, [(0x0403, 0x8530, FIFO_INTERFACE),
+                                          (0x0403, 0x8530, CONTROL_INTERFACE)])
+    self.assertEqual(self.session.open_count, 2)
+    self.assertEqual(self.session.get_mode(FIFO_INTERFACE), MODE_SYNC_FIFO)
+    self.assertEqual(self.session.get_mode(CONTROL_INTERFACE), MODE_BITBANG)
+    #the direction changes are bitmode changes of the open port
+    port = self.session.get_port(CONTROL_INTERFACE)
+    self.assertEqual([b[0] for b in port.bitmodes], [0x00, 0x00, 0x40, 0x00])
+
+  def test_mode_switch(self):
+    port = self.session.sync_fifo()
+    self.assertEqual(len(port.bitmodes), 1)
+    self.session.async_fifo()
+    self.assertEqual(self.session.get_mode(FIFO_INTERFACE), MODE_ASYNC_FIFO)
+    self.assertTrue(self.session.sync_fifo() is port)
+    self.assertEqual(len(port.bitmodes), 3)
+
+  def test_shared_dionysus(self):
+    first = Dionysus(session = self.session)
+    first.write_register(2, 0x00, 0x1234)
+    second = Dionysus(session = self.session)
+    self.assertTrue(first.dev is second.dev)
+    self.assertEqual(second.read_register(2, 0x00), 0x1234)
+    self.assertEqual(first.get_board_identity(), "Dionysus:0403:8530")
+    #a shared session is not closed by Dionysus
+    del first
+    self.assertFalse(second.dev.closed)
+    self.assertEqual(self.session.open_count, 1)
+
+  def test_close(self):
+    port = self.session.sync_fifo()
+    self.session.close()
+    self.assertTrue(port.closed)
+    self.assertEqual(self.session.get_mode(FIFO_INTERFACE), None)
+
+  def test_control_close(self):
+    #a shared session is left open
+    dc = Dionysus_Control(session = self.session)
+    port = self.session.sync_fifo()
+    dc.close()
+    self.assertFalse(port.closed)
+
+    #a session created by the controller is closed
+    dc = Dionysus_Control()
+    dc.session = FtdiSession(0x0403, 0x8530, ftdi_class = FakeUsbFtdi)
+    dc.own_session = True
+    dc.set_sync_fifo_mode()
+    #the controller keeps the 2ms latency timer
+    self.assertEqual(dc.session.fifo_settings[1], 2)
+    port = dc.session.get_port(FIFO_INTERFACE)
+    dc.close()
+    self.assertTrue(port.closed)
+
+if __name__ == "__main__":
+  unittest.main()
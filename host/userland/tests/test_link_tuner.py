@@ -0,0 +1,205 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+from array import array as Array
+
+sys.path.append(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+
+from userland.dionysus.link_tuner import LinkProfiles
+from userland.dionysus.link_tuner import LinkTuner
+from userland.dionysus.link_tuner import DEFAULT_PROFILE
+from userland.dionysus.ftdi_session import FtdiSession
+from userland.dionysus.ftdi_session import FIFO_INTERFACE
+from userland.dionysus.dionysus import Dionysus
+from userland.olympus import WAIT_INTERRUPT
+from userland.emulator.board import EmulatedBoard
+
+IDENTITY = "Dionysus:0403:8530"
+
+
+class TunableBoard(EmulatedBoard):
+  """EmulatedBoard that records the link settings, the link stalls when the
+  latency timer is set to 1 and a chunk size of 0x1000 is not supported"""
+
+  def __init__(self):
+    EmulatedBoard.__init__(self)
+    self.latency_timer = None
+    self.chunk_sizes = None
+    self.configured = 0
+
+  def set_bitmode(self, direction, mode):
+    self.configured += 1
+
+  def _set_frequency(self, frequency):
+    return frequency
+
+  def set_latency_timer(self, latency):
+    self.latency_timer = latency
+
+  def write_data_set_chunksize(self, size):
+    if size == 0x1000:
+      raise IOError("chunk size not supported")
+    self.chunk_sizes = (size, self.chunk_sizes)
+
+  def read_data_set_chunksize(self, size):
+    self.chunk_sizes = (self.chunk_sizes[0], size)
+
+  def set_flowctrl(self, flowctrl):
+    pass
+
+  def read_data(self, size):
+    if self.latency_timer == 1:
+      return ""
+    return EmulatedBoard.read_data(self, size)
+
+
+class Test (unittest.TestCase):
+  """Unit test for the FTDI link tuner"""
+
+  def setUp(self):
+    self.directory = tempfile.mkdtemp()
+    self.profiles = LinkProfiles(os.path.join(self.directory, "profiles.json"))
+    self.session = FtdiSession(ftdi_class = TunableBoard)
+
+  def tearDown(self):
+    shutil.rmtree(self.directory)
+
+  def open_dionysus(self):
+    d = Dionysus(session = self.session, link_profiles = self.profiles)
+    d.drt_cache = None
+    return d
+
+  def test_default_profile(self):
+    d = self.open_dionysus()
+    port = self.session.get_port(FIFO_INTERFACE)
+    self.assertEqual(port.latency_timer, DEFAULT_PROFILE["latency"])
+    self.assertEqual(port.chunk_sizes, (0x10000, 0x10000))
+    self.assertEqual(d.framer.chunk_size, DEFAULT_PROFILE["read_size"])
+
+  def test_profile_loaded(self):
+    self.profiles.store(IDENTITY, {"latency": 8,
+                                   "write_chunk_size": 0x4000,
+                                   "read_chunk_size": 0x1000,
+                                   "read_size": 0x1000}, {})
+    d = self.open_dionysus()
+    port = self.session.get_port(FIFO_INTERFACE)
+    self.assertEqual(port.latency_timer, 8)
+    self.assertEqual(port.chunk_sizes, (0x4000, 0x1000))
+    self.assertEqual(d.framer.chunk_size, 0x1000)
+    self.assertEqual(d.get_wait_strategy(WAIT_INTERRUPT).period, 0.008)
+    self.assertEqual(d.get_link_profile()["frequency"], DEFAULT_PROFILE["frequency"])
+
+  def test_bad_profile_file(self):
+    f = open(self.profiles.path, "w")
+    f.write("not json")
+    f.close()
+    self.assertEqual(self.profiles.lookup(IDENTITY), None)
+    self.open_dionysus()
+    port = self.session.get_port(FIFO_INTERFACE)
+    self.assertEqual(port.latency_timer, DEFAULT_PROFILE["latency"])
+
+  def test_tune(self):
+    d = self.open_dionysus()
+    d.read_drt()
+    tuner = LinkTuner(d, scratch = 0)
+    tuner.latencies = [1, 8]
+    tuner.chunk_sizes = [0x4000]
+    tuner.read_sizes = [0x1000, 0x4000]
+    tuner.repeat = 1
+    tuner.stability_repeat = 2
+    tuner.memory_words = 256
+    tuner.timeout = 0.05
+    selected, results = tuner.tune()
+
+    self.assertEqual(len(results), 4)
+    for result in results:
+      self.assertEqual(result["stable"], result["profile"]["latency"] != 1)
+    self.assertTrue(selected["stable"])
+    self.assertEqual(selected["runs"], 2)
+    self.assertEqual(selected["profile"]["latency"], 8)
+    #the selected profile is left applied and saved for the board
+    port = self.session.get_port(FIFO_INTERFACE)
+    self.assertEqual(port.latency_timer, 8)
+    self.assertEqual(self.profiles.lookup(IDENTITY), selected["profile"])
+    entry = json.load(open(self.profiles.path))[IDENTITY]
+    self.assertEqual(entry["stability"]["errors"], 0)
+    self.assertEqual(d.read_timeout, Dionysus.read_timeout)
+
+  def test_no_stable_setting(self):
+    d = self.open_dionysus()
+    d.read_drt()
+    tuner = LinkTuner(d)
+    tuner.latencies = [1]
+    tuner.chunk_sizes = [0x4000]
+    tuner.read_sizes = [0x4000]
+    tuner.repeat = 1
+    tuner.timeout = 0.05
+    selected, results = tuner.tune()
+    self.assertEqual(selected, None)
+    self.assertFalse(results[0]["stable"])
+    #the settings are restored and nothing is saved
+    port = self.session.get_port(FIFO_INTERFACE)
+    self.assertEqual(port.latency_timer, DEFAULT_PROFILE["latency"])
+    self.assertEqual(self.profiles.lookup(IDENTITY), None)
+
+  def test_memory_untouched(self):
+    d = self.open_dionysus()
+    d.read_drt()
+    d.write_memory(0, Array('B', [0x12, 0x34, 0x56, 0x78]))
+    tuner = LinkTuner(d)
+    tuner.memory_words = 4
+    self.assertEqual(tuner.run_workload(), 0)
+    self.assertEqual(len(tuner.pattern), 0)
+    self.assertEqual(d.read_memory(0, 1).tolist(), [0x12, 0x34, 0x56, 0x78])
+
+    #only the scratch region is written
+    tuner = LinkTuner(d, scratch = 8)
+    tuner.memory_words = 4
+    self.assertEqual(tuner.run_workload(), 0)
+    self.assertEqual(len(tuner.pattern), 16)
+    self.assertEqual(d.read_memory(0, 1).tolist(), [0x12, 0x34, 0x56, 0x78])
+    self.assertEqual(d.read_memory(8, 4), tuner.pattern)
+
+  def test_unsupported_setting(self):
+    d = self.open_dionysus()
+    d.read_drt()
+    tuner = LinkTuner(d)
+    tuner.latencies = [8]
+    tuner.chunk_sizes = [0x1000, 0x4000]
+    tuner.read_sizes = [0x4000]
+    tuner.repeat = 1
+    tuner.stability_repeat = 1
+    selected, results = tuner.tune(save = False)
+    #the setting the port rejects is unstable and the sweep goes on
+    self.assertFalse(results[0]["stable"])
+    self.assertEqual(results[0]["errors"], 1)
+    self.assertEqual(results[0]["time"], None)
+    self.assertTrue(results[1]["stable"])
+    self.assertEqual(selected["profile"]["write_chunk_size"], 0x4000)
+
+  def test_interrupted_sweep(self):
+    d = self.open_dionysus()
+    d.read_drt()
+    tuner = LinkTuner(d)
+    tuner.latencies = [8, 16]
+    tuner.chunk_sizes = [0x4000]
+    tuner.read_sizes = [0x4000]
+    tuner.repeat = 1
+    evaluate = tuner.evaluate
+    def interrupted(profile, repeat = None):
+      if profile["latency"] == 16:
+        raise KeyboardInterrupt()
+      return evaluate(profile, repeat)
+    tuner.evaluate = interrupted
+    self.assertRaises(KeyboardInterrupt, tuner.tune)
+    #the settings the link had before the sweep are restored
+    port = self.session.get_port(FIFO_INTERFACE)
+    self.assertEqual(port.latency_timer, DEFAULT_PROFILE["latency"])
+    self.assertEqual(d.read_timeout, Dionysus.read_timeout)
+    self.assertEqual(self.profiles.lookup(IDENTITY), None)
+
+if __name__ == "__main__":
+  unittest.main()
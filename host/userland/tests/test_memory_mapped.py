@@ -0,0 +1,103 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+from array import array as Array
+
+sys.path.append(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+
+from userland.olympus import OlympusCommError
+from userland.memory_mapped.memory_mapped import MemoryMapped
+from userland.emulator.mapped import MappedImage
+from userland.emulator.slaves import DEVICE_SPI
+from userland.drivers import gpio
+from userland.drivers import spi
+from userland.wait import SpinWait
+from userland.olympus import WAIT_INTERRUPT
+
+GPIO_ID = 1
+SPI_ID = 4
+MEMORY_SIZE = 0x10000
+
+
+class Test (unittest.TestCase):
+  """Unit test for the memory mapped interface"""
+
+  def setUp(self):
+    self.directory = tempfile.mkdtemp()
+    path = os.path.join(self.directory, "image")
+    self.image = MappedImage(path, memory_size = MEMORY_SIZE)
+    self.oly = MemoryMapped(path, memory_size = MEMORY_SIZE)
+
+  def tearDown(self):
+    self.oly.close()
+    self.image.close()
+    shutil.rmtree(self.directory)
+
+  def test_ping_and_drt(self):
+    self.oly.ping()
+    self.oly.read_drt()
+    self.assertEqual(self.oly.get_number_of_devices(), 7)
+    self.assertEqual(self.oly.find_devices(DEVICE_SPI), (3,))
+    self.assertEqual(self.oly.get_device_address(3), SPI_ID)
+    self.assertTrue(self.oly.is_memory_device(6))
+
+  def test_registers(self):
+    self.oly.write_register(GPIO_ID, gpio.GPIO_OUTPUT_ENABLE, 0xFF)
+    self.oly.write_register(GPIO_ID, gpio.GPIO_PORT, 0x5A)
+    self.image.update()
+    self.assertEqual(self.image.slaves[0].registers[gpio.GPIO_PORT], 0x5A)
+    self.assertEqual(self.oly.read_register(GPIO_ID, gpio.GPIO_PORT), 0x5A)
+
+    #the busy bit of the SPI core clears once the model sees the write
+    self.oly.write_register(SPI_ID, spi.CONTROL, spi.CONTROL_GO_BUSY)
+    self.image.update()
+    self.assertEqual(self.oly.read_register(SPI_ID, spi.CONTROL) &
+                     spi.CONTROL_GO_BUSY, 0)
+
+  def test_memory(self):
+    data = Array('B', range(256) * 4)
+    self.oly.write_memory(0x100, data)
+    self.assertEqual(self.image.read_memory_words(0x100, 256), data.tostring())
+    self.assertEqual(self.oly.read_memory(0x100, 256), data)
+
+    #views follow the bus without copying
+    view = self.oly.read_view(0, 0x100, 1, mem_device = True)
+    self.oly.write(0, 0x100, bytearray("\x01\x02\x03\x04"), mem_device = True)
+    self.assertEqual(view.tobytes(), "\x01\x02\x03\x04")
+
+  def test_queue(self):
+    self.oly.write_register(GPIO_ID, gpio.INTERRUPT_ENABLE, 0x03)
+    read = self.oly.queue_read(GPIO_ID, gpio.INTERRUPT_ENABLE, 1)
+    self.oly.queue_write(0, 0x10, bytearray(8), mem_device = True)
+    self.oly.flush_queue()
+    self.assertEqual(list(read.result()), [0x00, 0x00, 0x00, 0x03])
+    self.assertEqual(self.oly.stats()["bytes written"], 12)
+
+  def test_bounds(self):
+    self.assertRaises(OlympusCommError, self.oly.read, 0,
+                      MEMORY_SIZE / 4, 1, True)
+    self.assertRaises(OlympusCommError, self.oly.read, GPIO_ID, 0x400)
+    self.assertRaises(OlympusCommError, MemoryMapped,
+                      os.path.join(self.directory, "missing"))
+
+  def test_interrupts(self):
+    self.oly.set_wait_strategy(WAIT_INTERRUPT, SpinWait())
+    self.assertFalse(self.oly.wait_for_interrupts(wait_time = 0.01))
+    self.image.interrupt(GPIO_ID)
+    self.assertTrue(self.oly.wait_for_interrupts(wait_time = 0.1))
+    self.assertTrue(self.oly.is_interrupt_for_slave(GPIO_ID))
+    #the acknowledge clears the interrupt
+    self.image.update()
+    self.assertFalse(self.oly.wait_for_interrupts(wait_time = 0.01))
+
+  def test_reset(self):
+    self.oly.write_register(GPIO_ID, gpio.GPIO_OUTPUT_ENABLE, 0xFF)
+    self.image.update()
+    self.oly.reset()
+    self.image.update()
+    self.assertEqual(self.oly.read_register(GPIO_ID, gpio.GPIO_OUTPUT_ENABLE), 0)
+
+if __name__ == "__main__":
+  unittest.main()
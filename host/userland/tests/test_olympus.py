@@ -0,0 +1,146 @@
+import unittest
+import os
+import sys
+from array import array as Array
+
+sys.path.append(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+
+from userland import olympus
+from userland.dionysus.dionysus import Dionysus
+from userland.tests.fake_ftdi import FakeFtdi
+
+
+class Test (unittest.TestCase):
+  """Unit test for the Olympus base class"""
+
+  def setUp(self):
+    self.numpy = olympus.numpy
+    self.dev = FakeFtdi()
+    self.oly = Dionysus(dev = self.dev)
+    self.oly.read_timeout = 0.1
+
+  def tearDown(self):
+    olympus.numpy = self.numpy
+
+  def test_bytes_to_words(self):
+    data = Array('B', [0x01, 0x02, 0x03, 0x04, 0xFF, 0xFE, 0xFD, 0xFC])
+    words = olympus.bytes_to_words(data)
+    self.assertEqual(list(words), [0x01020304, 0xFFFEFDFC])
+
+  def test_words_to_bytes(self):
+    data = olympus.words_to_bytes([0x01020304, 0xFFFEFDFC])
+    self.assertEqual(data.tolist(), [0x01, 0x02, 0x03, 0x04, 0xFF, 0xFE, 0xFD, 0xFC])
+
+  def test_array_conversion(self):
+    olympus.numpy = None
+    words = olympus.bytes_to_words(Array('B', [0xDE, 0xAD, 0xBE, 0xEF]))
+    self.assertEqual(words.itemsize, 4)
+    self.assertEqual(list(words), [0xDEADBEEF])
+    self.assertEqual(olympus.words_to_bytes(words).tolist(), [0xDE, 0xAD, 0xBE, 0xEF])
+
+  def test_read_write_words(self):
+    self.oly.write_words(2, 0x10, [1, 2, 0x80000000])
+    self.assertEqual(list(self.oly.read_words(2, 0x10, 3)), [1, 2, 0x80000000])
+    self.oly.write_register(2, 0x20, 0xCAFEF00D)
+    self.assertEqual(self.oly.read_register(2, 0x20), 0xCAFEF00D)
+
+  def test_register_bits(self):
+    self.oly.write_register(2, 0, 0x01)
+    self.oly.set_register_bit(2, 0, 4)
+    self.assertEqual(self.oly.read_register(2, 0), 0x11)
+    self.oly.clear_register_bit(2, 0, 0)
+    self.assertTrue(self.oly.is_register_bit_set(2, 0, 4))
+    self.assertFalse(self.oly.is_register_bit_set(2, 0, 0))
+
+  def test_read_registers(self):
+    self.oly.write_words(2, 0x10, [0, 1, 2, 3])
+    self.oly.write_register(3, 0x04, 0x44)
+    self.dev.write_count = 0
+    self.dev.command_count = 0
+    values = self.oly.read_registers([(2, 0x13), (3, 0x04), (2, 0x10), (2, 0x11), (2, 0x13)])
+    self.assertEqual(values, [3, 0x44, 0, 1, 3])
+    #0x10 - 0x11 and 0x13 on device 2, 0x04 on device 3
+    self.assertEqual(self.dev.command_count, 3)
+    self.assertEqual(self.dev.write_count, 1)
+
+  def test_write_registers(self):
+    self.dev.write_count = 0
+    self.dev.command_count = 0
+    self.oly.write_registers([(2, 0x08, 0x08),
+                              (2, 0x09, 0x09),
+                              (2, 0x0A, -1),
+                              (4, 0x01, 0x41),
+                              (2, 0x08, 0x88)])
+    self.assertEqual(self.dev.command_count, 3)
+    self.assertEqual(self.dev.write_count, 1)
+    self.assertEqual(self.oly.read_registers([(2, 0x08), (2, 0x09), (2, 0x0A), (4, 0x01)]),
+                     [0x88, 0x09, 0xFFFFFFFF, 0x41])
+
+  def test_cacheable_register(self):
+    self.oly.set_register_mode(2, 0x01, olympus.REGISTER_CACHEABLE)
+    self.dev.registers[(2, 0x01)] = 0x10
+    self.assertEqual(self.oly.read_register(2, 0x01), 0x10)
+    self.dev.registers[(2, 0x01)] = 0x20
+    self.dev.command_count = 0
+    self.assertEqual(self.oly.read_register(2, 0x01), 0x10)
+    self.oly.set_register_bit(2, 0x01, 0)
+    #only the write goes to the device
+    self.assertEqual(self.dev.command_count, 1)
+    self.assertEqual(self.dev.registers[(2, 0x01)], 0x11)
+    self.oly.invalidate_registers(2)
+    self.dev.registers[(2, 0x01)] = 0x30
+    self.assertEqual(self.oly.read_registers([(2, 0x00), (2, 0x01)]), [0, 0x30])
+
+  def test_write_only_register(self):
+    self.oly.set_register_mode(2, 0x02, olympus.REGISTER_WRITE_ONLY)
+    self.oly.write_registers([(2, 0x02, 0x05)])
+    #the device returns something else when it is read
+    self.dev.registers[(2, 0x02)] = 0x00
+    self.assertEqual(self.oly.read_register(2, 0x02), 0x05)
+    self.oly.reset()
+    self.assertEqual(self.oly.read_register(2, 0x02), 0x00)
+
+  def test_interrupt_invalidates(self):
+    self.oly.set_register_mode(2, 0x01, olympus.REGISTER_CACHEABLE)
+    self.oly.set_register_mode(3, 0x01, olympus.REGISTER_CACHEABLE)
+    self.oly.write_register(2, 0x01, 0x10)
+    self.oly.write_register(3, 0x01, 0x10)
+    self.dev.registers[(2, 0x01)] = 0x20
+    self.dev.registers[(3, 0x01)] = 0x20
+    self.dev.interrupt(1 << 2)
+    self.assertTrue(self.oly.wait_for_interrupts(wait_time = 0.1))
+    self.assertEqual(self.oly.read_registers([(2, 0x01), (3, 0x01)]), [0x20, 0x10])
+
+  def test_chunked_memory(self):
+    self.oly.memory_packet_words = 4
+    self.oly.memory_pipeline_depth = 2
+    data = Array('B', range(0, 40))
+    progress = []
+    self.dev.write_count = 0
+    self.dev.command_count = 0
+    self.oly.write_memory(0x100, bytearray(data), progress = lambda d, t: progress.append((d, t)))
+    #10 words in packets of 4, 2 packets in each burst
+    self.assertEqual(self.dev.command_count, 3)
+    self.assertEqual(self.dev.write_count, 2)
+    self.assertEqual(progress, [(32, 40), (40, 40)])
+    self.assertEqual(self.dev.memory[0x100], 0x00010203)
+    self.assertEqual(self.dev.memory[0x109], 0x24252627)
+
+    progress = []
+    read_data = self.oly.read_memory(0x100, 10, progress = lambda d, t: progress.append((d, t)))
+    self.assertEqual(read_data.tolist(), data.tolist())
+    self.assertEqual(progress, [(32, 40), (40, 40)])
+
+  def test_memory_sources(self):
+    words = Array(olympus.WORD_TYPECODE, [0x11223344])
+    self.oly.write_memory(0x00, words)
+    self.assertEqual(self.dev.memory[0x00], olympus.bytes_to_words(words.tostring())[0])
+    self.oly.write_memory(0x01, "\x01\x02\x03\x04\x05")
+    self.assertEqual(self.dev.memory[0x01], 0x01020304)
+    #the last word is padded
+    self.assertEqual(self.dev.memory[0x02], 0x05000000)
+    self.oly.write_memory(0x03, memoryview("\xAA\xBB\xCC\xDD"))
+    self.assertEqual(self.dev.memory[0x03], 0xAABBCCDD)
+
+if __name__ == "__main__":
+  unittest.main()
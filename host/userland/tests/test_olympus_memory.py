@@ -0,0 +1,76 @@
+import unittest
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+
+from userland.olympus_memory import OlympusMemory
+from userland.dionysus.dionysus import Dionysus
+from userland.tests.fake_ftdi import FakeFtdi
+
+
+class Test (unittest.TestCase):
+  """Unit test for the cached view of the memory bus"""
+
+  def setUp(self):
+    self.dev = FakeFtdi()
+    self.oly = Dionysus(dev = self.dev)
+    self.oly.read_timeout = 0.1
+    for i in range (0, 64):
+      self.dev.memory[i] = i
+    self.memory = OlympusMemory(self.oly, size = 256, page_size = 16,
+                                cache_pages = 4, read_ahead = 2)
+
+  def test_slice(self):
+    self.assertEqual(len(self.memory), 256)
+    self.assertEqual(self.memory[4:12], bytearray([0, 0, 0, 1, 0, 0, 0, 2]))
+    self.assertEqual(self.memory[7], 1)
+    self.assertEqual(self.memory[-1], 63)
+    self.assertEqual(self.memory[3:12:4], bytearray([0, 1, 2]))
+    self.assertRaises(IndexError, self.memory.__getitem__, 256)
+
+  def test_page_cache(self):
+    self.memory[0:4]
+    self.dev.command_count = 0
+    self.memory[4:8]
+    self.memory[0:16]
+    self.assertEqual(self.dev.command_count, 0)
+    self.assertEqual(self.memory.hits, 2)
+
+  def test_read_ahead(self):
+    self.memory.read(16)
+    self.dev.command_count = 0
+    #the second page triggers the read ahead of the next two pages
+    self.memory.read(48)
+    self.assertEqual(self.dev.command_count, 1)
+    self.assertEqual(self.memory.tell(), 64)
+
+  def test_write_back(self):
+    self.memory[0:4] = bytearray([0xAA, 0xBB, 0xCC, 0xDD])
+    self.memory.seek(16)
+    self.memory.write("\x11\x22\x33\x44")
+    self.assertEqual(self.dev.memory[0], 0)
+    self.dev.command_count = 0
+    self.memory.flush()
+    #the two dirty pages are consecutive
+    self.assertEqual(self.dev.command_count, 1)
+    self.assertEqual(self.dev.memory[0], 0xAABBCCDD)
+    self.assertEqual(self.dev.memory[4], 0x11223344)
+    self.assertEqual(self.dev.memory[1], 1)
+
+  def test_eviction(self):
+    self.memory[0] = 0xFF
+    for page in range (1, 6):
+      self.memory[page * 16]
+    #the dirty page was written back when it was evicted
+    self.assertEqual(self.dev.memory[0], 0xFF000000)
+
+  def test_readinto(self):
+    buf = bytearray(8)
+    self.memory.seek(8)
+    self.assertEqual(self.memory.readinto(buf), 8)
+    self.assertEqual(buf, bytearray([0, 0, 0, 2, 0, 0, 0, 3]))
+    self.assertEqual(self.memory.memoryview(8, 12).tobytes(), "\x00\x00\x00\x02")
+
+if __name__ == "__main__":
+  unittest.main()
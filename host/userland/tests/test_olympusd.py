@@ -0,0 +1,108 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+from array import array as Array
+
+sys.path.append(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+
+from userland.olympusd import OlympusDaemon
+from userland.olympusd import OlympusClient
+from userland.olympusd import pack_batch
+from userland.olympus import OlympusCommError
+from userland.dionysus.dionysus import Dionysus
+from userland.tests.fake_ftdi import FakeFtdi
+
+
+class Test (unittest.TestCase):
+  """Unit test for the Olympus multiplexing daemon"""
+
+  def setUp(self):
+    self.directory = tempfile.mkdtemp()
+    self.path = os.path.join(self.directory, "olympusd.sock")
+    self.dev = FakeFtdi()
+    self.oly = Dionysus(dev = self.dev)
+    self.oly.read_timeout = 0.1
+    self.daemon = OlympusDaemon(self.oly, self.path)
+    self.daemon.start()
+    self.clients = [OlympusClient(self.path), OlympusClient(self.path)]
+
+  def tearDown(self):
+    for client in self.clients:
+      client.close()
+    self.daemon.stop()
+    shutil.rmtree(self.directory)
+
+  def test_shared_registers(self):
+    first, second = self.clients
+    first.write_register(2, 0x10, 0x1234)
+    self.assertEqual(second.read_register(2, 0x10), 0x1234)
+    second.ping()
+
+  def test_pipelined_queue(self):
+    client = self.clients[0]
+    client.write_words(2, 0x00, [1, 2, 3])
+    requests = [client.queue_read(2, i) for i in range (0, 3)]
+    client.flush_queue()
+    self.assertEqual([r.result().tolist()[-1] for r in requests], [1, 2, 3])
+    self.assertEqual(client.read_registers([(2, 2), (2, 0)]), [3, 1])
+
+  def test_interrupts(self):
+    first, second = self.clients
+    self.assertFalse(first.wait_for_interrupts(wait_time = 0.02))
+    with self.oly.lock:
+      self.dev.interrupt(1 << 2)
+    self.assertTrue(first.wait_for_interrupts(wait_time = 1))
+    self.assertTrue(first.is_interrupt_for_slave(2))
+    #every client sees the interrupt
+    self.assertTrue(second.wait_for_interrupts(wait_time = 1))
+
+  def test_stats(self):
+    self.clients[0].write_words(2, 0x00, [1, 2])
+    self.clients[1].read_words(2, 0x00, 2)
+    stats = self.clients[0].get_client_stats()
+    self.assertEqual(len(stats), 2)
+    bytes_written = sum([s["bytes written"] for s in stats])
+    bytes_read = sum([s["bytes read"] for s in stats])
+    self.assertEqual(bytes_written, 8)
+    self.assertEqual(bytes_read, 8)
+
+  def test_dead_board(self):
+    #the interface sends its queue on its own while the scheduler queues
+    self.oly.max_queue_depth = 4
+    #the board stops responding
+    self.oly.framer.read_data = lambda size: ""
+    client = self.clients[0]
+    #more writes than the depth of the queue of the interface
+    requests = []
+    def write():
+      for i in range(64):
+        requests.append(client.queue_write(2, i, Array('B', [0, 0, 0, i])))
+      client.flush_queue()
+    self.assertRaises(OlympusCommError, write)
+    for request in requests:
+      self.assertRaises(OlympusCommError, request.result)
+    #the scheduler thread is still running
+    self.assertTrue(self.daemon.threads[1].is_alive())
+    self.assertRaises(OlympusCommError, client.ping)
+    #the daemon recovers with the board
+    self.oly.framer.read_data = self.dev.read_data
+    client.ping()
+
+  def test_unaligned_write(self):
+    client = self.clients[0]
+    data = Array('B', [0, 0, 0, 1, 0x55])
+    self.assertRaises(OlympusCommError, client.write, 2, 0x00, data)
+    self.assertRaises(OlympusCommError, client.queue_write, 2, 0x00, data)
+    self.assertRaises(OlympusCommError, pack_batch, [(2, 0x00, data, False)])
+    #nothing was sent, the connection is still in sync
+    self.assertEqual(client.request_queue, [])
+    client.write_register(2, 0x00, 0x1234)
+    self.assertEqual(client.read_register(2, 0x00), 0x1234)
+
+  def test_no_daemon(self):
+    self.assertRaises(OlympusCommError, OlympusClient, os.path.join(self.directory, "missing"))
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,122 @@
+import unittest
+import os
+import sys
+import time
+import socket
+from array import array as Array
+
+sys.path.append(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+
+from userland.olympusd import OlympusDaemon
+from userland.olympusd import OlympusClient
+from userland.olympusd import parse_address
+from userland.olympusd import pack_batch
+from userland.olympusd import unpack_batch
+from userland.olympus import OlympusCommError
+from userland.emulator.board import EmulatedBoard
+from userland.emulator.board import emulated_dionysus
+from userland.drivers import gpio
+
+GPIO_ID = 1
+
+
+class Test (unittest.TestCase):
+  """Unit test for olympusd over TCP with an emulated board"""
+
+  def setUp(self):
+    self.board = EmulatedBoard()
+    self.oly = emulated_dionysus(self.board)
+    self.oly.read_timeout = 0.5
+    self.daemon = OlympusDaemon(self.oly, ("127.0.0.1", 0))
+    self.daemon.start()
+    self.client = OlympusClient(self.daemon.address)
+
+  def tearDown(self):
+    self.client.close()
+    self.daemon.stop()
+
+  def test_parse_address(self):
+    self.assertEqual(parse_address("rack3:9594"), ("rack3", 9594))
+    self.assertEqual(parse_address("/tmp/olympusd.sock"), "/tmp/olympusd.sock")
+    self.assertEqual(parse_address(("localhost", 1)), ("localhost", 1))
+
+  def test_board(self):
+    self.client.ping()
+    self.client.read_drt()
+    self.assertEqual(self.client.get_number_of_devices(), 7)
+    self.client.write_register(GPIO_ID, gpio.GPIO_OUTPUT_ENABLE, 0xFF)
+    self.assertEqual(self.client.read_register(GPIO_ID, gpio.GPIO_OUTPUT_ENABLE), 0xFF)
+
+    data = Array('B', range(256) * 64)
+    self.client.write_memory(0x00, data)
+    self.assertEqual(self.client.read_memory(0x00, len(data) / 4), data)
+
+  def test_window(self):
+    self.client.window = 4
+    self.client.write_words(0, 0, [1, 2, 3, 4, 5], mem_device = True)
+    requests = [self.client.queue_read(0, i % 5, mem_device = True)
+                for i in range(40)]
+    self.client.flush_queue()
+    self.assertEqual([r.result()[3] for r in requests], [1, 2, 3, 4, 5] * 8)
+
+  def test_batch_writes(self):
+    self.client.batch_writes = True
+    self.client.max_batch = 8
+    for i in range(20):
+      self.client.queue_write(0, i, Array('B', [0, 0, 0, i]), mem_device = True)
+    read = self.client.queue_read(0, 0, 20, mem_device = True)
+    self.client.flush_queue()
+    self.assertEqual(list(read.result()[3::4]), range(20))
+    #three batches and the read
+    self.assertEqual(self.client.get_client_stats()[0]["requests"], 4)
+
+  def test_full_batch_failing_board(self):
+    self.client.batch_writes = True
+    #the board stops responding
+    self.oly.framer.read_data = lambda size: ""
+    requests = []
+    def write():
+      #one batch as large as the queue of the interface in the daemon
+      for i in range(self.client.max_batch):
+        requests.append(self.client.queue_write(0, i, Array('B', [0, 0, 0, i]),
+                                                mem_device = True))
+      self.client.flush_queue()
+    self.assertRaises(OlympusCommError, write)
+    for request in requests:
+      self.assertRaises(OlympusCommError, request.result)
+    self.oly.framer.read_data = self.board.read_data
+    self.client.ping()
+
+  def test_timeout(self):
+    #a daemon that never answers
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(1)
+    try:
+      client = OlympusClient(listener.getsockname(), timeout = 0.05)
+      self.assertRaises(OlympusCommError, client.ping)
+      #the connection is dropped instead of reading a late response
+      self.assertRaises(OlympusCommError, client.ping)
+    finally:
+      listener.close()
+
+  def test_stale_interrupts(self):
+    other = OlympusClient(self.daemon.address)
+    try:
+      self.daemon.interrupt_hold = 0.05
+      with self.oly.lock:
+        self.board.interrupt(GPIO_ID)
+      self.assertTrue(self.client.wait_for_interrupts(wait_time = 1))
+      time.sleep(0.1)
+      #the other client was not waiting, the interrupt is not delivered late
+      self.assertFalse(other.wait_for_interrupts(wait_time = 0.05))
+    finally:
+      other.close()
+
+  def test_pack_batch(self):
+    writes = [(1, 0x10, Array('B', [1, 2, 3, 4]), False),
+              (0, 0x20, Array('B', range(8)), True)]
+    self.assertEqual(unpack_batch(pack_batch(writes)), writes)
+
+if __name__ == "__main__":
+  unittest.main()
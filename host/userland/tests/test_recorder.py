@@ -0,0 +1,89 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+
+from userland.dionysus.dionysus import Dionysus
+from userland.recorder import TransactionRecorder
+from userland.recorder import ReplayDevice
+from userland.recorder import RecorderError
+from userland.recorder import read_log
+from userland.recorder import RECORD_WRITE
+from userland.recorder import RECORD_READ
+from userland.recorder import RECORD_PURGE
+from userland.tests.fake_ftdi import FakeFtdi
+
+
+class Test (unittest.TestCase):
+  """Unit test for the transaction recorder and the replay device"""
+
+  def setUp(self):
+    self.directory = tempfile.mkdtemp()
+    self.path = os.path.join(self.directory, "session.olyrec")
+
+  def tearDown(self):
+    shutil.rmtree(self.directory)
+
+  def record_session(self):
+    dev = FakeFtdi()
+    dev.registers[(1, 2)] = 0x12345678
+    oly = Dionysus(dev = dev)
+    oly.start_recording(self.path)
+    oly.ping()
+    oly.write_register(1, 3, 0xAABBCCDD)
+    value = oly.read_register(1, 2)
+    oly.stop_recording()
+    self.assertEqual(oly.dev, dev)
+    return value
+
+  def test_record(self):
+    self.record_session()
+    records = read_log(self.path)
+    directions = [record[1] for record in records]
+    self.assertEqual(directions.count(RECORD_WRITE), 3)
+    self.assertTrue(RECORD_READ in directions)
+    self.assertTrue(RECORD_PURGE in directions)
+    #the first write is the ping
+    write = [record for record in records if record[1] == RECORD_WRITE][0]
+    self.assertEqual(write[2][:2], "\xCD\x00")
+
+  def test_replay(self):
+    self.assertEqual(self.record_session(), 0x12345678)
+    replay = ReplayDevice(self.path, strict = True)
+    oly = Dionysus(dev = replay)
+    oly.read_timeout = 0.5
+    oly.ping()
+    oly.write_register(1, 3, 0xAABBCCDD)
+    self.assertEqual(oly.read_register(1, 2), 0x12345678)
+    self.assertTrue(replay.finished())
+
+  def test_replay_mismatch(self):
+    self.record_session()
+    replay = ReplayDevice(self.path, strict = True)
+    self.assertRaises(RecorderError, replay.write_data, "\xCD\x02")
+
+  def test_ring_buffer_drops(self):
+    recorder = TransactionRecorder(self.path, capacity = 2)
+    #stop the writer thread so the ring buffer fills up
+    recorder.running = False
+    recorder.wakeup.set()
+    recorder.writer.join()
+    for i in range(4):
+      recorder.record(RECORD_WRITE, "\x00")
+    recorder.flush()
+    recorder.f.close()
+    self.assertEqual(recorder.records, 2)
+    self.assertEqual(recorder.dropped, 2)
+    self.assertEqual(len(read_log(self.path)), 2)
+
+  def test_not_a_log(self):
+    f = open(self.path, "wb")
+    f.write("nothing")
+    f.close()
+    self.assertRaises(RecorderError, read_log, self.path)
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import os
+import sys
+from array import array as Array
+
+sys.path.append(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+
+from userland.dionysus.dionysus import Dionysus
+from userland.drivers import spi
+from userland.tests.fake_ftdi import FakeFtdi
+
+
+class Test (unittest.TestCase):
+  """Unit test for the SPI driver register access"""
+
+  def setUp(self):
+    self.dev = FakeFtdi()
+    self.oly = Dionysus(dev = self.dev)
+    self.oly.read_timeout = 0.1
+    self.spi = spi.SPI(self.oly, 2)
+    #32-bit characters, MSB first
+    self.oly.write_register(2, spi.CONTROL, 32)
+
+  def test_set_write_data(self):
+    self.dev.command_count = 0
+    self.spi.set_write_data(Array('B', range(16)))
+    #one read of the control register and a single burst write of the four
+    #data registers
+    self.assertEqual(self.dev.command_count, 2)
+    self.assertEqual(self.dev.registers[(2, spi.WRITE_DATA0)], 0x0C0D0E0F)
+    self.assertEqual(self.dev.registers[(2, spi.WRITE_DATA1)], 0x08090A0B)
+    self.assertEqual(self.dev.registers[(2, spi.WRITE_DATA2)], 0x04050607)
+    self.assertEqual(self.dev.registers[(2, spi.WRITE_DATA3)], 0x00010203)
+
+  def test_get_read_data(self):
+    self.oly.write_words(2, spi.READ_DATA0, [0x0C0D0E0F, 0x08090A0B, 0x04050607, 0x00010203])
+    self.dev.command_count = 0
+    data = self.spi.get_read_data(6)
+    self.assertEqual(data.tolist(), [10, 11, 12, 13, 14, 15])
+    #one burst read
+    self.assertEqual(self.dev.command_count, 1)
+
+  def test_shadow_registers(self):
+    self.spi.set_clock_divider(10)
+    self.spi.set_slave_select_raw(0x01)
+    self.dev.command_count = 0
+    self.assertEqual(self.spi.get_clock_divider(), 10)
+    self.assertTrue(self.spi.is_spi_slave_selected(0))
+    self.assertEqual(self.dev.command_count, 0)
+
+  def test_set_dev_id(self):
+    self.spi.set_clock_divider(10)
+    self.spi.set_dev_id(3)
+    #the previous core is read from the device again
+    self.dev.registers[(2, spi.CLOCK_DIVIDER)] = 20
+    self.assertEqual(self.oly.read_register(2, spi.CLOCK_DIVIDER), 20)
+    self.assertEqual(self.oly.read_register(2, spi.CLOCK_DIVIDER), 20)
+    #the registers of the new core are cached
+    self.spi.set_clock_divider(5)
+    self.dev.command_count = 0
+    self.assertEqual(self.spi.get_clock_divider(), 5)
+    self.assertEqual(self.dev.command_count, 0)
+
+if __name__ == "__main__":
+  unittest.main()
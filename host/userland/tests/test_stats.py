@@ -0,0 +1,75 @@
+import unittest
+import os
+import sys
+import json
+import time
+from StringIO import StringIO
+
+sys.path.append(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+
+from userland import stats
+from userland.olympus import OlympusCommError
+from userland.dionysus.dionysus import Dionysus
+from userland.tests.fake_ftdi import FakeFtdi
+
+
+class Test (unittest.TestCase):
+  """Unit test for the transaction statistics"""
+
+  def setUp(self):
+    self.dev = FakeFtdi()
+    self.oly = Dionysus(dev = self.dev)
+    self.oly.read_timeout = 0.05
+
+  def test_size_bucket(self):
+    self.assertEqual([stats.size_bucket(s) for s in [0, 1, 4, 7, 8, 1000]],
+                     [0, 1, 4, 4, 8, 512])
+
+  def test_record(self):
+    statistics = stats.TransactionStats()
+    statistics.record("read", 2, 4, 0.000003)
+    statistics.record("read", 2, 4, 0.001)
+    snapshot = statistics.snapshot({"extra": 1})
+    self.assertEqual(snapshot["extra"], 1)
+    self.assertEqual(snapshot["bytes read"], 8)
+    operation = snapshot["operations"][0]
+    self.assertEqual(operation["count"], 2)
+    self.assertEqual(operation["min time"], 0.000003)
+    self.assertEqual(operation["max time"], 0.001)
+    #3us is below 4us, 1000us is below 1024us
+    self.assertEqual(operation["histogram"], {4: 1, 1024: 1})
+
+  def test_olympus_stats(self):
+    self.oly.write_words(2, 0x00, [1, 2])
+    self.oly.read_register(2, 0x00)
+    self.oly.read_memory(0x00, 4)
+    self.oly.ping()
+    snapshot = self.oly.stats()
+    self.assertEqual(snapshot["bytes written"], 8)
+    self.assertEqual(snapshot["bytes read"], 20)
+    keys = [(o["operation"], o["device id"], o["size"]) for o in snapshot["operations"]]
+    self.assertTrue(("write", 2, 8) in keys)
+    self.assertTrue(("read", 2, 4) in keys)
+    self.assertTrue(("read", "memory", 16) in keys)
+    self.assertTrue(("ping", None, 0) in keys)
+    #one purge before each burst, ping does not purge
+    self.assertEqual(snapshot["purges"], 3)
+    self.assertTrue("sync time" in snapshot)
+
+  def test_timeout(self):
+    self.dev.write_data = lambda data: len(data)
+    self.assertRaises(OlympusCommError, self.oly.read_register, 2, 0x00)
+    self.assertEqual(self.oly.stats()["timeouts"], 1)
+    self.oly.reset_stats()
+    self.assertEqual(self.oly.stats()["timeouts"], 0)
+
+  def test_dump(self):
+    stream = StringIO()
+    self.oly.start_stats_dump(interval = 0.01, stream = stream)
+    time.sleep(0.05)
+    self.oly.stop_stats_dump()
+    line = stream.getvalue().splitlines()[0]
+    self.assertTrue("operations" in json.loads(line))
+
+if __name__ == "__main__":
+  unittest.main()
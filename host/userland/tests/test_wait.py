@@ -0,0 +1,74 @@
+import unittest
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+
+from userland.wait import SpinWait
+from userland.wait import BackoffWait
+from userland.wait import BlockingWait
+from userland.framer import ResponseFramer
+from userland.olympus import WAIT_REGISTER
+from userland.olympus import WAIT_INTERRUPT
+from userland.olympus import OlympusCommError
+from userland.dionysus.dionysus import Dionysus
+from userland.tests.fake_ftdi import FakeFtdi
+
+
+class Test (unittest.TestCase):
+  """Unit test for the wait strategies"""
+
+  def test_spin(self):
+    strategy = SpinWait()
+    for attempt in range(10):
+      strategy.poll(attempt, time.time() + 1)
+    self.assertEqual(strategy.waits, 1)
+    self.assertEqual(strategy.polls, 10)
+    self.assertEqual(strategy.sleep_time, 0)
+
+  def test_backoff(self):
+    strategy = BackoffWait(initial = 0.001, maximum = 0.004, spin = 2)
+    self.assertEqual(strategy.delay(0), 0)
+    self.assertEqual(strategy.delay(1), 0)
+    self.assertEqual(strategy.delay(2), 0.001)
+    self.assertEqual(strategy.delay(3), 0.002)
+    self.assertEqual(strategy.delay(10), 0.004)
+
+  def test_timeout_limits_sleep(self):
+    strategy = BackoffWait(initial = 1, maximum = 1, spin = 0)
+    start = time.time()
+    strategy.poll(0, time.time() + 0.01)
+    self.assertTrue(time.time() - start < 0.5)
+
+  def test_blocking_pads_early_reads(self):
+    strategy = BlockingWait(period = 0.01)
+    start = time.time()
+    strategy.poll(0, time.time() + 1)
+    strategy.poll(1, time.time() + 1)
+    self.assertTrue(time.time() - start >= 0.009)
+
+  def test_framer(self):
+    chunks = ["", "", "", "\xDC\x01\x02"]
+    framer = ResponseFramer(lambda size: chunks.pop(0))
+    framer.wait = SpinWait()
+    frame = framer.get_frame(2, time.time() + 1)
+    self.assertEqual(frame.tobytes(), "\x01\x02")
+    self.assertEqual(framer.wait.waits, 1)
+    self.assertEqual(framer.wait.polls, 3)
+
+  def test_olympus(self):
+    oly = Dionysus(dev = FakeFtdi())
+    oly.read_timeout = 0.05
+    oly.set_wait_strategy(WAIT_INTERRUPT, SpinWait())
+    self.assertFalse(oly.wait_for_interrupts(wait_time = 0.01))
+    stats = oly.stats()["wait"]
+    self.assertEqual(stats[WAIT_INTERRUPT]["strategy"], "spin")
+    self.assertEqual(stats[WAIT_INTERRUPT]["waits"], 1)
+    self.assertEqual(stats[WAIT_REGISTER]["waits"], 0)
+    oly.reset_stats()
+    self.assertEqual(oly.get_wait_strategy(WAIT_INTERRUPT).polls, 0)
+    self.assertRaises(OlympusCommError, oly.set_wait_strategy, "memory", SpinWait())
+
+if __name__ == "__main__":
+  unittest.main()
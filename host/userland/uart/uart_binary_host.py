@@ -0,0 +1,59 @@
+#! /usr/bin/python
+
+"""
+UART_BINARY_HOST: UART_HOST speaking the binary framed protocol
+
+Every 32-bit word is sent as 4 bytes instead of 8 hex characters, the image
+must be built with the binary io handler generated by
+cbuilder/scripts/generate_io_handler.py
+"""
+
+"""
+Changes:
+10/18/2026
+	-Initial Commit
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+from userland import codec
+from userland.uart.uart_host import UART_HOST
+
+
+class UART_BINARY_HOST(UART_HOST):
+
+	def _send_command(self, command, address, count = 1, data = None, mem_device = False):
+		self.ser.write(codec.encode_binary_command(command, address,
+									count = count,
+									data = data,
+									mem_device = mem_device))
+
+	def _read_response(self, count = 1):
+		header = self.ser.read(codec.BINARY_UART_RESPONSE_HEADER.size)
+		if (len(header) < codec.BINARY_UART_RESPONSE_HEADER.size):
+			return None
+		rsp = codec.unpack_binary_response_header(header)
+		if (rsp is None):
+			#lost sync with the image
+			self.ser.flushInput()
+			return None
+
+		count, status, address = rsp
+		data = self.ser.read(count * 4)
+		if (len(data) < count * 4):
+			return None
+		return (status, address, codec.decode_binary_words(data))
+
+if __name__ == '__main__':
+	print "starting..."
+	urt = UART_BINARY_HOST()
+	if (not urt.ping()):
+		print "ping fail :("
+
+	if (len(urt.drt_string) == 0):
+		print "nothing read from DRT"
+	else:
+		print "drt table: \n" + urt.drt_string
+		urt.slave_unit_test()
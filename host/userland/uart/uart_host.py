@@ -6,6 +6,13 @@ UART_HOST: the main front interface to the UART_HOST bus system on the FPGA
 
 """
 Changes:
+10/18/2026
+	-read_drt reads the header and the device table with two multi-word reads
+	and parses them with the DRTManager
+	-the device queries use the decoded DRT of the DRTManager instead of
+	parsing the DRT lines, get_device_index returns the index of the device
+	-Commands are sent and responses are decoded by _send_command and
+	_read_response so the binary host (uart_binary_host.py) can change the format
 11/12/2011
 	-Changed read_data and read_mem_data to return a list of double words
 	read from urtamore
@@ -22,9 +29,18 @@ Changes:
 	-Added unit test for memory devices
 """
 
+import os
+import sys
 import serial
 import string
+import struct
 import time
+from array import array as Array
+
+sys.path.append(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+sys.path.append(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, os.pardir, "cbuilder", "drt"))
+from userland import codec
+from drt import DRTManager
 
 
 class UART_HOST:
@@ -37,14 +53,13 @@ class UART_HOST:
 	ser = serial.Serial()
 
 	def __init__(self, device_name='/dev/ttyUSB0', baudrate = 9600):
+		self.drt_manager = DRTManager()
 		self.open_serial(device_name, baudrate)
 #		print "opened serial port: "
 #		print self.ser.port
 #		print str(self.ser.baudrate) + "\n"
 		if (self.ping()):
-			if (self.read_drt()):
-				self.drt_lines = self.drt_string.splitlines()
-			else:
+			if (not self.read_drt()):
 				print "Failed to read DRT"
 		else:
 			print "No ping response"
@@ -55,175 +70,117 @@ class UART_HOST:
 
 	def ping(self):
 		self.ser.flushInput()
-		self.ser.write("L0000000000000000000000000000000")
-		ping_string = self.ser.read(32)
-#		print "read: " + ping_string
-		if (len(ping_string) > 0):
+		self._send_command(codec.COMMAND_PING, 0x00)
+		if (self._read_response(1) is not None):
 			return True
 		return False
 
+	def _send_command(self, command, address, count = 1, data = None, mem_device = False):
+		"""send a command in the ASCII format, override to change the format"""
+		self.ser.write(codec.encode_ascii_command(command, address,
+									count = count,
+									data = data,
+									mem_device = mem_device))
+
+	def _read_response(self, count = 1):
+		"""read an ASCII response with 'count' data words, override to change the
+		format
+
+		returns a tuple of (status, address, list of words), None on a timeout"""
+		resp = self.ser.read(32 + ((count - 1) * 8))
+#		print "response: " + resp
+		if (len(resp) < 32):
+			return None
+		status = string.atoi(resp[8:16], 16)
+		address = string.atoi(resp[16:24], 16)
+		return (status, address, codec.decode_ascii_words(resp, 24, count))
+
+	def _read_words(self, address, count = 1, mem_device = False):
+		self._send_command(codec.COMMAND_READ, address, count = count, mem_device = mem_device)
+		rsp = self._read_response(count)
+		if (rsp is None):
+			return []
+		return rsp[2]
+
+	def _write_words(self, address, data, mem_device = False):
+		if (not isinstance (data, list)):
+			data = [data]
+
+		self.ser.flushInput()
+		self._send_command(codec.COMMAND_WRITE, address, data = data, mem_device = mem_device)
+		if (self._read_response(1) is None):
+			return False
+		return True
+
 	def get_address_from_dev_index(self, dev_index):	
-		return string.atoi(self.drt_lines[((dev_index + 1) * 8) + 2], 16)
+		return self.drt_manager.addresses[dev_index]
 
 	def read_mem_data (self, dev_index, offset, data_count = 0):
-		response = []
 		address = self.get_address_from_dev_index(dev_index)
-		#data_count = 0 will read one double word, so if data_count says 1 just do a default read
-		if (data_count > 0):
-			data_count = data_count - 1;
-
-		read_cmd = "L%0.7X00010002%0.8X00000000"
-		read_cmd = (read_cmd) % (data_count, address + offset)
-		self.ser.write(read_cmd)
-		read_resp = self.ser.read(32 + (data_count * 8))
-#		print "read command: " + read_cmd
-#		print "response: " + read_resp
-
-		if (len(read_resp) > 0):
-			for i in range (0, data_count + 1):
-				response.append(string.atoi(read_resp[(24 + (i * 8)):(32 + (i * 8))], 16))
-		return response
+		#data_count = 0 will read one double word
+		return self._read_words(address + offset, max(data_count, 1), mem_device = True)
 		
 	def read_data(self, dev_index, offset, data_count = 0):
-		response = []
 		address = self.get_address_from_dev_index(dev_index)
-		#data_count = 0 will read one double word, so if data_count says 1 just do a default read
-		if (data_count > 0):
-			data_count = data_count - 1;
-
-		read_cmd = "L%0.7X00000002%0.8X00000000"
-		read_cmd = (read_cmd) % (data_count, address + offset)
-		self.ser.write(read_cmd)
-		read_resp = self.ser.read(32 + (data_count * 8))
-#		print "read command: " + read_cmd
-		print "response: " + read_resp
-
-		if (len(read_resp) > 0):
-			for i in range (0, data_count + 1):
-				response.append(string.atoi(read_resp[(24 + (i * 8)):(32 + (i * 8))], 16))
-
-		return response
+		#data_count = 0 will read one double word
+		return self._read_words(address + offset, max(data_count, 1), mem_device = False)
 		
 	def write_mem_data(self, dev_index, offset, data):
-
-		if (not isinstance (data, list)):
-			data = [data]
-
 		address = self.get_address_from_dev_index(dev_index)
-		data_count = len(data) - 1
-		write_cmd = "L%0.7X00010001%0.8X"
-		write_cmd = (write_cmd) % (data_count, address + offset)
-
-		for i in range (0, data_count + 1):
-			data_string = ("%0.8X") % data[i]
-			write_cmd += data_string;
-
-#		print "out string: " + write_cmd
-		self.ser.flushInput()
-		self.ser.write(write_cmd)
-		write_resp = self.ser.read(32)
-		if (len(write_resp) == 0):
-			return False
-		return True
+		return self._write_words(address + offset, data, mem_device = True)
 
 	def write_data(self, dev_index, offset, data):
-
-		if (not isinstance (data, list)):
-			data = [data]
-
 		address = self.get_address_from_dev_index(dev_index)
-		data_count = len(data) - 1
-		write_cmd = "L%0.7X00000001%0.8X"
-		write_cmd = (write_cmd) % (data_count, address + offset)
-
-		for i in range (0, data_count + 1):
-			data_string = ("%0.8X") % data[i]
-			write_cmd += data_string;
-
-#		print "out string: " + write_cmd
-		self.ser.flushInput()
-		self.ser.write(write_cmd)
-		write_resp = self.ser.read(32)
-		if (len(write_resp) == 0):
-			return False
-		return True
+		return self._write_words(address + offset, data, mem_device = False)
 	
 
 	def read_drt(self):
+		"""read the DRT header and then the whole device table, each with a
+		single multi-word read"""
 		self.drt_string = ""
-		count = 8
-		index = 0	
 		self.num_of_devices = 0
-		while (count > 0):
-
-			#clear things out
-		#	self.ser.flushInput()
-		#	self.ser.write("00000")
-			cmd_string = "L000000000000002%0.8X00000000"
-			cmd_string = (cmd_string) % index
-			#print "cmd_string: " + cmd_string
-			#return
-			self.ser.write(cmd_string)
-			temp_string = self.ser.read(32)
-#			print "temp string: " + temp_string
-			if (len(temp_string) == 0):
-				return False
-			else:
-				self.drt_string = self.drt_string + temp_string.__getslice__(24, 32) + "\n"
-		
-			if (index == 1):
-				size_string = temp_string.__getslice__(24, 32)
-#				print "size_string: " + size_string
-				#print "number of device: " + str(string.atoi(size_string, 16))
-				self.num_of_devices = string.atoi(size_string, 10)
-			index = index + 1
-			count = count - 1
-
-		#print "number of devices: " + str(self.num_of_devices)
-		#print "id block: \n" + drt_string
-		count = 0
-		while (count < ((self.num_of_devices) * 8)):
-			self.ser.write("0000")
-			cmd_string = "L000000000000002%0.8X00000000"
-			cmd_string = (cmd_string) % (count + 8)
-			#print "cmd_string: " + cmd_string
-			#return
-			self.ser.write(cmd_string)
-			temp_string = self.ser.read(32)
-			if (len(temp_string) == 0):
+		header = self._read_words(0, 8)
+		if (len(header) < 8):
+			return False
+		self.num_of_devices = header[1]
+		words = header
+		if (self.num_of_devices > 0):
+			count = self.num_of_devices * 8
+			temp_timeout = self.ser.timeout
+			#give a long table time to arrive on a slow link
+			if (temp_timeout is not None):
+				self.ser.timeout = temp_timeout + (count * 8 * 10.0 / self.ser.baudrate)
+			devices = self._read_words(8, count)
+			self.ser.timeout = temp_timeout
+			if (len(devices) < count):
 				return False
-			else:
-				self.drt_string = self.drt_string + temp_string.__getslice__(24, 32) + "\n"
-			count = count + 1
+			words = words + devices
+
+		self.drt_manager.set_drt(Array('B', struct.pack(">%dI" % len(words), *words)))
+		self.drt_string = self.drt_manager.drt_string
+		self.drt_lines = self.drt_manager.drt_lines
 		#got through it all
 		return True
 		
 	def is_device_attached(self, device_id = 0):
-		for dev_index in range (0, self.num_of_devices):
-			dev_id = string.atoi(self.drt_lines[((dev_index + 1) * 8)], 16)
-			if (dev_id == device_id):
-				return True
-		return False
+		return self.drt_manager.is_device_attached(device_id)
 	
 	def get_device_index(self, device_id):
-		for dev_index in range(0, self.num_of_devices):
-			dev_id = string.atoi(self.drt_lines[((dev_index + 1) * 8)], 16)
-			address_offset = string.atoi(self.drt_lines[((dev_index + 1) * 8) + 2], 16)
-			if (device_id == device_id):
-				return dev_index
-		return -1
+		indexes = self.drt_manager.find_devices(device_id)
+		if (len(indexes) == 0):
+			return -1
+		return indexes[0]
 
 	def wait_for_interrupts(self, wait_time = 1):
 		temp_timeout = self.ser.timeout
 		self.ser.timeout = wait_time
-		temp_string = self.ser.read(32)
+		rsp = self._read_response(1)
 		#put the old timeout back
 		self.ser.timeout = temp_timeout
-		if(len(temp_string) == 0):
+		if(rsp is None):
 			return False
-#		print "interrupt string: " + temp_string
-		self.interrupt_address = string.atoi(temp_string[16:24], 16)
-		self.interrupts = string.atoi(temp_string[24:32], 16)
+		self.interrupt_address = rsp[1]
+		self.interrupts = rsp[2][0]
 		return True
 
 	def is_interrupt_for_slave(self, device_id = 0):
@@ -236,10 +193,10 @@ class UART_HOST:
 		print "Found " + str(self.num_of_devices) + " slave(s)"
 		print "Searching for standard devices..."
 		for dev_index in range (0, (self.num_of_devices)):
-			device_id = string.atoi(self.drt_lines[((dev_index + 1) * 8)], 16)
-			flags = string.atoi(self.drt_lines[((dev_index + 1) * 8) + 1], 16)
-			address_offset = string.atoi(self.drt_lines[((dev_index + 1) * 8) + 2], 16)
-			num_of_registers = string.atoi(self.drt_lines[((dev_index + 1) * 8) + 3], 16)
+			device_id = self.drt_manager.ids[dev_index]
+			flags = self.drt_manager.flags[dev_index]
+			address_offset = self.drt_manager.addresses[dev_index]
+			num_of_registers = self.drt_manager.sizes[dev_index]
 			print "device ID: " + str(device_id)
 			data_list = list()
 			if (device_id == 1):
@@ -0,0 +1,244 @@
+#Distributed under the MIT licesnse.
+#Copyright (c) 2011 Dave McCoy (dave.mccoy@cospandesign.com)
+
+#Permission is hereby granted, free of charge, to any person obtaining a copy of
+#this software and associated documentation files (the "Software"), to deal in
+#the Software without restriction, including without limitation the rights to
+#use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies
+#of the Software, and to permit persons to whom the Software is furnished to do
+#so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+""" wait
+
+Strategies used while waiting for data from a board
+
+A receive loop polls the device, when a poll does not return any data the
+loop calls the 'poll' method of the wait strategy with the number of empty
+polls in a row, the strategy decides how long to give up the CPU:
+
+  SpinWait: poll again right away, lowest latency, uses a whole core
+  BackoffWait: sleep for an exponentially growing time between the polls
+  BlockingWait: rely on the device read to block (the FTDI holds a read
+    until its latency timer expires), if the read returns early the rest of
+    the period is slept so a device that does not block is not spun on
+
+Every strategy counts the waits, the polls and the time spent sleeping and
+waiting so they can be compared (Olympus.stats)
+
+"""
+
+__author__ = 'dave.mccoy@cospandesign.com (Dave McCoy)'
+
+import time
+
+
+class WaitStrategy:
+  """WaitStrategy
+
+  Base class of the wait strategies, the base class polls without sleeping
+  """
+
+  name = "spin"
+
+  def __init__(self):
+    self.reset_stats()
+
+  def reset_stats(self):
+    """reset_stats
+
+    Clear the counters
+
+    Args:
+      Nothing
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    #number of times a receive loop had to wait for data
+    self.waits = 0
+    self.polls = 0
+    self.sleep_time = 0.0
+    #time between the first empty poll and the data arriving (or a timeout)
+    self.wait_time = 0.0
+
+  def delay(self, attempt):
+    """delay
+
+    Returns the time to sleep after an empty poll, override to change the
+    behavior
+
+    Args:
+      attempt: number of empty polls in a row before this one
+
+    Returns:
+      seconds to sleep
+
+    Raises:
+      Nothing
+    """
+    return 0.0
+
+  def poll(self, attempt, timeout):
+    """poll
+
+    Called after a poll of the device that did not return any data
+
+    Args:
+      attempt: number of empty polls in a row before this one
+      timeout: absolute time (time.time()) the receive loop gives up, the
+        strategy never sleeps past it
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    self.polls += 1
+    if attempt == 0:
+      self.waits += 1
+    delay = self.delay(attempt)
+    if delay <= 0:
+      return
+    delay = min(delay, timeout - time.time())
+    if delay > 0:
+      time.sleep(delay)
+      self.sleep_time += delay
+
+  def finished(self, elapsed):
+    """finished
+
+    Called when the receive loop stops waiting
+
+    Args:
+      elapsed: seconds between the first empty poll and the end of the wait
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    self.wait_time += elapsed
+
+  def stats(self):
+    """stats
+
+    Returns the counters of the strategy
+
+    Args:
+      Nothing
+
+    Returns:
+      dictionary of the counters
+
+    Raises:
+      Nothing
+    """
+    return {"strategy": self.name,
+            "waits": self.waits,
+            "polls": self.polls,
+            "sleep time": self.sleep_time,
+            "wait time": self.wait_time}
+
+
+class SpinWait(WaitStrategy):
+  """SpinWait
+
+  Poll the device as fast as possible
+  """
+  pass
+
+
+class BackoffWait(WaitStrategy):
+  """BackoffWait
+
+  Spin for a few polls and then sleep, doubling the sleep after each empty
+  poll up to a maximum
+  """
+
+  name = "backoff"
+
+  def __init__(self, initial = 0.00001, maximum = 0.001, factor = 2.0,
+               spin = 4):
+    """__init__
+
+    Args:
+      initial: first sleep in seconds
+      maximum: longest sleep in seconds
+      factor: growth of the sleep after each empty poll
+      spin: number of polls without sleeping before the first sleep
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    self.initial = initial
+    self.maximum = maximum
+    self.factor = factor
+    self.spin = spin
+    WaitStrategy.__init__(self)
+
+  def delay(self, attempt):
+    if attempt < self.spin:
+      return 0.0
+    return min(self.maximum, self.initial * (self.factor ** (attempt - self.spin)))
+
+
+class BlockingWait(WaitStrategy):
+  """BlockingWait
+
+  The device read is expected to block for up to 'period' (the latency timer
+  of the FTDI), a read that returns early is padded out to the period
+  """
+
+  name = "blocking"
+
+  def __init__(self, period = 0.004):
+    """__init__
+
+    Args:
+      period: time in seconds a read of the device blocks when there is no
+        data, this should match the latency timer of the device
+
+    Returns:
+      Nothing
+
+    Raises:
+      Nothing
+    """
+    self.period = period
+    self.poll_time = 0.0
+    self.read_time = 0.0
+    WaitStrategy.__init__(self)
+
+  def poll(self, attempt, timeout):
+    now = time.time()
+    if attempt == 0:
+      #the start of the first read is not known, the next read blocks
+      self.poll_time = now
+    else:
+      self.read_time = now - self.poll_time
+    WaitStrategy.poll(self, attempt, timeout)
+    self.poll_time = time.time()
+
+  def delay(self, attempt):
+    if attempt == 0:
+      return 0.0
+    return self.period - self.read_time
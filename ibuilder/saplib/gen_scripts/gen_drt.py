@@ -3,10 +3,15 @@ from gen import Gen
 import saputils
 from string import Template
 from string import atoi
+import struct
+import binascii
 
 """
 Changes:
 
+10/18/2026
+	-Word 3 of the header holds a hash of the device entries, the host uses
+	it to validate a cached DRT without reading the devices
 12/13/2011
 	-Changed the response from 25 characters to 32
 12/02/2011
@@ -14,6 +19,16 @@ Changes:
 """
 
 
+def device_table_hash(dev_buf):
+	"""CRC32 of the device entries (never 0, 0 marks a DRT without a hash)"""
+	words = [int(line, 16) for line in dev_buf.splitlines()]
+	data = struct.pack(">%dI" % len(words), *words)
+	table_hash = binascii.crc32(data) & 0xFFFFFFFF
+	if table_hash == 0:
+		table_hash = 1
+	return table_hash
+
+
 class GenDRT(Gen):
 	"""Generate the DRT ROM"""
 
@@ -50,17 +65,7 @@ class GenDRT(Gen):
 		num_dev_string = "{0:0=8X}"
 		num_dev_string = num_dev_string.format(number_of_devices)
 
-		#header
-		out_buf = version_string + id_string + "\n"
-		out_buf += num_dev_string + "\n" 
-		out_buf += "00000000" + "\n"
-		out_buf += "00000000" + "\n"
-		out_buf += "00000000" + "\n"
-		out_buf += "00000000" + "\n"
-		out_buf += "00000000" + "\n"
-		out_buf += "00000000" + "\n"
-
-
+		dev_buf = ""
 
 		#peripheral slaves
 		for i in range (0, len(tags["SLAVES"])):
@@ -85,14 +90,14 @@ class GenDRT(Gen):
 			drt_offset_buffer = drt_offset_buffer.format(offset)
 			drt_size_buffer = drt_size_buffer.format(atoi(slave_tags["keywords"]["DRT_SIZE"]))
 
-			out_buf += drt_id_buffer + "\n"
-			out_buf += drt_flags_buffer + "\n"
-			out_buf += drt_offset_buffer + "\n"
-			out_buf += drt_size_buffer + "\n"
-			out_buf += "00000000\n"
-			out_buf += "00000000\n"
-			out_buf += "00000000\n"
-			out_buf += "00000000\n"
+			dev_buf += drt_id_buffer + "\n"
+			dev_buf += drt_flags_buffer + "\n"
+			dev_buf += drt_offset_buffer + "\n"
+			dev_buf += drt_size_buffer + "\n"
+			dev_buf += "00000000\n"
+			dev_buf += "00000000\n"
+			dev_buf += "00000000\n"
+			dev_buf += "00000000\n"
 
 
 		#memory slaves
@@ -120,15 +125,26 @@ class GenDRT(Gen):
 				drt_size_buffer = drt_size_buffer.format(atoi(slave_tags["keywords"]["DRT_SIZE"]))
 				mem_offset += atoi(slave_tags["keywords"]["DRT_SIZE"]) 
 
-				out_buf += drt_id_buffer + "\n"
-				out_buf += drt_flags_buffer + "\n"
-				out_buf += drt_offset_buffer + "\n"
-				out_buf += drt_size_buffer + "\n"
-				out_buf += "00000000\n"
-				out_buf += "00000000\n"
-				out_buf += "00000000\n"
-				out_buf += "00000000\n"
+				dev_buf += drt_id_buffer + "\n"
+				dev_buf += drt_flags_buffer + "\n"
+				dev_buf += drt_offset_buffer + "\n"
+				dev_buf += drt_size_buffer + "\n"
+				dev_buf += "00000000\n"
+				dev_buf += "00000000\n"
+				dev_buf += "00000000\n"
+				dev_buf += "00000000\n"
+
 
+		#header, word 3 is the hash of the device entries
+		out_buf = version_string + id_string + "\n"
+		out_buf += num_dev_string + "\n" 
+		out_buf += "00000000" + "\n"
+		out_buf += "{0:0=8X}".format(device_table_hash(dev_buf)) + "\n"
+		out_buf += "00000000" + "\n"
+		out_buf += "00000000" + "\n"
+		out_buf += "00000000" + "\n"
+		out_buf += "00000000" + "\n"
+		out_buf += dev_buf
 
 		return out_buf 
 
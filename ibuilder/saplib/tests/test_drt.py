@@ -4,6 +4,8 @@ import os
 import sys
 from inspect import isclass
 import json
+import struct
+import binascii
 import saputils
 
 class Test (unittest.TestCase):
@@ -89,6 +91,17 @@ class Test (unittest.TestCase):
 			print result
 		self.assertEqual(len(result) > 0, True)
 
+	def test_gen_drt_hash(self):
+		"""the header holds the CRC32 of the device entries"""
+		filename = os.getenv("SAPLIB_BASE") + "/example_project/mem_example.json"
+		tags = json.loads(open(filename).read())
+		result = self.gen.gen_script(tags, buf = "", debug = self.dbg)
+		lines = result.splitlines()
+		words = [int(line, 16) for line in lines[8:]]
+		data = struct.pack(">%dI" % len(words), *words)
+		self.assertEqual(int(lines[3], 16), binascii.crc32(data) & 0xFFFFFFFF)
+		self.assertEqual(len(words), int(lines[1], 16) * 8)
+
 
 if __name__ == "__main__":
 	unittest.main()